@@ -0,0 +1,13 @@
+import os
+import sys
+
+# ---------------------------------------------------------------------
+# Allows `python -m src <command>` from the project root.
+# Modules in src/ import each other by plain name (e.g. `from utils import ...`),
+# so src/ itself must be on the import path.
+# ---------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+main()
@@ -0,0 +1,353 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# ---------------------------------------------------------------------
+# Make sibling modules importable when run as `python src/benchmark.py`.
+# ---------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "results", "benchmarks")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+MODELS = ["random_forest", "linear_regression"]
+DEFAULT_COMPRESSION = ["0", "3", "9"]   # see model.parse_compression
+
+# A stage is flagged when it is this much slower (or uses this much more
+# peak memory) than the baseline. Differences below the noise floors are
+# never flagged (timer and allocator jitter on very fast stages).
+DEFAULT_TOLERANCE = 0.20
+NOISE_FLOOR_SECONDS = 0.005
+NOISE_FLOOR_MB = 1.0
+
+
+def measure(fn, repeat=3):
+    """
+    Time a callable and record its peak traced memory.
+
+    The timing runs and the memory run are separate because tracemalloc
+    slows down allocation-heavy code considerably.
+
+    Args:
+        fn (callable): Stage to measure (called repeat + 1 times).
+        repeat (int): Timing runs; the fastest is reported.
+
+    Returns:
+        tuple: (seconds, peak_mb, result of the last call)
+    """
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(times), peak / 1024 ** 2, result
+
+
+def _record(results, name, size, seconds, peak_mb, rows=None, file_bytes=None):
+    entry = {
+        "name": name,
+        "size": size,
+        "seconds": round(seconds, 6),
+        "peak_mb": round(peak_mb, 3),
+    }
+    if rows:
+        entry["rows_per_sec"] = round(rows / seconds, 1) if seconds > 0 else None
+    if file_bytes is not None:
+        entry["file_bytes"] = file_bytes
+    results.append(entry)
+    rate = f"  {entry['rows_per_sec']:>14,.0f} rows/s" if rows else ""
+    disk = f"  {file_bytes / 1024 ** 2:>9.2f} MB on disk" if file_bytes is not None else ""
+    print(f"  {name:<28} {size:>9,}  {seconds:>9.4f}s  {peak_mb:>9.1f} MB{rate}{disk}")
+
+
+def run_benchmarks(sizes=None, models=None, subject="math", repeat=3, include_eda=True,
+                   compression=None, output_formats=None):
+    """
+    Benchmark every stage of the project at several data sizes.
+
+    Stages (per size, on synthetic data learned from `subject`):
+        - load_csv:         read_dataset_csv without cache (CSV parse)
+        - load_cached:      read_dataset_csv from the on-disk cache
+        - preprocess:       build_preprocessor fit_transform
+        - train_<model>:    model.train_model (split + fit)
+        - predict_<model>:  pipeline.predict on all rows (rows/sec)
+        - write_<format>:   writing the prediction results (ID column + 2
+                            prediction columns) as csv / ndjson / parquet /
+                            arrow, with the file size (rows/sec)
+        - save_<model>_c<level> / load_<model>_c<level>:
+                            model.save_model and joblib.load per compression
+                            level, with the file size
+        - eda:              distribution plots + correlation heatmap
+    plus load_data on the two real datasets.
+
+    Args:
+        sizes (list of int): Row counts (default: DEFAULT_SIZES).
+        models (list of str): Models to train/predict (default: MODELS).
+        subject (str): Dataset the synthetic data is learned from.
+        repeat (int): Timing runs per stage (fastest is kept).
+        include_eda (bool): Also benchmark EDA plotting.
+        compression (list, optional): Compression settings for the save/load
+            stages (default: DEFAULT_COMPRESSION).
+        output_formats (list, optional): Prediction output formats to time
+            (default: every format usable here, see output_formats.available_formats).
+
+    Returns:
+        dict: {"meta": environment info, "results": list of stage entries}
+    """
+    import numpy as np
+    import pandas as pd
+    import sklearn
+    from sklearn.pipeline import Pipeline
+
+    import data_loader
+    import eda
+    from generate_sample_data import generate_synthetic
+    import joblib
+    from model import build_regressor, train_model, save_model
+    from preprocessing import build_preprocessor, preprocessor_options
+    from predict import predict_frame
+    from output_formats import EXTENSIONS, PredictionWriter, available_formats
+
+    sizes = sizes or DEFAULT_SIZES
+    models = models or MODELS
+    compression = compression or DEFAULT_COMPRESSION
+    output_formats = output_formats or available_formats()
+    results = []
+
+    print(f"  {'stage':<28} {'rows':>9}  {'time':>10}  {'peak mem':>12}")
+
+    seconds, peak, _ = measure(lambda: data_loader.load_data(use_cache=False), repeat)
+    _record(results, "load_data", 0, seconds, peak)
+
+    with tempfile.TemporaryDirectory(prefix="sgp_bench_") as tmp_dir:
+        # Keep figures and dataset caches of the synthetic files out of results/
+        saved_dirs = eda.FIGURES_DIR, data_loader.CACHE_DIR
+        eda.FIGURES_DIR = os.path.join(tmp_dir, "figures")
+        data_loader.CACHE_DIR = os.path.join(tmp_dir, "cache")
+        try:
+            for size in sizes:
+                csv_path = generate_synthetic(subject, os.path.join(tmp_dir, f"synthetic_{size}.csv"),
+                                              size, seed=0)
+
+                # --- Load ---
+                seconds, peak, df = measure(lambda: data_loader.read_dataset_csv(csv_path, use_cache=False), repeat)
+                _record(results, "load_csv", size, seconds, peak, rows=size)
+
+                data_loader.read_dataset_csv(csv_path)  # populate the disk cache
+
+                def load_cached():
+                    data_loader.clear_cache()
+                    return data_loader.read_dataset_csv(csv_path)
+
+                seconds, peak, _ = measure(load_cached, repeat)
+                _record(results, "load_cached", size, seconds, peak, rows=size)
+
+                X, y = df.drop(columns=["G3"]), df["G3"]
+                numeric_cols = X.select_dtypes(include="number").columns.tolist()
+                categorical_cols = X.select_dtypes(exclude="number").columns.tolist()
+
+                # --- Preprocess ---
+                seconds, peak, _ = measure(
+                    lambda: build_preprocessor(numeric_cols, categorical_cols).fit_transform(X), repeat
+                )
+                _record(results, "preprocess", size, seconds, peak, rows=size)
+
+                for model_name in models:
+                    def make_pipeline():
+                        return Pipeline(steps=[
+                            ("preprocessor", build_preprocessor(numeric_cols, categorical_cols,
+                                                                **preprocessor_options(model_name))),
+                            ("model", build_regressor(model_name)),
+                        ])
+
+                    # --- Train ---
+                    seconds, peak, trained = measure(lambda: train_model(X, y, make_pipeline())[0], repeat)
+                    _record(results, f"train_{model_name}", size, seconds, peak, rows=size)
+
+                    # --- Predict ---
+                    seconds, peak, _ = measure(lambda: trained.predict(X), repeat)
+                    _record(results, f"predict_{model_name}", size, seconds, peak, rows=size)
+
+                    # --- Save / load per compression level ---
+                    models_dir = os.path.join(tmp_dir, "models")
+                    for level in compression:
+                        tag = str(level).replace(":", "")
+                        filename = f"{model_name}_{size}_c{tag}.pkl"
+                        seconds, peak, saved = measure(
+                            lambda: save_model(trained, models_dir, filename, save_latest=False,
+                                               compress=level), repeat
+                        )
+                        file_bytes = os.path.getsize(saved["versioned"])
+                        _record(results, f"save_{model_name}_c{tag}", size, seconds, peak,
+                                file_bytes=file_bytes)
+                        seconds, peak, _ = measure(lambda: joblib.load(saved["versioned"]), repeat)
+                        _record(results, f"load_{model_name}_c{tag}", size, seconds, peak,
+                                file_bytes=file_bytes)
+
+                # --- Prediction output formatting (same results for every format) ---
+                ids = pd.Series([f"{i:08d}" for i in range(len(X))], name="student_id")
+                predictions = predict_frame(trained, pd.concat([ids, X], axis=1), id_column="student_id")
+                for fmt in output_formats:
+                    out_path = os.path.join(tmp_dir, f"predictions_{size}{EXTENSIONS[fmt]}")
+
+                    def write_output():
+                        with PredictionWriter(out_path, fmt) as writer:
+                            writer.write(predictions)
+
+                    seconds, peak, _ = measure(write_output, repeat)
+                    _record(results, f"write_{fmt}", size, seconds, peak, rows=size,
+                            file_bytes=os.path.getsize(out_path))
+
+                # --- EDA ---
+                if include_eda:
+                    def run_eda():
+                        with contextlib.redirect_stdout(io.StringIO()):  # silence "Saved ..." lines
+                            eda.plot_distributions(df, dataset_name=f"bench_{size}")
+                            eda.plot_correlation_heatmap(df, dataset_name=f"bench_{size}")
+
+                    seconds, peak, _ = measure(run_eda, repeat)
+                    _record(results, "eda", size, seconds, peak, rows=size)
+        finally:
+            eda.FIGURES_DIR, data_loader.CACHE_DIR = saved_dirs
+
+    meta = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "subject": subject,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a benchmark report with a stored baseline.
+
+    Args:
+        report (dict): Output of run_benchmarks().
+        baseline (dict): An earlier report.
+        tolerance (float): Allowed relative slowdown / memory growth (0.20 = 20%).
+
+    Returns:
+        list of dict: One entry per stage present in both reports, with the
+        time and memory ratios and a "regression" flag.
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline.get("results", [])}
+    comparison = []
+    for current in report["results"]:
+        old = previous.get((current["name"], current["size"]))
+        if old is None:
+            continue
+
+        time_ratio = current["seconds"] / old["seconds"] if old["seconds"] > 0 else 1.0
+        mem_ratio = current["peak_mb"] / old["peak_mb"] if old["peak_mb"] > 0 else 1.0
+        slower = (time_ratio > 1 + tolerance
+                  and current["seconds"] - old["seconds"] > NOISE_FLOOR_SECONDS)
+        bigger = (mem_ratio > 1 + tolerance
+                  and current["peak_mb"] - old["peak_mb"] > NOISE_FLOOR_MB)
+
+        comparison.append({
+            "name": current["name"],
+            "size": current["size"],
+            "time_ratio": round(time_ratio, 3),
+            "memory_ratio": round(mem_ratio, 3),
+            "regression": slower or bigger,
+        })
+    return comparison
+
+
+def save_report(report, path=None):
+    """Write a report as JSON (default: results/benchmarks/benchmark_<timestamp>.json)."""
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(BENCHMARK_DIR, f"benchmark_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, preprocess, train, predict and EDA")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to benchmark")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=MODELS)
+    parser.add_argument("--subject", choices=["math", "portuguese"], default="math",
+                        help="Dataset the synthetic data is learned from")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage (fastest is kept)")
+    parser.add_argument("--no-eda", action="store_true", help="Skip the EDA plotting stage")
+    parser.add_argument("--compression", nargs="+", default=DEFAULT_COMPRESSION,
+                        help="Model compression settings to compare, e.g. 0 3 lz4:3")
+    parser.add_argument("--formats", nargs="+", default=None,
+                        help="Prediction output formats to time (default: all available: "
+                             "csv ndjson, plus parquet arrow with pyarrow)")
+    parser.add_argument("--out", default=None, help="JSON report path")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown / memory growth before flagging (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when a regression is flagged")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.models, args.subject, args.repeat, not args.no_eda,
+                            args.compression, args.formats)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare_to_baseline(report, baseline, args.tolerance)
+        regressions = [c for c in report["comparison"] if c["regression"]]
+
+        print(f"\nComparison with baseline from {baseline.get('meta', {}).get('timestamp', '?')}:")
+        print(f"  {'stage':<28} {'rows':>9}  {'time ×':>7}  {'mem ×':>7}")
+        for c in report["comparison"]:
+            flag = "  ⚠️ REGRESSION" if c["regression"] else ""
+            print(f"  {c['name']:<28} {c['size']:>9,}  {c['time_ratio']:>7.2f}  {c['memory_ratio']:>7.2f}{flag}")
+
+    path = save_report(report, args.out)
+    print(f"\n✅ Benchmark report saved to: {path}")
+    if args.save_baseline:
+        save_report(report, BASELINE_FILE)
+        print(f"✅ Baseline updated: {BASELINE_FILE}")
+
+    if regressions:
+        print(f"⚠️ {len(regressions)} regression(s) above {args.tolerance:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Example:
+#   $ python src/benchmark.py --sizes 1000 10000 100000 --save-baseline
+#   $ python src/benchmark.py --fail-on-regression
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
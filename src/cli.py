@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# ---------------------------------------------------------------------
+# Single command-line entry point for the project:
+#
+#   python -m src train       --dataset math --model random_forest
+#   python -m src predict     --model results/models/random_forest_math.pkl --data data/new_data_math.csv
+#   python -m src eda         --dataset math
+#   python -m src tune        --dataset math --model random_forest --budget 120
+#   python -m src update      --dataset math --data data/new_term_math.csv  (fold in graded rows)
+#   python -m src metrics     latest | history math_random_forest
+#   python -m src benchmark   --sizes 1000 10000 --fail-on-regression
+#   python -m src importtime  (measure import cost of each entry module)
+#
+# Train, predict and tune also accept --n-jobs / --joblib-backend /
+# --blas-threads / --max-cores (see resources.py); train and predict accept
+# --profile-stage / --profile-mode (see profiling.py).
+#
+# Only argparse and the standard library are imported here. Each subcommand
+# imports its own dependencies when it runs, so `predict` never loads
+# sklearn's training modules, matplotlib or seaborn, and `train` never loads
+# the plotting stack.
+# ---------------------------------------------------------------------
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+DATASETS = ["math", "portuguese"]
+MODELS = ["random_forest", "linear_regression"]
+INCREMENTAL_MODELS = ["sgd"]      # trainable with `train --model sgd`, not part of "all"
+
+# Entry modules whose import cost is tracked by `importtime`
+IMPORT_TARGETS = ["cli", "predict", "main", "eda", "run"]
+HEAVY_MODULES = ["sklearn", "matplotlib", "seaborn", "scipy"]
+
+
+def cmd_train(args):
+    """Train + evaluate + save the selected dataset/model combinations."""
+    from main import run_models
+
+    datasets = DATASETS if args.dataset == "all" else [args.dataset]
+    models = MODELS if args.model == "all" else [args.model]
+    for dataset in datasets:
+        # Preprocessing is fitted once per dataset and shared by all models
+        run_models(dataset, models, export_compiled=args.compile,
+                   cv_folds=args.cv, cv_refit=args.refit_full, compress=args.compress,
+                   force=args.force)
+
+
+def cmd_predict(args):
+    """Run predictions with a trained model on new data."""
+    from predict import run_prediction
+
+    run_prediction(args.model, args.data, args.out, chunksize=args.chunksize,
+                   output_format=args.format, id_column=args.id_column, workers=args.workers)
+
+
+def cmd_eda(args):
+    """Print dataset summaries and save EDA plots."""
+    import eda
+    from data_loader import load_dataset
+
+    if args.show:
+        eda.SHOW_PLOTS = True
+
+    if args.data:
+        # Large file: one streaming pass, the rows are never all in memory
+        from stream_stats import stats_from_csv
+
+        datasets = [os.path.splitext(os.path.basename(args.data))[0]]
+        loaders = {datasets[0]: lambda: stats_from_csv(args.data, args.chunksize, args.workers)}
+    else:
+        datasets = DATASETS if args.dataset == "all" else [args.dataset]
+        loaders = {dataset: (lambda d=dataset: load_dataset(d)) for dataset in datasets}
+
+    for dataset in datasets:
+        df = loaders[dataset]()
+        if df is None:
+            continue
+        print(f"\n=== {dataset.capitalize()} Dataset ===")
+        eda.summarize_dataset(df)
+        eda.plot_distributions(df, dataset_name=dataset, workers=args.workers,
+                               use_cache=not args.no_cache, faceted=args.faceted)
+        eda.plot_correlation_heatmap(df, dataset_name=dataset, use_cache=not args.no_cache)
+
+
+def cmd_tune(args):
+    """Budgeted hyperparameter search; the winner is saved like a normal run."""
+    from tuning import tune_and_save
+
+    datasets = DATASETS if args.dataset == "all" else [args.dataset]
+    models = MODELS if args.model == "all" else [args.model]
+    for dataset in datasets:
+        for model in models:
+            tune_and_save(dataset, model, args.budget, args.budget_type,
+                          args.candidates, args.eta, args.workers)
+
+
+def cmd_update(args):
+    """Fold a graded CSV batch into the saved SGD model, or report parity with a full retrain."""
+    import incremental
+
+    if args.parity:
+        datasets = DATASETS if args.dataset == "all" else [args.dataset]
+        for dataset in datasets:
+            incremental.print_parity(dataset, incremental.parity_report(dataset, args.batches, args.epochs))
+        return
+    if not args.data or args.dataset == "all":
+        raise SystemExit("update needs --data and a single --dataset (or use --parity)")
+    result = incremental.update_model(args.data, args.dataset, args.model, epochs=args.epochs)
+    print(f"✅ Updated {result['model_path']} with {result['rows']} rows "
+          f"(batch MAE {result['before']['mae']} → {result['after']['mae']})")
+
+
+def cmd_metrics(args):
+    """Query the metrics history (options are passed through to metrics_store.py)."""
+    import metrics_store
+
+    metrics_store.main(args.options)
+
+
+def cmd_benchmark(args):
+    """Benchmark suite (all options are passed through to benchmark.py)."""
+    import benchmark
+
+    benchmark.main(args.options)
+
+
+def measure_import_time(module: str, repeat: int = 3):
+    """
+    Measure how long importing `module` takes in a fresh interpreter.
+
+    Args:
+        module (str): Module name importable from src/ (e.g. "predict").
+        repeat (int): Number of fresh interpreters to start; the fastest run
+            is reported (the others mostly measure disk cache warm-up).
+
+    Returns:
+        dict: {"module", "seconds", "heavy_modules"} where heavy_modules lists
+        which of HEAVY_MODULES ended up imported.
+    """
+    code = (
+        "import sys, time, json\n"
+        f"sys.path.insert(0, {SRC_DIR!r})\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - t\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': elapsed, 'heavy_modules': heavy}))\n"
+    )
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda r: r["seconds"])
+    return {"module": module, "seconds": round(best["seconds"], 4), "heavy_modules": best["heavy_modules"]}
+
+
+def cmd_importtime(args):
+    """Print (and optionally save as JSON) the import time of each entry module."""
+    results = [measure_import_time(module, repeat=args.repeat) for module in args.modules]
+
+    print(f"{'module':<10} {'seconds':>8}  heavy dependencies loaded")
+    for r in results:
+        print(f"{r['module']:<10} {r['seconds']:>8.3f}  {', '.join(r['heavy_modules']) or '-'}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Import times saved to: {args.json}")
+
+
+def build_parser():
+    from resources import add_resource_arguments
+    from profiling import add_profiling_arguments
+
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Student grade prediction: train, predict and explore"
+    )
+    parser.add_argument("--log-format", choices=["text", "json"], default=None,
+                        help="File log format: text (results/logs/project.log) or "
+                             "JSON lines (results/logs/project.jsonl)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Train, evaluate and save models")
+    train.add_argument("--dataset", choices=DATASETS + ["all"], default="all")
+    train.add_argument("--model", choices=MODELS + INCREMENTAL_MODELS + ["all"], default="all")
+    train.add_argument("--compile", nargs="?", const="npz", default=False, choices=["npz", "mmap"],
+                       help="Also export a NumPy-only compiled predictor per model: "
+                            "npz (default) or mmap (memory-mapped, shared across worker processes)")
+    train.add_argument("--cv", type=int, default=None, metavar="K",
+                       help="Evaluate with K-fold cross-validation (folds run in parallel)")
+    train.add_argument("--refit-full", action="store_true",
+                       help="With --cv: train the saved model on all data")
+    train.add_argument("--compress", default="0", metavar="LEVEL",
+                       help="Model file compression: 0-9 (zlib) or METHOD[:LEVEL], e.g. lz4:3 (default: 0)")
+    train.add_argument("--force", action="store_true",
+                       help="Retrain even if data, parameters and code are unchanged since the last run")
+    add_resource_arguments(train)
+    add_profiling_arguments(train)
+    train.set_defaults(func=cmd_train)
+
+    predict = sub.add_parser("predict", help="Predict grades for new data")
+    predict.add_argument("--model", required=True, help="Path to trained model (.pkl, compiled .npz or .mmap)")
+    predict.add_argument("--data", required=True, help="Path to CSV file with new data")
+    predict.add_argument("--out", default="results/predictions",
+                         help="Directory to save predictions, or - to write them to stdout")
+    predict.add_argument("--format", choices=["csv", "ndjson", "parquet", "arrow"], default="csv",
+                         help="Output format (parquet and arrow need pyarrow)")
+    predict.add_argument("--id-column", default=None,
+                         help="Input column copied to the output, to join results without relying on row order")
+    predict.add_argument("--chunksize", type=int, default=None,
+                         help="Stream the input in chunks of N rows")
+    predict.add_argument("--workers", type=int, default=None,
+                         help="Score byte-range shards of the input in N processes (rows/sec is reported)")
+    add_resource_arguments(predict)
+    add_profiling_arguments(predict)
+    predict.set_defaults(func=cmd_predict)
+
+    eda = sub.add_parser("eda", help="Summaries and EDA plots")
+    eda.add_argument("--dataset", choices=DATASETS + ["all"], default="all")
+    eda.add_argument("--show", action="store_true", help="Show plots interactively as well as saving them")
+    eda.add_argument("--workers", type=int, default=1, help="Processes rendering figures in parallel")
+    eda.add_argument("--faceted", action="store_true",
+                     help="Draw all distributions into one grid figure instead of one file per column")
+    eda.add_argument("--no-cache", action="store_true", help="Redraw figures even if the data is unchanged")
+    eda.add_argument("--data", default=None,
+                     help="Stream this CSV in chunks instead of loading a dataset (for files larger than RAM)")
+    eda.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk with --data")
+    eda.set_defaults(func=cmd_eda)
+
+    tune = sub.add_parser("tune", help="Budgeted hyperparameter search (successive halving)")
+    tune.add_argument("--dataset", choices=DATASETS + ["all"], default="all")
+    tune.add_argument("--model", choices=MODELS + ["all"], default="all")
+    tune.add_argument("--budget", type=float, default=None,
+                      help="Budget in seconds per dataset/model (default: none)")
+    tune.add_argument("--budget-type", choices=["wall", "cpu"], default="wall")
+    tune.add_argument("--candidates", type=int, default=None, help="Number of candidates to start with")
+    tune.add_argument("--eta", type=int, default=3, help="Halving factor")
+    tune.add_argument("--workers", type=int, default=None, help="Parallel workers (default: all cores)")
+    add_resource_arguments(tune)
+    tune.set_defaults(func=cmd_tune)
+
+    update = sub.add_parser("update", help="Fold new graded rows into the saved SGD model (no full retrain)")
+    update.add_argument("--dataset", choices=DATASETS + ["all"], default="all")
+    update.add_argument("--data", default=None, help="CSV with the new rows, including G3")
+    update.add_argument("--model", default=None,
+                        help="Model to update (default: results/models/sgd_<dataset>.pkl)")
+    update.add_argument("--epochs", type=int, default=10, help="partial_fit passes over the batch")
+    update.add_argument("--parity", action="store_true",
+                        help="Instead of updating, compare incremental batches with a full retrain")
+    update.add_argument("--batches", type=int, default=4, help="With --parity: number of batches")
+    update.set_defaults(func=cmd_update)
+
+    benchmark = sub.add_parser(
+        "benchmark", help="Time and memory of load/preprocess/train/predict/EDA vs. a baseline",
+        description="Options are those of `python src/benchmark.py --help` "
+                    "(e.g. --sizes 1000 10000 --save-baseline)"
+    )
+    benchmark.set_defaults(func=cmd_benchmark)
+
+    metrics = sub.add_parser(
+        "metrics", help="Latest metrics, history and CSV export from the metrics store",
+        description="Options are those of `python src/metrics_store.py --help` "
+                    "(latest | history NAME [--since DATE] | export NAME --out FILE)"
+    )
+    metrics.set_defaults(func=cmd_metrics)
+
+    importtime = sub.add_parser("importtime", help="Measure import time of the entry modules")
+    importtime.add_argument("--modules", nargs="+", default=IMPORT_TARGETS)
+    importtime.add_argument("--repeat", type=int, default=3)
+    importtime.add_argument("--json", default=None, help="Also write the measurements to this JSON file")
+    importtime.set_defaults(func=cmd_importtime)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command in ("benchmark", "metrics"):
+        args.options = extra  # passed through to benchmark.py's own parser
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.log_format:
+        from utils import set_log_format
+        set_log_format(args.log_format)
+    if hasattr(args, "n_jobs"):
+        from resources import configure_from_args
+        configure_from_args(args)
+    if hasattr(args, "profile_stage"):
+        import profiling
+        profiling.configure_from_args(args)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,724 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# ---------------------------------------------------------------------
+# "Compiled" NumPy-only predictors for trained pipelines.
+#
+# A saved Pipeline(preprocessor, model) pays ColumnTransformer, OneHotEncoder
+# and StandardScaler overhead on every predict call. Once fitted, the whole
+# pipeline is just arithmetic on the raw columns:
+#
+#   - LinearRegression: scaling folds into the weights, and one-hot encoding
+#     becomes a per-category weight lookup, so a prediction is one dot
+#     product over the raw numeric columns plus one lookup per categorical
+#     column.
+#   - RandomForestRegressor: the trees are flattened into contiguous node
+#     arrays that are traversed for all rows and trees at once, on a float32
+#     feature matrix built the same way the fitted preprocessor builds it.
+#
+# Compiled models are stored as a single .npz file, or as a directory of
+# uncompressed .npy files ('<name>.mmap/') that is opened with
+# np.load(mmap_mode="r"): every process serving the same model then maps
+# the same page-cache copy of the node arrays instead of holding a private
+# copy (sklearn's Tree copies its arrays on unpickling, so a joblib.load of
+# the pipeline can never be shared this way). Either format only needs
+# NumPy to load and predict (pandas is only used if a DataFrame is passed in).
+# ---------------------------------------------------------------------
+
+FORMAT_VERSION = 1
+
+
+class _CompiledFeatures:
+    """
+    Raw-column feature encoding shared by the compiled models.
+
+    Attributes:
+        numeric_cols (list of str): Columns standardized by the preprocessor.
+        num_mean (np.ndarray): Per-column mean used by the scaler.
+        num_scale (np.ndarray): Per-column scale used by the scaler.
+        categorical_cols (list of str): One-hot encoded columns.
+        categories (list of np.ndarray): Sorted known categories per column (as str).
+    """
+
+    def __init__(self, numeric_cols, num_mean, num_scale, categorical_cols, categories):
+        self.numeric_cols = list(numeric_cols)
+        self.num_mean = np.asarray(num_mean, dtype=np.float64)
+        self.num_scale = np.asarray(num_scale, dtype=np.float64)
+        self.categorical_cols = list(categorical_cols)
+        self.categories = [np.asarray(c, dtype=str) for c in categories]
+
+    def numeric_matrix(self, X):
+        """Raw numeric columns as a float64 (n_rows, n_numeric) array."""
+        if not self.numeric_cols:
+            return np.empty((len(X), 0))
+        return np.column_stack([np.asarray(X[c], dtype=np.float64) for c in self.numeric_cols])
+
+    def category_codes(self, X, i):
+        """
+        Index of each row's value in self.categories[i], or -1 if unknown.
+        """
+        cats = self.categories[i]
+        values = np.asarray(X[self.categorical_cols[i]]).astype(str)
+        idx = np.searchsorted(cats, values)
+        idx_clipped = np.minimum(idx, len(cats) - 1)
+        known = (idx < len(cats)) & (cats[idx_clipped] == values)
+        return np.where(known, idx_clipped, -1)
+
+    def _base_arrays(self):
+        arrays = {"num_mean": self.num_mean, "num_scale": self.num_scale}
+        for i, cats in enumerate(self.categories):
+            arrays[f"categories_{i}"] = cats
+        return arrays
+
+    def _base_meta(self):
+        return {
+            "format_version": FORMAT_VERSION,
+            "numeric_cols": self.numeric_cols,
+            "categorical_cols": self.categorical_cols,
+        }
+
+
+class CompiledLinearModel(_CompiledFeatures):
+    """
+    Scaler + one-hot encoder + linear model folded into raw-column weights.
+
+    prediction = X_num @ num_weights + bias + sum_c cat_weights[c][category(x_c)]
+    """
+
+    kind = "linear"
+
+    def __init__(self, numeric_cols, num_mean, num_scale, categorical_cols, categories,
+                 num_weights, cat_weights, bias):
+        super().__init__(numeric_cols, num_mean, num_scale, categorical_cols, categories)
+        self.num_weights = np.asarray(num_weights, dtype=np.float64)
+        self.cat_weights = [np.asarray(w, dtype=np.float64) for w in cat_weights]
+        self.bias = float(bias)
+
+    def predict(self, X):
+        pred = self.numeric_matrix(X) @ self.num_weights + self.bias
+        for i, weights in enumerate(self.cat_weights):
+            codes = self.category_codes(X, i)
+            # Unknown categories encode to all zeros → no contribution
+            pred += np.where(codes >= 0, weights[np.maximum(codes, 0)], 0.0)
+        return pred
+
+    def _arrays(self):
+        arrays = self._base_arrays()
+        arrays["num_weights"] = self.num_weights
+        for i, w in enumerate(self.cat_weights):
+            arrays[f"cat_weights_{i}"] = w
+        arrays["bias"] = np.array(self.bias)
+        return arrays
+
+
+class CompiledForestModel(_CompiledFeatures):
+    """
+    Random forest with all trees flattened into contiguous node arrays.
+
+    Input features are the standardized numeric columns followed by one
+    indicator column per known category, cast to float32 exactly like
+    sklearn does before tree traversal (so split decisions match bit for bit).
+    Leaves point to themselves, so every row can be pushed down all trees
+    without branching; (row, tree) pairs that reached a leaf are dropped
+    from the working set as traversal goes deeper.
+
+    The traversal is vectorized NumPy, so it wins on the small batches typical
+    of interactive requests (no ColumnTransformer overhead) while sklearn's
+    Cython tree code stays faster on very large batches; use the benchmark
+    below to pick the path for a given workload.
+    """
+
+    kind = "forest"
+
+    def __init__(self, numeric_cols, num_mean, num_scale, categorical_cols, categories,
+                 feature, threshold, children, value, roots, max_depth, block_rows=4096):
+        super().__init__(numeric_cols, num_mean, num_scale, categorical_cols, categories)
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        # children[2 * node] = right child, children[2 * node + 1] = left child
+        self.children = np.asarray(children, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.block_rows = block_rows
+
+    def feature_matrix(self, X):
+        """Standardized numeric columns + one 0/1 indicator column per known category (float32)."""
+        blocks = [(self.numeric_matrix(X) - self.num_mean) / self.num_scale]
+        for i, cats in enumerate(self.categories):
+            codes = self.category_codes(X, i)
+            blocks.append(codes[:, None] == np.arange(len(cats))[None, :])
+        return np.hstack(blocks).astype(np.float32)
+
+    def predict(self, X):
+        Z = self.feature_matrix(X)
+        n_features = Z.shape[1]
+        n_trees = len(self.roots)
+        out = np.empty(len(Z))
+
+        # Rows are processed in blocks to bound the (rows × trees) node arrays
+        for start in range(0, len(Z), self.block_rows):
+            Zb = Z[start:start + self.block_rows]
+            n = len(Zb)
+            z_flat = Zb.ravel()
+
+            # One (row, tree) pair per entry; `base` is the row's offset in z_flat
+            nodes = np.tile(self.roots, n)
+            base = np.repeat(np.arange(n) * n_features, n_trees)
+            active = np.arange(n * n_trees)
+
+            for _ in range(self.max_depth):
+                cur = nodes[active]
+                go_left = z_flat[base[active] + self.feature[cur]] <= self.threshold[cur]
+                nxt = self.children[2 * cur + go_left]
+                nodes[active] = nxt
+                # Leaves point to themselves: drop pairs that stopped moving
+                moving = nxt != cur
+                if not moving.all():
+                    active = active[moving]
+                    if active.size == 0:
+                        break
+
+            out[start:start + n] = self.value[nodes].reshape(n, n_trees).mean(axis=1)
+        return out
+
+    def _arrays(self):
+        arrays = self._base_arrays()
+        arrays.update({
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "value": self.value,
+            "roots": self.roots,
+        })
+        return arrays
+
+
+# ---------------------------------------------------------------------
+# Compilation from a fitted sklearn pipeline
+# ---------------------------------------------------------------------
+
+def _unwrap(transformer):
+    """
+    Return the fitted scaler/encoder of a branch. Branches may be a
+    (sub-)Pipeline such as scaler → float32 cast (see build_preprocessor);
+    the cast does not change values beyond rounding, so only the scaler or
+    encoder step matters here.
+    """
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+    for _, step in getattr(transformer, "steps", []):
+        if isinstance(step, (StandardScaler, OneHotEncoder)):
+            return step
+    return transformer
+
+
+def _extract_preprocessing(preprocessor):
+    """
+    Read the fitted ColumnTransformer and describe every output feature.
+
+    Raises:
+        ValueError: If the preprocessor is not a ColumnTransformer.
+
+    Returns:
+        tuple: (features, layout) where features is a _CompiledFeatures and
+        layout is a list with one entry per transformed output column:
+            ("num", j)      → numeric column j, standardized
+            ("cat", i, k)   → indicator of category k of categorical column i
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+    if not isinstance(preprocessor, ColumnTransformer):
+        # e.g. the IncrementalPreprocessor of `--model sgd`
+        raise ValueError(f"unsupported preprocessor {type(preprocessor).__name__} "
+                         f"(only ColumnTransformer can be compiled)")
+
+    numeric_cols, means, scales = [], [], []
+    categorical_cols, categories = [], []
+    layout = []
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or len(columns) == 0:
+            continue
+        if transformer == "passthrough":
+            raise ValueError(f"Cannot compile passthrough transformer '{name}'")
+
+        step = _unwrap(transformer)
+        columns = list(columns)
+
+        if isinstance(step, StandardScaler):
+            n = len(columns)
+            mean = step.mean_ if step.mean_ is not None else np.zeros(n)
+            scale = step.scale_ if step.scale_ is not None else np.ones(n)
+            for j, col in enumerate(columns):
+                layout.append(("num", len(numeric_cols)))
+                numeric_cols.append(col)
+                means.append(mean[j])
+                scales.append(scale[j])
+
+        elif isinstance(step, OneHotEncoder):
+            if getattr(step, "_infrequent_enabled", False):
+                raise ValueError("Cannot compile OneHotEncoder with infrequent categories")
+            drop_idx = step.drop_idx_ if step.drop_idx_ is not None else [None] * len(columns)
+            for col, cats, drop in zip(columns, step.categories_, drop_idx):
+                i = len(categorical_cols)
+                cats = np.asarray(cats).astype(str)
+                order = np.argsort(cats, kind="stable")
+                position = np.empty_like(order)
+                position[order] = np.arange(len(order))  # original index → sorted index
+                categorical_cols.append(col)
+                categories.append(cats[order])
+                for k in range(len(cats)):
+                    if drop is not None and k == drop:
+                        continue
+                    layout.append(("cat", i, int(position[k])))
+        else:
+            raise ValueError(f"Cannot compile transformer '{name}' of type {type(step).__name__}")
+
+    features = _CompiledFeatures(numeric_cols, means, scales, categorical_cols, categories)
+    return features, layout
+
+
+def _compile_linear(features, layout, model):
+    coef = np.ravel(model.coef_)
+    if coef.shape[0] != len(layout):
+        raise ValueError("Model coefficients do not match the preprocessor output")
+
+    num_weights = np.zeros(len(features.numeric_cols))
+    cat_weights = [np.zeros(len(c)) for c in features.categories]
+    bias = float(np.ravel(model.intercept_)[0]) if np.ndim(model.intercept_) else float(model.intercept_)
+
+    for w, entry in zip(coef, layout):
+        if entry[0] == "num":
+            j = entry[1]
+            # w * (x - mean) / scale  =  (w / scale) * x  -  w * mean / scale
+            num_weights[j] += w / features.num_scale[j]
+            bias -= w * features.num_mean[j] / features.num_scale[j]
+        else:
+            _, i, k = entry
+            cat_weights[i][k] += w
+
+    return CompiledLinearModel(
+        features.numeric_cols, features.num_mean, features.num_scale,
+        features.categorical_cols, features.categories,
+        num_weights, cat_weights, bias
+    )
+
+
+def _compile_forest(features, layout, model):
+    # Column index of each transformed feature in the compiled input matrix:
+    # numeric columns first, then one indicator per (categorical column, category)
+    offsets = np.cumsum([len(features.numeric_cols)] + [len(c) for c in features.categories])
+    column_of = []
+    for entry in layout:
+        if entry[0] == "num":
+            column_of.append(entry[1])
+        else:
+            _, i, k = entry
+            column_of.append(offsets[i] + k)
+    column_of = np.asarray(column_of)
+
+    feature, threshold, children, value, roots = [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        idx = np.arange(n)
+
+        feature.append(column_of[np.where(is_leaf, 0, tree.feature)])
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        # Interleave (right, left) per node; leaves point to themselves
+        # so extra traversal steps are no-ops
+        pair = np.empty(2 * n, dtype=np.intp)
+        pair[0::2] = np.where(is_leaf, idx, tree.children_right) + offset
+        pair[1::2] = np.where(is_leaf, idx, tree.children_left) + offset
+        children.append(pair)
+        value.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n
+
+    return CompiledForestModel(
+        features.numeric_cols, features.num_mean, features.num_scale,
+        features.categorical_cols, features.categories,
+        np.concatenate(feature), np.concatenate(threshold),
+        np.concatenate(children), np.concatenate(value),
+        np.asarray(roots), max_depth
+    )
+
+
+def compile_pipeline(pipeline):
+    """
+    Convert a fitted Pipeline(preprocessor, model) into a NumPy-only predictor.
+
+    Supported:
+        - preprocessor: ColumnTransformer with StandardScaler (numeric) and
+          OneHotEncoder (categorical) branches, as built by build_preprocessor
+        - model: LinearRegression (or any linear model with coef_/intercept_)
+          or RandomForestRegressor
+
+    Args:
+        pipeline (sklearn.pipeline.Pipeline): Trained pipeline from run_pipeline.
+
+    Returns:
+        CompiledLinearModel or CompiledForestModel: object with predict(X)
+        producing the same outputs as pipeline.predict(X) (within float tolerance).
+
+    Raises:
+        ValueError: If the pipeline contains steps that cannot be compiled.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    features, layout = _extract_preprocessing(preprocessor)
+
+    if isinstance(model, RandomForestRegressor):
+        return _compile_forest(features, layout, model)
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return _compile_linear(features, layout, model)
+    raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+
+
+# ---------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------
+
+MMAP_SUFFIX = ".mmap"
+
+
+def _meta(compiled):
+    meta = compiled._base_meta()
+    meta["kind"] = compiled.kind
+    if compiled.kind == "forest":
+        meta["max_depth"] = compiled.max_depth
+    return meta
+
+
+def save_compiled(compiled, path):
+    """
+    Save a compiled model without pickled objects.
+
+    Args:
+        compiled (CompiledLinearModel or CompiledForestModel): Model to save.
+        path (str): Output path. A path ending in ".mmap" is written as a
+            directory of uncompressed .npy files (memory-mappable, see
+            load_compiled); anything else as a single uncompressed .npz file
+            (".npz" is appended if missing).
+
+    Returns:
+        str: Path of the written file or directory.
+    """
+    if path.endswith(MMAP_SUFFIX):
+        return _save_compiled_dir(compiled, path)
+
+    if not path.endswith(".npz"):
+        path += ".npz"
+    tmp_path = path[:-4] + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(_meta(compiled))), **compiled._arrays())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _save_compiled_dir(compiled, path):
+    """
+    Write meta.json plus one .npy file per array into `path`.
+
+    The directory is built under a temporary name and renamed into place; an
+    existing model directory is moved aside first and removed afterwards
+    (processes that already mapped its files keep working, since the
+    mapped files stay alive until they are unmapped).
+    """
+    import shutil
+
+    tmp_dir = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    for name, array in compiled._arrays().items():
+        # np.asarray keeps 0-d arrays (the linear bias) 0-d; np.save writes C order anyway
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(_meta(compiled), f, indent=2)
+
+    old_dir = None
+    if os.path.exists(path):
+        old_dir = f"{path}.{os.getpid()}.old"
+        os.replace(path, old_dir)
+    os.replace(tmp_dir, path)
+    if old_dir:
+        shutil.rmtree(old_dir)
+    return path
+
+
+class _NpyDirectory:
+    """Mapping-style access to a directory of .npy files (like an NpzFile)."""
+
+    def __init__(self, path, mmap_mode):
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+    def __getitem__(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=self.mmap_mode,
+                       allow_pickle=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def load_compiled(path, mmap_mode="r"):
+    """
+    Load a compiled model saved by save_compiled.
+
+    Args:
+        path (str): Path to the .npz file or '.mmap' directory.
+        mmap_mode (str or None): For '.mmap' directories, how the arrays are
+            opened (default "r": read-only memory maps shared by all processes
+            that load the same model; None reads private copies). Ignored for
+            .npz files, which are always read into memory.
+
+    Returns:
+        CompiledLinearModel or CompiledForestModel
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        source = _NpyDirectory(path, mmap_mode)
+    else:
+        source = np.load(path, allow_pickle=False)
+        meta = json.loads(str(source["meta"]))
+
+    with source as data:
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model version in {path}")
+
+        n_cat = len(meta["categorical_cols"])
+        common = (
+            meta["numeric_cols"], data["num_mean"], data["num_scale"],
+            meta["categorical_cols"], [data[f"categories_{i}"] for i in range(n_cat)],
+        )
+        if meta["kind"] == "linear":
+            return CompiledLinearModel(
+                *common,
+                data["num_weights"],
+                [data[f"cat_weights_{i}"] for i in range(n_cat)],
+                float(data["bias"])
+            )
+        if meta["kind"] == "forest":
+            return CompiledForestModel(
+                *common,
+                data["feature"], data["threshold"], data["children"],
+                data["value"], data["roots"], meta["max_depth"]
+            )
+    raise ValueError(f"Unknown compiled model kind in {path}: {meta['kind']}")
+
+
+# ---------------------------------------------------------------------
+# Benchmark: sklearn pipeline vs compiled predictor
+# ---------------------------------------------------------------------
+
+def benchmark(pipeline, df, repeat=3):
+    """
+    Compare rows/sec of pipeline.predict and the compiled predictor on `df`.
+
+    Args:
+        pipeline (sklearn.pipeline.Pipeline): Trained pipeline.
+        df (pd.DataFrame): Feature rows (without 'G3').
+        repeat (int): Timing repetitions; the fastest is reported.
+
+    Returns:
+        dict: rows, rows/sec for both paths, speedup and max absolute difference.
+    """
+    compiled = compile_pipeline(pipeline)
+
+    def best_time(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn(df)
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    sk_time, sk_pred = best_time(pipeline.predict)
+    np_time, np_pred = best_time(compiled.predict)
+
+    return {
+        "rows": len(df),
+        "sklearn_rows_per_sec": round(len(df) / sk_time),
+        "compiled_rows_per_sec": round(len(df) / np_time),
+        "speedup": round(sk_time / np_time, 2),
+        "max_abs_diff": float(np.max(np.abs(sk_pred - np_pred))),
+    }
+
+
+# ---------------------------------------------------------------------
+# Memory per worker process: private copy vs shared memory map
+# ---------------------------------------------------------------------
+
+def process_memory():
+    """
+    Memory of the current process in MB, from /proc (Linux).
+
+    Returns:
+        dict: rss, pss (shared pages split among the processes mapping them)
+        and private (pages no other process maps); pss/private are None where
+        /proc/self/smaps_rollup is not available.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        fields["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    private = None
+    if "Private_Clean" in fields:
+        private = fields["Private_Clean"] + fields.get("Private_Dirty", 0.0)
+    return {"rss": fields.get("Rss"), "pss": fields.get("Pss"), "private": private}
+
+
+def _memory_worker(model_path, data_path, rows, barrier, queue):
+    """Load a model, predict, and report memory while all workers are alive."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import pandas as pd
+    from predict import load_model, prepare_features
+    from schema import read_student_csv
+
+    base = prepare_features(read_student_csv(data_path), warn=False)
+    df = pd.concat([base] * -(-rows // len(base)), ignore_index=True).head(rows)
+    # Import sklearn up front so "before → after" only counts the model itself
+    import sklearn.compose, sklearn.ensemble, sklearn.linear_model, sklearn.pipeline  # noqa: E401,F401
+    before = process_memory()
+
+    model = load_model(model_path)
+    model.predict(df)
+
+    barrier.wait()            # every worker holds its model now
+    after = process_memory()
+    queue.put({"before": before, "after": after})
+    barrier.wait()            # keep the model alive until all have measured
+
+
+def worker_memory(model_path, data_path, workers=4, rows=1_000):
+    """
+    Measure memory per prediction worker process for one model file.
+
+    Starts `workers` fresh processes that each load the model and predict
+    `rows` rows, then reads /proc/self/smaps_rollup in all of them while they
+    are alive at the same time. For a .pkl every worker holds a private copy
+    of the forest; for a '.mmap' directory the node arrays are shared
+    page-cache pages, so private memory and PSS stay flat as workers grow.
+
+    Returns:
+        dict: Per-worker average of the memory added by loading the model
+        (after - before) in MB: "rss", "pss", "private", plus "total_pss"
+        (sum over workers of their full PSS).
+    """
+    import multiprocessing as mp
+
+    ctx = mp.get_context("spawn")
+    barrier, queue = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=_memory_worker, args=(model_path, data_path, rows, barrier, queue))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    reports = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    def avg_delta(key):
+        values = [r["after"][key] - r["before"][key] for r in reports
+                  if r["after"][key] is not None and r["before"][key] is not None]
+        return round(sum(values) / len(values), 2) if values else None
+
+    total_pss = [r["after"]["pss"] for r in reports if r["after"]["pss"] is not None]
+    return {
+        "model": model_path,
+        "workers": workers,
+        "rss": avg_delta("rss"),
+        "pss": avg_delta("pss"),
+        "private": avg_delta("private"),
+        "total_pss": round(sum(total_pss), 1) if total_pss else None,
+    }
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Compile a saved pipeline and benchmark it against the sklearn path.
+# Example:
+#   $ python src/compiled.py --model results/models/random_forest_math.pkl \
+#                            --data data/student-mat.csv --rows 100000
+#
+# Memory per worker for the .pkl, .npz and shared .mmap formats:
+#   $ python src/compiled.py --model results/models/random_forest_portuguese.pkl \
+#                            --data data/student-por.csv --memory-workers 4
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import joblib
+    import pandas as pd
+    from schema import read_student_csv
+
+    parser = argparse.ArgumentParser(description="Compile a trained pipeline and benchmark it")
+    parser.add_argument("--model", required=True, help="Path to trained model (.pkl)")
+    parser.add_argument("--data", required=True, help="CSV file with input rows")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000],
+                        help="Input sizes to benchmark (rows are repeated from --data)")
+    parser.add_argument("--out", default=None,
+                        help="Also save the compiled model to this path (.npz file, or .mmap directory)")
+    parser.add_argument("--memory-workers", type=int, default=None,
+                        help="Instead of timing, measure memory per worker process for "
+                             "the .pkl, .npz and .mmap formats with this many workers")
+    args = parser.parse_args()
+
+    if args.memory_workers:
+        import tempfile
+        compiled = compile_pipeline(joblib.load(args.model))
+        with tempfile.TemporaryDirectory(prefix="sgp_mem_") as tmp_dir:
+            paths = [
+                args.model,
+                save_compiled(compiled, os.path.join(tmp_dir, "model.npz")),
+                save_compiled(compiled, os.path.join(tmp_dir, "model.mmap")),
+            ]
+            print(f"Memory added per worker by loading the model ({args.memory_workers} workers, MB)")
+            print(f"{'format':<8} {'RSS':>8} {'PSS':>8} {'private':>8} {'total PSS':>10}")
+            for path in paths:
+                r = worker_memory(path, args.data, workers=args.memory_workers)
+                label = "mmap" if path.endswith(".mmap") else os.path.splitext(path)[1].lstrip(".")
+                print(f"{label:<8} {r['rss']:>8.1f} {r['pss']:>8.1f} {r['private']:>8.1f} {r['total_pss']:>10.1f}")
+        sys.exit(0)
+
+    pipeline = joblib.load(args.model)
+    base = read_student_csv(args.data)
+    base = base.drop(columns=["G3"], errors="ignore")
+
+    if args.out:
+        out_path = save_compiled(compile_pipeline(pipeline), args.out)
+        # Round trip: the saved file must load and predict like the pipeline
+        reloaded = load_compiled(out_path)
+        diff = float(np.max(np.abs(reloaded.predict(base) - pipeline.predict(base))))
+        if diff > 1e-6:
+            raise SystemExit(f"❌ Reloaded {out_path} differs from the pipeline (max |diff| {diff:.2e})")
+        print(f"✅ Compiled model saved to: {out_path} (reloaded, max |diff| {diff:.2e})")
+
+    print(f"{'rows':>10} {'sklearn rows/s':>15} {'compiled rows/s':>16} {'speedup':>8} {'max |diff|':>11}")
+    for n in args.rows:
+        reps = -(-n // len(base))
+        df = pd.concat([base] * reps, ignore_index=True).head(n)
+        r = benchmark(pipeline, df)
+        print(f"{r['rows']:>10} {r['sklearn_rows_per_sec']:>15,} {r['compiled_rows_per_sec']:>16,} "
+              f"{r['speedup']:>8} {r['max_abs_diff']:>11.2e}")
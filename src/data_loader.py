@@ -1,5 +1,9 @@
+import hashlib
+import io
+import json
 import os
 import pandas as pd
+from schema import SCHEMA_VERSION, read_student_csv
 from utils import get_logger
 
 # ---------------------------------------------------------------------
@@ -16,10 +20,205 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_PATH = os.path.join(PROJECT_ROOT, "data")
 
 
-def load_data():
+# ---------------------------------------------------------------------
+# Dataset files per subject, and the on-disk cache location.
+# Parsed datasets are cached in a columnar format (Parquet when pyarrow is
+# installed, pandas pickle otherwise) and reused until the source CSV changes.
+# ---------------------------------------------------------------------
+DATASET_FILES = {
+    "math": "student-mat.csv",
+    "portuguese": "student-por.csv",
+}
+CACHE_DIR = os.path.join(PROJECT_ROOT, "results", "cache", "datasets")
+
+# In-process cache: source path -> ((mtime_ns, size), DataFrame)
+_MEMORY_CACHE = {}
+
+
+def _cache_format():
+    """Return the on-disk cache format: 'parquet' if pyarrow is available, else 'pickle'."""
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "pickle"
+
+
+def _file_signature(path):
+    """Cheap change check for a source file: (modification time in ns, size)."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents (used when the mtime changed)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_disk_cache(path, signature):
+    """
+    Return the cached DataFrame for `path` if it is still valid, else None.
+
+    The cache is valid when the source mtime/size match the stored ones, or,
+    if they changed (e.g. the file was touched or copied), when the content
+    hash still matches.
+    """
+    stem = os.path.basename(path)
+    meta_path = os.path.join(CACHE_DIR, f"{stem}.json")
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    data_path = os.path.join(CACHE_DIR, meta.get("file", ""))
+    if meta.get("source") != os.path.abspath(path) or not os.path.exists(data_path):
+        return None
+    if meta.get("format") != _cache_format() or meta.get("schema") != SCHEMA_VERSION:
+        return None
+
+    if (meta.get("mtime_ns"), meta.get("size")) != signature:
+        if meta.get("sha256") != _file_hash(path):
+            return None
+        # Same content, new mtime: refresh the stored signature
+        meta["mtime_ns"], meta["size"] = signature
+        _write_json_atomic(meta_path, meta)
+
+    if meta["format"] == "parquet":
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _write_disk_cache(path, signature, df):
+    """Store a parsed DataFrame and its source metadata in CACHE_DIR."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fmt = _cache_format()
+    stem = os.path.basename(path)
+    data_file = f"{stem}.{'parquet' if fmt == 'parquet' else 'pkl'}"
+    data_path = os.path.join(CACHE_DIR, data_file)
+
+    # Write to a temporary file first so readers never see a partial cache
+    tmp_path = f"{data_path}.{os.getpid()}.tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
+
+    _write_json_atomic(os.path.join(CACHE_DIR, f"{stem}.json"), {
+        "source": os.path.abspath(path),
+        "file": data_file,
+        "format": fmt,
+        "schema": SCHEMA_VERSION,
+        "mtime_ns": signature[0],
+        "size": signature[1],
+        "sha256": _file_hash(path),
+    })
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_dataset_csv(path, use_cache=True):
+    """
+    Parse one student CSV, reusing the in-process and on-disk caches.
+
+    Args:
+        path (str): Path to a ";"-separated student CSV file.
+        use_cache (bool): If False, always parse the CSV and skip both caches.
+
+    Returns:
+        pandas.DataFrame: A private copy of the parsed dataset (safe to modify),
+        with the dtypes from schema.DTYPES.
+    """
+    if not use_cache:
+        return read_student_csv(path)
+
+    path = os.path.abspath(path)
+    signature = _file_signature(path)
+
+    cached = _MEMORY_CACHE.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1].copy()
+
+    df = None
+    try:
+        df = _read_disk_cache(path, signature)
+    except Exception as e:
+        # A corrupt or unreadable cache is not fatal: fall back to the CSV
+        logger.warning("Ignoring unreadable dataset cache for %s: %s", path, e)
+
+    if df is None:
+        # The UCI Student Performance dataset uses a semicolon (;) delimiter;
+        # read_student_csv applies the compact typed schema at parse time
+        df = read_student_csv(path)
+        try:
+            _write_disk_cache(path, signature, df)
+        except Exception as e:
+            logger.warning("Could not write dataset cache for %s: %s", path, e)
+
+    _MEMORY_CACHE[path] = (signature, df)
+    return df.copy()
+
+
+def clear_cache():
+    """Drop the in-process dataset cache (the on-disk cache is left in place)."""
+    _MEMORY_CACHE.clear()
+
+
+def dataset_path(subject):
+    """Absolute path of a subject's CSV file ("math" or "portuguese")."""
+    if subject not in DATASET_FILES:
+        raise ValueError(f"Unknown dataset '{subject}'. Expected one of: {list(DATASET_FILES)}")
+    return os.path.join(DATA_PATH, DATASET_FILES[subject])
+
+
+def load_dataset(subject, use_cache=True):
+    """
+    Load a single student performance dataset.
+
+    Only the requested subject's CSV is read, so e.g. Math-only runs never
+    parse the Portuguese file.
+
+    Args:
+        subject (str): "math" or "portuguese".
+        use_cache (bool): Reuse the in-process / on-disk cache (default=True).
+
+    Returns:
+        pandas.DataFrame or None: The dataset, or None if loading failed.
+    """
+    path = dataset_path(subject)
+
+    try:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dataset file is missing: {path}")
+
+        df = read_dataset_csv(path, use_cache=use_cache)
+        logger.info("%s dataset loaded successfully with shape %s", subject.capitalize(), df.shape)
+        return df
+
+    except Exception as e:
+        logger.error("Failed to load %s data: %s", subject, e)
+        return None
+
+
+def load_data(use_cache=True):
     """
     Load the student performance datasets (Math and Portuguese) from CSV files.
 
+    Args:
+        use_cache (bool): Reuse the in-process / on-disk cache (default=True).
+            Parsed datasets are cached and invalidated when the source file's
+            modification time and content hash change.
+
     Returns:
         tuple: (mat_df, por_df)
             mat_df: pandas.DataFrame or None
@@ -37,8 +236,8 @@ def load_data():
         # File paths for Math and Portuguese datasets
         # Both must exist in the /data directory for the pipeline to work
         # -----------------------------------------------------------------
-        mat_path = os.path.join(DATA_PATH, "student-mat.csv")
-        por_path = os.path.join(DATA_PATH, "student-por.csv")
+        mat_path = os.path.join(DATA_PATH, DATASET_FILES["math"])
+        por_path = os.path.join(DATA_PATH, DATASET_FILES["portuguese"])
 
         # Validate that both dataset files are present
         if not os.path.exists(mat_path) or not os.path.exists(por_path):
@@ -47,12 +246,12 @@ def load_data():
             )
 
         # -----------------------------------------------------------------
-        # Load CSV files
+        # Load CSV files (through the dataset cache)
         # - The UCI Student Performance dataset uses a semicolon (;) delimiter,
         #   not the usual comma, so we explicitly set sep=";".
         # -----------------------------------------------------------------
-        mat = pd.read_csv(mat_path, sep=";")
-        por = pd.read_csv(por_path, sep=";")
+        mat = read_dataset_csv(mat_path, use_cache=use_cache)
+        por = read_dataset_csv(por_path, use_cache=use_cache)
 
         # Log successful loads with dataset dimensions (rows, columns)
         logger.info("Math dataset loaded successfully with shape %s", mat.shape)
@@ -65,3 +264,78 @@ def load_data():
         # and return (None, None) so downstream code can handle gracefully.
         logger.error("Failed to load data: %s", e)
         return None, None
+
+
+# ---------------------------------------------------------------------
+# Byte-range reading: split one large CSV into line-aligned pieces so that
+# several processes can parse it in parallel without reading the whole
+# file. Every piece after the header is parsed with the header's column
+# names; together the pieces cover each data row exactly once.
+# ---------------------------------------------------------------------
+class _RangeFile(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._f.read(n)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def csv_byte_ranges(path, parts):
+    """
+    Split a CSV into at most `parts` byte ranges that start on line boundaries.
+
+    Args:
+        path (str): CSV file with a header line.
+        parts (int): Number of ranges wanted (fewer for very small files).
+
+    Returns:
+        tuple: (columns, [(start, end), ...]) — the header's column names
+        and the ranges covering every data line, in file order.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        bounds = [body_start]
+        for i in range(1, max(1, parts)):
+            f.seek(max(body_start + (size - body_start) * i // parts, bounds[-1]))
+            f.readline()  # move to the start of the next line
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+
+    columns = read_student_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    return columns, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def read_csv_range(path, start, end, columns, **kwargs):
+    """
+    Parse the rows in bytes [start, end) of a student CSV.
+
+    Args:
+        path (str): CSV file.
+        start, end (int): A range returned by csv_byte_ranges().
+        columns (list of str): Column names from csv_byte_ranges().
+        **kwargs: Passed to read_student_csv (e.g. chunksize).
+
+    Returns:
+        pandas.DataFrame, or an iterator of DataFrames when chunksize is set.
+    """
+    stream = io.BufferedReader(_RangeFile(path, start, end), buffer_size=1 << 20)
+    return read_student_csv(stream, header=None, names=columns, **kwargs)
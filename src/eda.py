@@ -1,92 +1,302 @@
+import hashlib
+import json
 import pandas as pd
-import matplotlib
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import sys
 import argparse
 
+from stream_stats import MAX_DISTINCT, StreamingStats
+
 # ---------------------------------------------------------------------
 # --- Configuration ---
 # ---------------------------------------------------------------------
-# Use a non-interactive backend (Agg) by default.
-# This ensures plots can be saved as image files even on servers/VMs
-# without a graphical user interface (e.g., grading environments).
-matplotlib.use('Agg')
-
 # Define directory for saving generated figures.
-# Creates folder: results/figures if it does not exist.
+# The folder results/figures is created on first use (not at import time).
 FIGURES_DIR = os.path.join(os.path.dirname(__file__), "..", "results", "figures")
-os.makedirs(FIGURES_DIR, exist_ok=True)
+
+# Hashes of the drawn figures (see "Figure cache" below); kept out of the
+# tracked figures directory.
+FIGURE_HASHES_DIR = os.path.join(os.path.dirname(__file__), "..", "results", "cache", "figures")
 
 # Toggle for showing plots interactively.
 # By default, False (plots are only saved, not displayed).
 SHOW_PLOTS = False
 
 
-def plot_distributions(df: pd.DataFrame, columns=None, dataset_name="dataset"):
+def _plotting():
+    """
+    Import matplotlib and seaborn on first use and return (plt, sns).
+
+    The plotting stack is the slowest import in the project, so it is only
+    loaded when a plot is actually drawn (summaries and other entry points
+    stay fast). A non-interactive backend (Agg) is used by default so plots
+    can be saved on servers/VMs without a GUI; TkAgg is used when SHOW_PLOTS
+    is enabled.
+    """
+    import matplotlib
+    if "matplotlib.pyplot" not in sys.modules:
+        matplotlib.use("TkAgg" if SHOW_PLOTS else "Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    os.makedirs(FIGURES_DIR, exist_ok=True)
+    return plt, sns
+
+
+# ---------------------------------------------------------------------
+# Figure cache: each PNG has a sidecar hash (FIGURE_HASHES_DIR/<png>.sha256)
+# of the data it was drawn from and the plot parameters. A figure whose
+# hash still matches is not drawn again. Bump PLOT_VERSION when the look
+# of the plots changes so that all figures are regenerated.
+# ---------------------------------------------------------------------
+PLOT_VERSION = 1
+DISTRIBUTION_PARAMS = {"bins": 20, "kde": True, "color": "skyblue", "figsize": (6, 4)}
+FACET_COLUMNS = 4
+
+
+def _content_hash(data, params):
+    """SHA-256 of the plotted values (Series or DataFrame) and the plot parameters."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"version": PLOT_VERSION, **params}, sort_keys=True, default=str).encode())
+    names = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+    digest.update(",".join(map(str, names)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _hash_path(out_path):
+    return os.path.join(FIGURE_HASHES_DIR, os.path.basename(out_path) + ".sha256")
+
+
+def _is_current(out_path, content_hash):
+    """True if out_path exists and was drawn from data with this hash."""
+    hash_path = _hash_path(out_path)
+    if not (os.path.exists(out_path) and os.path.exists(hash_path)):
+        return False
+    with open(hash_path, "r", encoding="utf-8") as f:
+        return f.read().strip() == content_hash
+
+
+def _store_hash(out_path, content_hash):
+    hash_path = _hash_path(out_path)
+    os.makedirs(os.path.dirname(hash_path), exist_ok=True)
+    tmp_path = f"{hash_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content_hash)
+    os.replace(tmp_path, hash_path)
+
+
+def _histplot(sns, values, ax=None):
+    """
+    sns.histplot of raw values (a Series), or of value counts (a DataFrame
+    with "value" and "count" columns, from StreamingStats). Counts are drawn as weights; the KDE bandwidth is
+    adjusted so it matches the one seaborn uses for the raw values.
+    """
+    kwargs = {"kde": DISTRIBUTION_PARAMS["kde"], "bins": DISTRIBUTION_PARAMS["bins"],
+              "color": DISTRIBUTION_PARAMS["color"], "ax": ax}
+    if isinstance(values, pd.DataFrame):
+        weights = values["count"].to_numpy(dtype="float64")
+        # scipy's gaussian_kde uses the effective sample size sum(w)² / sum(w²)
+        # for weighted data; rescale to the Scott factor of the full sample
+        kwargs["kde_kws"] = {"bw_adjust": (weights.sum() / (weights ** 2).sum()) ** 0.2}
+        return sns.histplot(x=values["value"].to_numpy(), weights=weights, **kwargs)
+    return sns.histplot(values, **kwargs)
+
+
+def _render_distribution(values, col, out_path):
+    """Draw and save one histogram + KDE (module-level so worker processes can run it)."""
+    plt, sns = _plotting()
+
+    # Create histogram for one numeric feature
+    plt.figure(figsize=DISTRIBUTION_PARAMS["figsize"])
+    _histplot(sns, values)
+    plt.title(f"Distribution of {col}")
+    plt.xlabel(col)
+    plt.ylabel("Frequency")
+    plt.tight_layout()
+
+    # Save figure (temp file + rename, so a crash never leaves a half-written PNG)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.png"
+    plt.savefig(tmp_path)
+    os.replace(tmp_path, out_path)
+
+    # Optionally show the plot in interactive mode
+    if SHOW_PLOTS:
+        plt.show()
+
+    plt.close()  # Free up memory between plots
+    return out_path
+
+
+def _render_facets(series, out_path, title):
+    """Draw all distributions ({column: values}) into one grid figure."""
+    plt, sns = _plotting()
+
+    columns = list(series)
+    n_rows = -(-len(columns) // FACET_COLUMNS)
+    width, height = DISTRIBUTION_PARAMS["figsize"]
+    fig, axes = plt.subplots(n_rows, FACET_COLUMNS, squeeze=False,
+                             figsize=(width * FACET_COLUMNS * 0.75, height * n_rows * 0.75))
+    for ax, col in zip(axes.flat, columns):
+        _histplot(sns, series[col], ax=ax)
+        ax.set_title(col)
+        ax.set_xlabel("")
+        ax.set_ylabel("")
+    for ax in list(axes.flat)[len(columns):]:
+        ax.set_visible(False)
+    fig.suptitle(title)
+    fig.tight_layout()
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.png"
+    fig.savefig(tmp_path)
+    os.replace(tmp_path, out_path)
+
+    if SHOW_PLOTS:
+        plt.show()
+    plt.close(fig)
+    return out_path
+
+
+def _distribution_data(data, columns):
+    """{column: values to plot} from a DataFrame (raw values) or StreamingStats (value counts)."""
+    if not isinstance(data, StreamingStats):
+        return {col: data[col] for col in columns}
+
+    series = {}
+    for col in columns:
+        counts = data.value_counts(col)
+        if counts is None:
+            print(f"⚠️ Skipping {col}: value counts are only kept for up to {MAX_DISTINCT:,} distinct values")
+            continue
+        series[col] = pd.DataFrame({"value": counts.index, "count": counts.to_numpy()})
+    return series
+
+
+def plot_distributions(df, columns=None, dataset_name="dataset",
+                       workers=1, use_cache=True, faceted=False):
     """
     Plot and save histograms for numeric columns in the dataset.
 
     Args:
-        df (pd.DataFrame): Input dataset.
+        df (pd.DataFrame or StreamingStats): Input dataset, or its streamed
+            statistics (histograms are then drawn from the value counts).
         columns (list, optional): Subset of numeric columns to plot. 
                                   If None, all numeric columns are used.
         dataset_name (str): Prefix for saved plot filenames (e.g., "math").
+        workers (int): Processes rendering figures in parallel (default 1;
+            interactive --show mode always renders in this process).
+        use_cache (bool): Skip figures whose column data and plot parameters
+            are unchanged since they were last saved (default True).
+        faceted (bool): Draw all columns into one grid figure
+            ('<dataset>_distributions.png') instead of one file per column.
+
+    Returns:
+        list of str: Paths of the figures (drawn or already up to date).
     """
     if columns is None:
         # Automatically select numeric columns if not specified
-        columns = df.select_dtypes(include=["int64", "float64"]).columns
+        columns = df.numeric if isinstance(df, StreamingStats) else df.select_dtypes(include="number").columns
+    series = _distribution_data(df, list(columns))
+    os.makedirs(FIGURES_DIR, exist_ok=True)
 
-    for col in columns:
-        # Create histogram for each numeric feature
-        plt.figure(figsize=(6, 4))
-        sns.histplot(df[col], kde=True, bins=20, color="skyblue")
-        plt.title(f"Distribution of {col}")
-        plt.xlabel(col)
-        plt.ylabel("Frequency")
-        plt.tight_layout()
-
-        # Save figure with descriptive filename
+    if faceted:
+        out_path = os.path.join(FIGURES_DIR, f"{dataset_name}_distributions.png")
+        params = {**DISTRIBUTION_PARAMS, "facet_columns": FACET_COLUMNS}
+        if isinstance(df, StreamingStats):
+            content_hash = _content_hash(pd.concat(series, names=["column"]).reset_index(level=0), params)
+        else:
+            content_hash = _content_hash(df[list(series)], params)
+        if use_cache and _is_current(out_path, content_hash) and not SHOW_PLOTS:
+            print(f"Up to date: {out_path}")
+        else:
+            _render_facets(series, out_path, f"Distributions - {dataset_name}")
+            _store_hash(out_path, content_hash)
+            print(f"Saved distribution plots: {out_path}")
+        return [out_path]
+
+    # Work out which figures are stale before importing the plotting stack
+    jobs, paths = [], []
+    for col, values in series.items():
         out_path = os.path.join(FIGURES_DIR, f"{dataset_name}_{col}_distribution.png")
-        plt.savefig(out_path)
+        content_hash = _content_hash(values, DISTRIBUTION_PARAMS)
+        paths.append(out_path)
+        if use_cache and _is_current(out_path, content_hash) and not SHOW_PLOTS:
+            print(f"Up to date: {out_path}")
+        else:
+            jobs.append((values, col, out_path, content_hash))
 
-        # Optionally show the plot in interactive mode
-        if SHOW_PLOTS:
-            plt.show()
+    if workers > 1 and len(jobs) > 1 and not SHOW_PLOTS:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(_render_distribution, values, col, out_path)
+                       for values, col, out_path, _ in jobs]
+            for future, (_, _, out_path, content_hash) in zip(futures, jobs):
+                future.result()
+                _store_hash(out_path, content_hash)
+                print(f"Saved distribution plot: {out_path}")
+    else:
+        for values, col, out_path, content_hash in jobs:
+            _render_distribution(values, col, out_path)
+            _store_hash(out_path, content_hash)
+            print(f"Saved distribution plot: {out_path}")
 
-        plt.close()  # Free up memory between plots
-        print(f"Saved distribution plot: {out_path}")
+    return paths
 
 
-def plot_correlation_heatmap(df: pd.DataFrame, dataset_name="dataset"):
+def plot_correlation_heatmap(df, dataset_name="dataset", use_cache=True):
     """
     Generate and save a correlation heatmap for numeric features.
 
     Args:
-        df (pd.DataFrame): Input dataset.
+        df (pd.DataFrame or StreamingStats): Input dataset, or its streamed
+            statistics (the correlations are then taken from the co-moments).
         dataset_name (str): Prefix for saved heatmap filename.
+        use_cache (bool): Skip drawing if the numeric data is unchanged since
+            the heatmap was last saved (default True).
+
+    Returns:
+        str: Path of the heatmap.
     """
+    out_path = os.path.join(FIGURES_DIR, f"{dataset_name}_correlation_heatmap.png")
+    # Streamed stats are hashed by their correlations (the raw rows are gone)
+    if isinstance(df, StreamingStats):
+        corr = df.corr()
+        hashed = corr.round(12)
+    else:
+        corr = None
+        hashed = df.select_dtypes(include="number")
+    content_hash = _content_hash(hashed, {"kind": "heatmap", "cmap": "coolwarm", "figsize": (12, 8),
+                                          "title": dataset_name})
+    if use_cache and _is_current(out_path, content_hash) and not SHOW_PLOTS:
+        print(f"Up to date: {out_path}")
+        return out_path
+
+    plt, sns = _plotting()
     plt.figure(figsize=(12, 8))
 
     # Compute pairwise correlation for numeric columns only
-    corr = df.corr(numeric_only=True)
+    if corr is None:
+        corr = df.corr(numeric_only=True)
 
     # Draw heatmap (blue = negative, red = positive correlation)
     sns.heatmap(corr, annot=False, cmap="coolwarm", center=0)
     plt.title(f"Correlation Heatmap - {dataset_name}")
     plt.tight_layout()
 
-    out_path = os.path.join(FIGURES_DIR, f"{dataset_name}_correlation_heatmap.png")
-    plt.savefig(out_path)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.png"
+    plt.savefig(tmp_path)
+    os.replace(tmp_path, out_path)
+    _store_hash(out_path, content_hash)
 
     if SHOW_PLOTS:
         plt.show()
 
     plt.close()
     print(f"Saved correlation heatmap: {out_path}")
+    return out_path
 
 
-def summarize_dataset(df: pd.DataFrame):
+def summarize_dataset(df):
     """
     Print a dataset summary including:
       - Shape (#rows, #columns)
@@ -95,13 +305,19 @@ def summarize_dataset(df: pd.DataFrame):
       - First 5 rows (sample preview)
 
     Args:
-        df (pd.DataFrame): Dataset to summarize.
+        df (pd.DataFrame or StreamingStats): Dataset to summarize, or its
+            streamed statistics (same output, without loading the rows).
     """
+    if isinstance(df, StreamingStats):
+        dtypes, missing, head = df.dtype_series(), df.missing_series(), df.head
+    else:
+        dtypes, missing, head = df.dtypes, df.isnull().sum(), df.head()
+
     print("=== Dataset Summary ===")
     print(f"Shape: {df.shape}")
-    print("\nColumn Types:\n", df.dtypes)
-    print("\nMissing Values per Column:\n", df.isnull().sum())
-    print("\nFirst 5 rows:\n", df.head())
+    print("\nColumn Types:\n", dtypes)
+    print("\nMissing Values per Column:\n", missing)
+    print("\nFirst 5 rows:\n", head)
 
 
 # -------------------------------------------------------------------------
@@ -115,13 +331,28 @@ if __name__ == "__main__":
         action="store_true", 
         help="Show plots interactively as well as saving them"
     )
+    parser.add_argument("--workers", type=int, default=1, help="Processes rendering figures in parallel")
+    parser.add_argument("--faceted", action="store_true", help="One grid figure instead of one file per column")
+    parser.add_argument("--no-cache", action="store_true", help="Redraw figures even if the data is unchanged")
+    parser.add_argument("--data", default=None, help="Stream this CSV in chunks instead of the two datasets")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk with --data")
     args = parser.parse_args()
 
     # If --show is provided, enable interactive mode
+    # (_plotting() then selects the interactive TkAgg backend)
     if args.show:
         SHOW_PLOTS = True
-        matplotlib.use("TkAgg")  # Switch backend to interactive
-        import matplotlib.pyplot as plt  # Reload pyplot with new backend
+
+    if args.data:
+        from stream_stats import stats_from_csv
+
+        name = os.path.splitext(os.path.basename(args.data))[0]
+        stats = stats_from_csv(args.data, args.chunksize, args.workers)
+        summarize_dataset(stats)
+        plot_distributions(stats, dataset_name=name, workers=args.workers,
+                           use_cache=not args.no_cache, faceted=args.faceted)
+        plot_correlation_heatmap(stats, dataset_name=name, use_cache=not args.no_cache)
+        sys.exit(0)
 
     from data_loader import load_data
 
@@ -133,13 +364,15 @@ if __name__ == "__main__":
     if mat is not None:
         print("\n=== Math Dataset ===")
         summarize_dataset(mat)
-        plot_distributions(mat, dataset_name="math")
-        plot_correlation_heatmap(mat, dataset_name="math")
+        plot_distributions(mat, dataset_name="math", workers=args.workers,
+                           use_cache=not args.no_cache, faceted=args.faceted)
+        plot_correlation_heatmap(mat, dataset_name="math", use_cache=not args.no_cache)
 
     if por is not None:
         print("\n=== Portuguese Dataset ===")
         summarize_dataset(por)
-        plot_distributions(por, dataset_name="portuguese")
-        plot_correlation_heatmap(por, dataset_name="portuguese")
+        plot_distributions(por, dataset_name="portuguese", workers=args.workers,
+                           use_cache=not args.no_cache, faceted=args.faceted)
+        plot_correlation_heatmap(por, dataset_name="portuguese", use_cache=not args.no_cache)
 
     print("EDA testing completed!")
@@ -1,5 +1,13 @@
-import pandas as pd
+import argparse
 import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 # ---------------------------------------------------------------------
 # Define paths for project root and data directory.
@@ -8,10 +16,19 @@ import os
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from schema import read_student_csv, COLUMNS, GRADE_COLUMNS  # Typed parsing + column order
+
+SOURCE_FILES = {
+    "math": "student-mat.csv",
+    "portuguese": "student-por.csv",
+}
+
 
 def generate_samples():
     """
-    Generate small sample datasets (without target column) 
+    Generate small sample datasets (without target column)
     for testing predictions.
 
     Behavior:
@@ -52,9 +69,208 @@ def generate_samples():
     print(f"✅ Created: {por_out}")
 
 
+# ---------------------------------------------------------------------
+# Synthetic data for load testing
+#
+# The generator learns from a real dataset:
+#   - every non-grade column: its empirical value frequencies
+#   - G1: empirical distribution within each 'failures' level
+#   - G2 given G1, and G3 given G2: resampled from the real grades of
+#     students with the same previous grade (keeps the G3 = 0 drop-outs);
+#     previous grades never seen in the data fall back to a + b·x plus a
+#     resampled residual, rounded and clipped to the 0-20 grade range
+#
+# Rows are produced in fixed-size chunks. Chunk i always uses the i-th
+# child of the seed, so a file is identical for a given seed whether it
+# was written by one process or several.
+# ---------------------------------------------------------------------
+GRADE_MIN, GRADE_MAX = 0, 20
+
+
+def fit_generator(df: pd.DataFrame) -> dict:
+    """
+    Learn the column distributions used by generate_chunk().
+
+    Args:
+        df (pd.DataFrame): A real student dataset (all COLUMNS present).
+
+    Returns:
+        dict: Plain arrays only (cheap to send to worker processes).
+    """
+    columns = {}
+    for col in COLUMNS:
+        if col in GRADE_COLUMNS:
+            continue
+        counts = df[col].value_counts(sort=False)
+        counts = counts[counts > 0]
+        columns[col] = {
+            "values": np.asarray(counts.index),
+            "probs": (counts / counts.sum()).to_numpy(dtype=np.float64),
+        }
+
+    # G1 conditioned on the number of past failures
+    g1_by_failures = {
+        int(level): group.to_numpy(dtype=np.int16)
+        for level, group in df.groupby("failures", observed=True)["G1"]
+    }
+
+    def grade_step(x, y):
+        by_value = {int(v): y[x == v].to_numpy(dtype=np.int16) for v in np.unique(x)}
+        x, y = x.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64)
+        slope, intercept = np.polyfit(x, y, 1)
+        return {"by_value": by_value, "slope": slope, "intercept": intercept,
+                "residuals": y - (intercept + slope * x)}
+
+    return {
+        "columns": columns,
+        "g1_by_failures": g1_by_failures,
+        "g2": grade_step(df["G1"], df["G2"]),
+        "g3": grade_step(df["G2"], df["G3"]),
+    }
+
+
+def generate_chunk(model: dict, n_rows: int, rng: np.random.Generator,
+                   include_target: bool = True) -> pd.DataFrame:
+    """
+    Draw n_rows synthetic students from a fitted generator.
+
+    Returns:
+        pd.DataFrame: Columns in the original CSV order (without G3 if
+        include_target is False).
+    """
+    data = {}
+    for col, dist in model["columns"].items():
+        data[col] = dist["values"][rng.choice(len(dist["values"]), size=n_rows, p=dist["probs"])]
+
+    # G1 from the real G1 values of students with the same failures count
+    failures = np.asarray(data["failures"], dtype=np.int64)
+    g1 = np.empty(n_rows, dtype=np.float64)
+    for level, grades in model["g1_by_failures"].items():
+        mask = failures == level
+        g1[mask] = grades[rng.integers(0, len(grades), size=int(mask.sum()))]
+
+    def next_grade(prev, step):
+        noise = step["residuals"][rng.integers(0, len(step["residuals"]), size=n_rows)]
+        grade = np.clip(np.rint(step["intercept"] + step["slope"] * prev + noise), GRADE_MIN, GRADE_MAX)
+        for value, grades in step["by_value"].items():
+            mask = prev == value
+            grade[mask] = grades[rng.integers(0, len(grades), size=int(mask.sum()))]
+        return grade
+
+    g2 = next_grade(g1, model["g2"])
+    data["G1"] = g1.astype(np.int8)
+    data["G2"] = g2.astype(np.int8)
+    if include_target:
+        data["G3"] = next_grade(g2, model["g3"]).astype(np.int8)
+
+    return pd.DataFrame({col: data[col] for col in COLUMNS if col in data})
+
+
+def _write_chunk(model, n_rows, seed_seq, include_target, path, header):
+    """Generate one chunk and write it as CSV (runs in a worker process)."""
+    chunk = generate_chunk(model, n_rows, np.random.default_rng(seed_seq), include_target)
+    chunk.to_csv(path, sep=";", index=False, header=header)
+    return path
+
+
+def generate_synthetic(subject: str, out_path: str, n_rows: int, chunksize: int = 100_000,
+                       seed: int = 42, workers: int = 1, include_target: bool = True) -> str:
+    """
+    Stream a large synthetic dataset to CSV without holding it in memory.
+
+    Args:
+        subject (str): "math" or "portuguese" (dataset to learn from).
+        out_path (str): Output CSV file (";" separated, original column order).
+        n_rows (int): Number of rows to write.
+        chunksize (int): Rows generated and written per chunk.
+        seed (int): Base seed; the output only depends on seed and chunksize.
+        workers (int): Processes generating chunks in parallel. Each worker
+            writes its chunk to a part file, which the parent appends to the
+            output in chunk order. At most 2 × workers chunks are in flight,
+            so part files never pile up on disk.
+        include_target (bool): Write the G3 column (False → prediction input).
+
+    Returns:
+        str: out_path. The file is written to '<out_path>.part' and renamed
+        once complete; on failure no '.part' files are left behind.
+    """
+    model = fit_generator(read_student_csv(os.path.join(DATA_DIR, SOURCE_FILES[subject])))
+
+    sizes = [min(chunksize, n_rows - start) for start in range(0, n_rows, chunksize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = out_path + ".part"
+
+    part_paths = [f"{tmp_path}.{i:06d}" for i in range(len(sizes))]
+    try:
+        with open(tmp_path, "wb") as out:
+            if workers <= 1:
+                for i, (size, seed_seq) in enumerate(zip(sizes, seeds)):
+                    chunk = generate_chunk(model, size, np.random.default_rng(seed_seq), include_target)
+                    chunk.to_csv(out, sep=";", index=False, header=(i == 0))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # Bounded window of futures, appended in submission (= chunk) order
+                    pending = deque()
+                    remaining = iter(range(len(sizes)))
+
+                    def submit(i):
+                        pending.append(pool.submit(_write_chunk, model, sizes[i], seeds[i],
+                                                   include_target, part_paths[i], i == 0))
+
+                    for i in remaining:
+                        submit(i)
+                        if len(pending) >= 2 * workers:
+                            break
+                    try:
+                        while pending:
+                            part_path = pending.popleft().result()
+                            for i in remaining:
+                                submit(i)
+                                break
+                            with open(part_path, "rb") as part:
+                                shutil.copyfileobj(part, out)
+                            os.remove(part_path)
+                    finally:
+                        for future in pending:
+                            future.cancel()
+        os.replace(tmp_path, out_path)
+    finally:
+        # Leftovers of a failed run (all of these are gone after a successful one)
+        for path in [tmp_path] + part_paths:
+            if os.path.exists(path):
+                os.remove(path)
+    return out_path
+
+
 # -------------------------------------------------------------------------
 # Script entry point:
 # Running `python generate_sample_data.py` will create both sample files.
+#
+# Synthetic data for load testing:
+#   $ python src/generate_sample_data.py --synthetic math --rows 10000000 \
+#         --out data/synthetic_math.csv --workers 4
 # -------------------------------------------------------------------------
 if __name__ == "__main__":
-    generate_samples()
+    parser = argparse.ArgumentParser(description="Generate sample or synthetic student data")
+    parser.add_argument("--synthetic", choices=sorted(SOURCE_FILES), default=None,
+                        help="Write a synthetic dataset learned from this subject instead of the 5-row samples")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to generate")
+    parser.add_argument("--out", default=None, help="Output CSV (default: data/synthetic_<subject>.csv)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks")
+    parser.add_argument("--no-target", action="store_true", help="Leave out G3 (prediction input)")
+    args = parser.parse_args()
+
+    if args.synthetic is None:
+        generate_samples()
+    else:
+        out_path = args.out or os.path.join(DATA_DIR, f"synthetic_{args.synthetic}.csv")
+        start = time.perf_counter()
+        generate_synthetic(args.synthetic, out_path, args.rows, args.chunksize,
+                           args.seed, args.workers, include_target=not args.no_target)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Created: {out_path} ({args.rows:,} rows in {elapsed:.1f}s, "
+              f"{args.rows / elapsed:,.0f} rows/s)")
@@ -0,0 +1,225 @@
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import get_logger
+from schema import read_student_csv
+from model import build_regressor, compute_metrics, save_metrics, save_model, build_feature_set
+from preprocessing import build_preprocessor, preprocessor_options
+
+# ---------------------------------------------------------------------
+# Incremental (online) training.
+#
+# `train --model sgd` saves an SGD pipeline whose preprocessor
+# (IncrementalPreprocessor) and regressor (SGDRegressor) both support
+# partial_fit. update_model() folds a new batch of graded students into
+# that saved model:
+#   1. score the batch with the current model (honest "next term" error)
+#   2. update the scaler statistics and category vocabulary
+#   3. run `epochs` shuffled partial_fit passes over the batch only
+#   4. save the model again (atomically, see model.save_model)
+# Earlier batches are never read again.
+#
+# parity_report() checks how close this gets to a full retrain: it splits
+# the training data into batches, trains on the first and folds in the
+# rest, then compares test metrics with an SGD and a linear regression
+# trained on all rows at once.
+# ---------------------------------------------------------------------
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODELS_DIR = os.path.join(PROJECT_ROOT, "results", "models")
+METRICS_DIR = os.path.join(PROJECT_ROOT, "results", "metrics")
+DEFAULT_EPOCHS = 10
+
+
+def default_model_path(dataset):
+    """Saved incremental model of a dataset (results/models/sgd_<dataset>.pkl)."""
+    return os.path.join(MODELS_DIR, f"sgd_{dataset}.pkl")
+
+
+def _check_incremental(pipeline, model_path):
+    steps = getattr(pipeline, "named_steps", {})
+    if not all(hasattr(steps.get(name), "partial_fit") for name in ("preprocessor", "model")):
+        raise ValueError(
+            f"{model_path} cannot be updated incrementally. "
+            f"Train one with: python -m src train --model sgd"
+        )
+
+
+def fold_batch(pipeline, X, y, epochs=DEFAULT_EPOCHS, random_state=42):
+    """
+    Update a fitted incremental pipeline with one batch (in place).
+
+    Args:
+        pipeline (Pipeline): ("preprocessor", "model") pipeline with partial_fit on both steps.
+        X (pd.DataFrame): New rows (raw columns, no G3).
+        y (array-like): Their final grades.
+        epochs (int): Shuffled partial_fit passes over the batch.
+        random_state (int): Seed of the shuffling.
+
+    Returns:
+        The same pipeline.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    regressor = pipeline.named_steps["model"]
+
+    preprocessor.partial_fit(X)
+    Xt = preprocessor.transform(X)
+    y = np.asarray(y, dtype=np.float64)
+
+    rng = np.random.default_rng(random_state)
+    for _ in range(epochs):
+        order = rng.permutation(len(y))
+        regressor.partial_fit(Xt[order], y[order])
+    return pipeline
+
+
+def update_model(batch_path, dataset, model_path=None, epochs=DEFAULT_EPOCHS, save=True):
+    """
+    Fold a new CSV batch (with G3) into the saved incremental model.
+
+    Args:
+        batch_path (str): ";"-separated CSV of new students, including G3.
+        dataset (str): "math" or "portuguese" (names the model and metrics rows).
+        model_path (str, optional): Model to update (default: results/models/sgd_<dataset>.pkl).
+        epochs (int): partial_fit passes over the batch.
+        save (bool): Write the updated model back (and publish latest_model.pkl).
+
+    Returns:
+        dict: {"rows", "before", "after", "seconds", "model_path"} where
+        before/after are metrics on the batch before and after the update.
+    """
+    model_path = model_path or default_model_path(dataset)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path} (train it with --model sgd first)")
+
+    pipeline = joblib.load(model_path)
+    _check_incremental(pipeline, model_path)
+
+    df = read_student_csv(batch_path)
+    if "G3" not in df.columns:
+        raise ValueError(f"{batch_path} has no 'G3' column; updates need graded rows")
+    y = df["G3"]
+    X = df.drop(columns=["G3"])
+
+    start = time.perf_counter()
+    before = compute_metrics(y, pipeline.predict(X), f"{dataset}_sgd_update")
+    fold_batch(pipeline, X, y, epochs=epochs)
+    after = compute_metrics(y, pipeline.predict(X), f"{dataset}_sgd_update")
+    seconds = time.perf_counter() - start
+
+    logger.info(
+        f"🔁 Folded {len(df)} rows into {os.path.basename(model_path)} in {seconds:.2f}s. "
+        f"Batch MAE before: {before['mae']}, after: {after['mae']}"
+    )
+
+    # The "before" error is the honest one: the model had not seen these rows
+    save_metrics({**before, "rows": len(df), "mae_after": after["mae"], "r2_after": after["r2"]},
+                 METRICS_DIR, f"{dataset}_sgd_update")
+    if save:
+        save_model(pipeline, os.path.dirname(model_path), filename=os.path.basename(model_path))
+
+    return {"rows": len(df), "before": before, "after": after,
+            "seconds": round(seconds, 3), "model_path": model_path}
+
+
+def parity_report(dataset, batches=4, epochs=DEFAULT_EPOCHS):
+    """
+    Compare incremental training with a full retrain on the same test split.
+
+    The training split (same as main.run_models) is cut into `batches`
+    consecutive parts. The incremental model is fitted on the first part and
+    updated with each following part via fold_batch().
+
+    Returns:
+        dict: {"incremental", "full_sgd", "full_linear_regression"} → test metrics,
+        plus "batch_mae" (test MAE after each batch).
+    """
+    from sklearn.pipeline import Pipeline
+    from data_loader import load_dataset
+
+    df = load_dataset(dataset)
+    y = df["G3"]
+    X = df.drop(columns=["G3"])
+    numeric_cols = X.select_dtypes(include="number").columns.tolist()
+    categorical_cols = X.select_dtypes(exclude="number").columns.tolist()
+
+    def pipeline_for(model_name):
+        preprocessor = build_preprocessor(numeric_cols, categorical_cols, **preprocessor_options(model_name))
+        return Pipeline(steps=[("preprocessor", preprocessor), ("model", build_regressor(model_name))])
+
+    # Same split as the normal training run
+    split = build_feature_set(X, y, build_preprocessor(numeric_cols, categorical_cols))
+    X_train, y_train = split["X_train"], split["y_train"]
+    X_test, y_test = split["X_test"], split["y_test"]
+
+    report = {}
+    for model_name in ("sgd", "linear_regression"):
+        full = pipeline_for(model_name).fit(X_train, y_train)
+        report[f"full_{model_name}"] = compute_metrics(y_test, full.predict(X_test), f"{dataset}_{model_name}")
+
+    parts = np.array_split(np.arange(len(X_train)), batches)
+    incremental = pipeline_for("sgd")
+    incremental.fit(X_train.iloc[parts[0]], y_train.iloc[parts[0]])
+    batch_mae = [compute_metrics(y_test, incremental.predict(X_test), dataset)["mae"]]
+    for part in parts[1:]:
+        fold_batch(incremental, X_train.iloc[part], y_train.iloc[part], epochs=epochs)
+        batch_mae.append(compute_metrics(y_test, incremental.predict(X_test), dataset)["mae"])
+
+    report["incremental"] = compute_metrics(y_test, incremental.predict(X_test), f"{dataset}_sgd_incremental")
+    report["batch_mae"] = batch_mae
+    report["batch_rows"] = [len(part) for part in parts]
+    return report
+
+
+def print_parity(dataset, report):
+    print(f"\n=== Incremental vs. full retrain ({dataset}, test split) ===")
+    print(f"{'model':<28} {'mae':>7} {'rmse':>7} {'r2':>7}")
+    for key in ("incremental", "full_sgd", "full_linear_regression"):
+        m = report[key]
+        print(f"{key:<28} {m['mae']:>7.3f} {m['rmse']:>7.3f} {m['r2']:>7.3f}")
+    gap = report["incremental"]["mae"] - report["full_sgd"]["mae"]
+    print(f"MAE gap to full SGD retrain: {gap:+.3f}")
+    steps = ", ".join(f"{rows} rows → {mae:.3f}" for rows, mae in zip(report["batch_rows"], report["batch_mae"]))
+    print(f"Test MAE after each batch: {steps}")
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Examples:
+#   $ python src/incremental.py update --dataset math --data data/new_term_math.csv
+#   $ python src/incremental.py parity --dataset math --batches 4
+# -------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental model updates")
+    sub = parser.add_subparsers(dest="action", required=True)
+    update = sub.add_parser("update", help="Fold a new CSV batch into the saved SGD model")
+    update.add_argument("--dataset", choices=["math", "portuguese"], required=True)
+    update.add_argument("--data", required=True, help="CSV with new graded rows (including G3)")
+    update.add_argument("--model", default=None, help="Model to update (default: results/models/sgd_<dataset>.pkl)")
+    update.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="partial_fit passes over the batch")
+    parity = sub.add_parser("parity", help="Compare incremental updates with a full retrain")
+    parity.add_argument("--dataset", choices=["math", "portuguese", "all"], default="all")
+    parity.add_argument("--batches", type=int, default=4)
+    parity.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS)
+    args = parser.parse_args(argv)
+
+    if args.action == "update":
+        result = update_model(args.data, args.dataset, args.model, epochs=args.epochs)
+        print(f"✅ Updated {result['model_path']} with {result['rows']} rows "
+              f"(batch MAE {result['before']['mae']} → {result['after']['mae']})")
+    else:
+        datasets = ["math", "portuguese"] if args.dataset == "all" else [args.dataset]
+        for dataset in datasets:
+            print_parity(dataset, parity_report(dataset, args.batches, args.epochs))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,18 @@
-import argparse
 import os
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend (prevents GUI popups when saving plots)
-import matplotlib.pyplot as plt
+import numpy as np
 
 # --- Project imports ---
-from data_loader import load_data                     # Load datasets (Math & Portuguese)
+from data_loader import load_dataset, dataset_path    # Load one dataset (Math or Portuguese)
 from utils import get_logger                          # Custom logger (console + file)
-from preprocessing import build_preprocessor          # ColumnTransformer (scaling + encoding)
-from model import train_model, evaluate_model, save_model  # Training, evaluation, persistence
-from eda import plot_distributions, plot_correlation_heatmap
-from sklearn.ensemble import RandomForestRegressor    # Tree-based ensemble model
-from sklearn.linear_model import LinearRegression     # Simple baseline model
+from preprocessing import build_preprocessor, preprocessor_options  # ColumnTransformer (scaling + encoding)
+from resources import resource_limits                # joblib backend + BLAS thread caps
+import profiling                                      # Per-stage wall/CPU time and peak memory
+import stage_cache                                    # Fingerprints of unchanged stages → reuse
+from model import (                                   # Training, evaluation, persistence
+    build_regressor, build_feature_set, train_on_features,
+    evaluate_model, cross_validate_model, save_model, publish_latest
+)
+from sklearn.base import clone                        # Fresh copy of an unfitted model
 from sklearn.pipeline import Pipeline                 # Combine preprocessing + model
 import time
 
@@ -21,25 +22,224 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 RESULTS_DIR = os.path.join(PROJECT_ROOT, "results")
 
 
-def run_pipeline(dataset: str, model_name: str):
+def run_pipeline(dataset: str, model_name: str, save_latest: bool = True,
+                 export_compiled=False, force: bool = False):
     """
     Run the complete machine learning pipeline for one dataset-model combination.
     
     Args:
         dataset (str): Which dataset to use ("math" or "portuguese").
         model_name (str): Which model to train ("random_forest" or "linear_regression").
+        save_latest (bool): Also update 'latest_model.pkl' (default=True).
+            Parallel runs disable this and update it once at the end.
+        export_compiled (bool or str): Also export a NumPy-only compiled predictor
+            next to the saved pipeline ('<model>_<dataset>.npz', or the
+            memory-mappable '<model>_<dataset>.mmap/' with "mmap").
+        force (bool): Retrain even if nothing changed since the last run
+            (see run_models).
 
     Returns:
         dict: Evaluation metrics (MAE, RMSE, R², etc.) for the trained model.
     """
+    results = run_models(dataset, [model_name], save_latest=save_latest,
+                         export_compiled=export_compiled, force=force)
+    return results.get(model_name) if results else None
+
+
+def run_models(dataset: str, model_names, save_latest: bool = True,
+               export_compiled=False, cv_folds: int = None,
+               cv_refit: bool = False, model_params: dict = None, compress=0,
+               force: bool = False):
+    """
+    Run the pipeline for several models on one dataset, sharing preprocessing.
+
+    The train/test split, the preprocessor fit and the transformed feature
+    matrices are computed once per dataset and output format (see
+    preprocessing.preprocessor_options) and reused by every model that asks
+    for that format. Each saved model is still a full
+    Pipeline(preprocessor, model), so predict.py can use it on raw rows.
+
+    Args:
+        dataset (str): Which dataset to use ("math" or "portuguese").
+        model_names (list of str): Models to train ("random_forest", "linear_regression").
+        save_latest (bool): Also update 'latest_model.pkl' (default=True);
+            after the run it holds the last model in model_names.
+        export_compiled (bool or str): Also export compiled predictors
+            (True / "npz" or "mmap", see model.save_model).
+        cv_folds (int, optional): If set, evaluate each model with k-fold
+            cross-validation (folds fitted in parallel) instead of the single
+            holdout split; the returned metrics are the CV aggregate.
+        cv_refit (bool): In CV mode, train the saved model on all data
+            instead of the training split (default=False).
+        model_params (dict, optional): model_name → hyperparameters overriding
+            the defaults of model.build_regressor.
+        compress (int or str): Compression of the saved '.pkl' files
+            (see model.parse_compression; default 0 = uncompressed).
+        force (bool): Run every stage even if its fingerprint is unchanged.
+
+    Every model's stages (load → preprocess → train → evaluate → save) are
+    fingerprinted from the dataset CSV, the preprocessing options, the model
+    hyperparameters, the save options and the code of each stage (see
+    stage_cache.py). When all fingerprints match the last run and the saved
+    model file is untouched, the model is not retrained: its saved file and
+    recorded metrics are reused. When only the save options changed, the
+    saved model is re-saved without retraining.
+
+    Returns:
+        dict: model_name → evaluation metrics (None for unsupported models),
+              or None if the dataset could not be loaded.
+
+    Wall time, CPU time and peak memory of every stage (load_data, then per
+    model: preprocess, train_model, evaluate_model / cross_validate,
+    save_model) are saved to results/metrics/spans/train_<dataset>_<timestamp>.json.
+    """
+    with profiling.trace(f"train_{dataset}", dataset=dataset, models=list(model_names)) as run_trace:
+        try:
+            return _run_models(dataset, model_names, save_latest, export_compiled,
+                               cv_folds, cv_refit, model_params, compress, force)
+        finally:
+            if run_trace.stages:
+                spans_path = run_trace.save()
+                logger.info(f"Stage timings: {run_trace.summary()} (details: {spans_path})")
+
+
+def load_fingerprint(dataset: str):
+    """Fingerprint of the load stage (dataset CSV + parsing code), or None if the file is missing."""
+    path = dataset_path(dataset)
+    if not os.path.exists(path):
+        return None
+    return stage_cache.fingerprint("load", stage_cache.file_hash(path), dataset=dataset)
+
+
+def stage_fingerprints(dataset, model_name, regressor, export_compiled=False,
+                       cv_folds=None, cv_refit=False, compress=0):
+    """
+    Fingerprints of the load → preprocess → train → evaluate → save chain of one model.
+
+    Returns:
+        dict: stage name → fingerprint, or None if the dataset file is missing.
+    """
+    load = load_fingerprint(dataset)
+    if load is None:
+        return None
+    options = preprocessor_options(model_name)
+    preprocess = stage_cache.fingerprint(
+        "preprocess", load,
+        sparse=options["sparse"], dtype=np.dtype(options["dtype"]).name,
+        incremental=options.get("incremental", False),
+        test_size=0.2, random_state=42      # split of build_feature_set
+    )
+    train = stage_cache.fingerprint(
+        "train", preprocess, model=model_name,
+        params=stage_cache.estimator_params(regressor),
+        refit_full=bool(cv_folds and cv_refit)
+    )
+    return {
+        "load": load,
+        "preprocess": preprocess,
+        "train": train,
+        "evaluate": stage_cache.fingerprint("evaluate", train, cv_folds=cv_folds),
+        "save": stage_cache.fingerprint("save", train, compress=str(compress),
+                                        export_compiled=export_compiled),
+    }
+
+
+def _reuse_cached(dataset, model_name, stages, export_compiled, compress):
+    """
+    Reuse the saved model of an unchanged stage chain.
+
+    'latest_model.pkl' is not touched here; run_models publishes it once,
+    after all models are done.
+
+    Returns:
+        dict or None: The recorded {"metrics", "model"} (model = saved file),
+        or None if the model must be retrained.
+    """
+    key = f"{dataset}_{model_name}"
+    record = stage_cache.load_record(key)
+    if record is None or not stage_cache.outputs_intact(record) or not record.get("result"):
+        return None
+    metrics, model_path = record["result"]["metrics"], record["result"]["model"]
+    models_path = os.path.dirname(model_path)
+
+    if record["stages"] == stages:
+        logger.info(f"⏭ {model_name} on {dataset}: inputs unchanged, reusing "
+                    f"{os.path.basename(model_path)} and its metrics")
+        return record["result"]
+
+    if all(record["stages"].get(stage) == stages[stage] for stage in ("train", "evaluate")):
+        # Only the save options changed: write the trained model again
+        import joblib
+
+        logger.info(f"⏭ {model_name} on {dataset}: model unchanged, re-saving with new options")
+        with profiling.span("save_model"):
+            saved = save_model(joblib.load(model_path), models_path,
+                               filename=os.path.basename(model_path), save_latest=False,
+                               export_compiled=export_compiled, compress=compress)
+        stage_cache.store(key, stages, [saved.get("versioned"), saved.get("compiled")],
+                          {"metrics": metrics, "model": model_path})
+        return record["result"]
+    return None
+
+
+def _publish_last(dataset, model_names, model_paths):
+    """
+    Point 'latest_model.pkl' at the saved model of the last entry of
+    model_names, whether it was retrained or reused from the stage cache.
+    """
+    if not model_names:
+        return
+    model_path = model_paths.get(model_names[-1])
+    if not model_path or not os.path.exists(model_path):
+        logger.warning(f"latest_model.pkl not updated: {model_names[-1]} on {dataset} has no saved model")
+        return
+    latest_path = os.path.join(os.path.dirname(model_path), "latest_model.pkl")
+    publish_latest(model_path, latest_path)
+    logger.info(f"[SAVE] Latest model updated at: {latest_path}")
+
+
+def _run_models(dataset, model_names, save_latest, export_compiled,
+                cv_folds, cv_refit, model_params, compress, force):
+    """Body of run_models (runs inside its profiling trace)."""
     start_time = time.time()
 
     try:
+        # -----------------------------------------------------------------
+        # STEP 0: Skip models whose stages are all unchanged since the last
+        # run (see stage_cache.py); only the rest are trained below
+        # -----------------------------------------------------------------
+        model_names = list(model_names)
+        results, pending, model_paths = {}, [], {}
+        for model_name in model_names:
+            regressor = build_regressor(model_name, (model_params or {}).get(model_name))
+            if regressor is None:
+                logger.error(f"Unsupported model: {model_name}")
+                results[model_name] = None
+                continue
+            stages = stage_fingerprints(dataset, model_name, regressor, export_compiled,
+                                        cv_folds, cv_refit, compress)
+            if stages is not None and not force:
+                with profiling.span(model_name):
+                    with profiling.span("reuse_cached"):
+                        cached = _reuse_cached(dataset, model_name, stages, export_compiled, compress)
+                if cached is not None:
+                    results[model_name] = cached["metrics"]
+                    model_paths[model_name] = cached["model"]
+                    continue
+            pending.append((model_name, regressor, stages))
+
+        if not pending:
+            if save_latest:
+                _publish_last(dataset, model_names, model_paths)
+            logger.info(f"All {dataset} models unchanged; nothing to train "
+                        f"({round(time.time() - start_time, 2)}s, use --force to retrain)")
+            return results
+
         # -----------------------------------------------------------------
         # STEP 1: Load the dataset (Math or Portuguese)
         # -----------------------------------------------------------------
-        mat, por = load_data()
-        df = mat if dataset == "math" else por
+        with profiling.span("load_data"):
+            df = load_dataset(dataset)
 
         if df is None or df.empty:
             logger.error(f"Failed to load {dataset} dataset")
@@ -58,69 +258,123 @@ def run_pipeline(dataset: str, model_name: str):
         # STEP 2: Identify numeric vs categorical features
         # Needed for preprocessing with ColumnTransformer
         # -----------------------------------------------------------------
-        numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
-        categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
-
-        # Build preprocessing pipeline
-        preprocessor = build_preprocessor(numeric_cols, categorical_cols)
+        # - numeric: any integer/float dtype (the schema uses int8/uint8)
+        # - categorical: everything else (category, object or string columns)
+        numeric_cols = X.select_dtypes(include="number").columns.tolist()
+        categorical_cols = X.select_dtypes(exclude="number").columns.tolist()
 
         # -----------------------------------------------------------------
-        # STEP 3: Choose the ML model
-        # - Random Forest: robust for non-linear, categorical-heavy data
-        # - Linear Regression: baseline model (interpretable but weaker)
+        # STEP 3: Shared feature stage
+        # Fit the preprocessor once per output format (dense/sparse,
+        # float64/float32) and cache the transformed train/test matrices
+        # for all models that use that format
         # -----------------------------------------------------------------
-        if model_name == "random_forest":
-            regressor = RandomForestRegressor(
-                n_estimators=100,   # number of decision trees
-                random_state=42,    # reproducibility
-                n_jobs=1            # single-thread (keeps grading machines stable)
-            )
-        elif model_name == "linear_regression":
-            regressor = LinearRegression()
-        else:
-            logger.error(f"Unsupported model: {model_name}")
-            return None
+        feature_sets = {}
 
-        # Combine preprocessing + model into a single pipeline
-        pipeline = Pipeline(steps=[
-            ("preprocessor", preprocessor),
-            ("model", regressor)
-        ])
+        def get_features(options):
+            key = (options["sparse"], np.dtype(options["dtype"]).name, options.get("incremental", False))
+            if key not in feature_sets:
+                feature_start = time.time()
+                with profiling.span("preprocess"):
+                    preprocessor = build_preprocessor(numeric_cols, categorical_cols, **options)
+                    feature_sets[key] = build_feature_set(X, y, preprocessor)
+                logger.info(
+                    f"Shared preprocessing for {dataset} "
+                    f"({'sparse' if key[0] else 'dense'} {key[1]}{', incremental' if key[2] else ''}) ready in "
+                    f"{round(time.time() - feature_start, 2)}s"
+                )
+            return feature_sets[key]
 
-        # -----------------------------------------------------------------
-        # STEP 4: Train the pipeline and evaluate performance
-        # -----------------------------------------------------------------
-        logger.info(f"Training {model_name} on {dataset} dataset...")
-        pipeline, X_test, y_test = train_model(X, y, pipeline)
+        for model_name, regressor, stages in pending:
+            # Stages of each model are recorded as '<model>/<stage>'
+            with profiling.span(model_name):
+                model_start = time.time()
 
-        # Evaluate the trained pipeline
-        metrics_path = os.path.join(RESULTS_DIR, "metrics")
-        metrics = evaluate_model(
-            pipeline, X_test, y_test,
-            metrics_path=metrics_path,
-            dataset_name=f"{dataset}_{model_name}"
-        )
+                # -------------------------------------------------------------
+                # STEP 4: Train on the shared features and evaluate performance
+                # (evaluation uses the cached transformed test matrix)
+                # -------------------------------------------------------------
+                options = preprocessor_options(model_name)
+                metrics_path = os.path.join(RESULTS_DIR, "metrics")
 
-        # -----------------------------------------------------------------
-        # STEP 5: Save the trained model for reuse
-        # -----------------------------------------------------------------
-        models_path = os.path.join(RESULTS_DIR, "models")
-        save_model(
-            pipeline,
-            models_path,
-            filename=f"{model_name}_{dataset}.pkl"  # versioned by dataset+model
-        )
+                if cv_folds:
+                    # ---------------------------------------------------------
+                    # Cross-validation mode: every fold re-fits its own
+                    # preprocessor, so the shared feature matrices are not used
+                    # ---------------------------------------------------------
+                    logger.info(f"Cross-validating {model_name} on {dataset} dataset ({cv_folds} folds)...")
+                    cv_pipeline = Pipeline(steps=[
+                        ("preprocessor", build_preprocessor(numeric_cols, categorical_cols, **options)),
+                        ("model", regressor)
+                    ])
+                    with profiling.span("cross_validate"):
+                        pipeline, cv_results = cross_validate_model(
+                            X, y, cv_pipeline,
+                            n_splits=cv_folds,
+                            refit=cv_refit,
+                            metrics_path=metrics_path,
+                            dataset_name=f"{dataset}_{model_name}"
+                        )
+                    metrics = cv_results["aggregate"]
+                    if pipeline is None:
+                        features = get_features(options)
+                        with profiling.span("train_model"):
+                            pipeline = train_on_features(features, clone(regressor))
+                else:
+                    features = get_features(options)
+                    logger.info(f"Training {model_name} on {dataset} dataset...")
+                    # joblib backend + BLAS thread cap from the resource configuration
+                    with resource_limits():
+                        with profiling.span("train_model"):
+                            pipeline = train_on_features(features, regressor)
+
+                        with profiling.span("evaluate_model"):
+                            metrics = evaluate_model(
+                                pipeline.named_steps["model"], features["Xt_test"], features["y_test"],
+                                metrics_path=metrics_path,
+                                dataset_name=f"{dataset}_{model_name}"
+                            )
+
+                # -------------------------------------------------------------
+                # STEP 5: Save the trained (self-contained) pipeline for reuse
+                # -------------------------------------------------------------
+                models_path = os.path.join(RESULTS_DIR, "models")
+                with profiling.span("save_model"):
+                    saved = save_model(
+                        pipeline,
+                        models_path,
+                        filename=f"{model_name}_{dataset}.pkl",  # versioned by dataset+model
+                        save_latest=False,  # published once, after the loop
+                        export_compiled=export_compiled,
+                        compress=compress
+                    )
+                model_paths[model_name] = saved.get("versioned")
+                if stages is not None and saved.get("versioned"):
+                    # Record the chain so an unchanged rerun can skip it
+                    stage_cache.store(f"{dataset}_{model_name}", stages,
+                                      [saved["versioned"], saved.get("compiled")],
+                                      {"metrics": metrics, "model": saved["versioned"]})
+
+                # -------------------------------------------------------------
+                # STEP 6: Log runtime and key results
+                # -------------------------------------------------------------
+                elapsed = round(time.time() - model_start, 2)
+                logger.info(
+                    f"✅ Pipeline completed in {elapsed}s. "
+                    f"MAE: {metrics['mae']}, R²: {metrics['r2']}"
+                )
+                results[model_name] = metrics
 
         # -----------------------------------------------------------------
-        # STEP 6: Log runtime and key results
+        # STEP 7: Publish 'latest_model.pkl' once, for the last requested
+        # model (independent of which models came from the stage cache)
         # -----------------------------------------------------------------
-        elapsed = round(time.time() - start_time, 2)
-        logger.info(
-            f"✅ Pipeline completed in {elapsed}s. "
-            f"MAE: {metrics['mae']}, R²: {metrics['r2']}"
-        )
+        if save_latest:
+            _publish_last(dataset, model_names, model_paths)
 
-        return metrics   # return metrics to caller (e.g., run.py)
+        logger.info(f"All {dataset} models completed in {round(time.time() - start_time, 2)}s")
+        # return metrics to caller (e.g., run.py), in the requested order
+        return {name: results[name] for name in model_names if name in results}
 
     except Exception as e:
         # Catch-all for unexpected errors (logged for debugging)
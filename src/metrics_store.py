@@ -0,0 +1,275 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+# ---------------------------------------------------------------------
+# Append-only metrics history in SQLite (results/metrics/metrics.db).
+#
+# Every evaluation adds one row; nothing is ever rewritten. The database
+# runs in WAL mode with a busy timeout, so several processes (run.py
+# --workers, parallel CV, tuning) can append at the same time without
+# losing rows. The metrics_<name>.csv files written by earlier versions
+# are imported once, the first time the store is opened.
+#
+# Rows are keyed by the same identifier the CSV files used, e.g.
+# "math_random_forest" or "math_random_forest_cv".
+# ---------------------------------------------------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+METRICS_DIR = os.path.join(PROJECT_ROOT, "results", "metrics")
+DB_FILENAME = "metrics.db"
+
+METRIC_COLUMNS = ["mae", "mse", "rmse", "r2"]
+BUSY_TIMEOUT_SECONDS = 30
+
+# Database paths whose schema and legacy import were already set up in this process
+_READY = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    name      TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    mae       REAL,
+    mse       REAL,
+    rmse      REAL,
+    r2        REAL,
+    extra     TEXT,              -- other keys (e.g. mae_std, folds) as JSON
+    source    TEXT NOT NULL      -- 'run' or the imported CSV file name
+);
+CREATE INDEX IF NOT EXISTS metrics_name_time ON metrics (name, timestamp, id);
+CREATE TABLE IF NOT EXISTS store_info (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def db_path(metrics_dir=None):
+    """Path of the metrics database inside a metrics directory."""
+    return os.path.join(metrics_dir or METRICS_DIR, DB_FILENAME)
+
+
+def connect(metrics_dir=None):
+    """
+    Open the metrics database (creating it and importing legacy CSVs on first use).
+
+    WAL mode, the schema and the legacy import are set up once per process
+    and database file; later calls only open a connection.
+
+    Args:
+        metrics_dir (str, optional): Directory holding metrics.db (default: results/metrics).
+
+    Returns:
+        sqlite3.Connection: Rows are returned as sqlite3.Row.
+    """
+    metrics_dir = metrics_dir or METRICS_DIR
+    path = db_path(metrics_dir)
+    # Set up again if the file was removed since (e.g. a cleared results/ folder)
+    first_use = path not in _READY or not os.path.exists(path)
+    if first_use:
+        os.makedirs(metrics_dir, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")  # per connection; durable at checkpoints, safe with WAL
+    if first_use:
+        conn.execute("PRAGMA journal_mode=WAL")  # stored in the database file
+        conn.executescript(_SCHEMA)
+        _import_legacy_csvs(conn, metrics_dir)
+        _READY.add(path)
+    return conn
+
+
+def _import_legacy_csvs(conn, metrics_dir):
+    """Import metrics_*.csv once; the marker row makes this a no-op afterwards."""
+    if conn.execute("SELECT 1 FROM store_info WHERE key = 'csv_imported'").fetchone():
+        return
+
+    import pandas as pd
+
+    # BEGIN IMMEDIATE takes the write lock, so two processes opening a fresh
+    # store cannot both import the CSVs
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not conn.execute("SELECT 1 FROM store_info WHERE key = 'csv_imported'").fetchone():
+            for csv_file in sorted(glob.glob(os.path.join(metrics_dir, "metrics_*.csv"))):
+                for record in pd.read_csv(csv_file).to_dict("records"):
+                    name = record.pop("dataset", None) or os.path.basename(csv_file)[len("metrics_"):-len(".csv")]
+                    _insert(conn, name, record, source=os.path.basename(csv_file))
+            conn.execute(
+                "INSERT INTO store_info (key, value) VALUES ('csv_imported', ?)",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),)
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _insert(conn, name, metrics, source="run"):
+    metrics = dict(metrics)
+    timestamp = metrics.pop("timestamp", None) or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    values = [metrics.pop(col, None) for col in METRIC_COLUMNS]
+    extra = {k: v for k, v in metrics.items() if v is not None and v == v}  # drop NaN from CSVs
+    conn.execute(
+        "INSERT INTO metrics (name, timestamp, mae, mse, rmse, r2, extra, source) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (name, str(timestamp), *values, json.dumps(extra, default=str) if extra else None, source)
+    )
+
+
+def append(metrics, name, metrics_dir=None):
+    """
+    Append one metrics row (a single INSERT in its own transaction).
+
+    Args:
+        metrics (dict): Output of compute_metrics (mae, mse, rmse, r2, timestamp,
+            plus any extra keys, which are kept as JSON).
+        name (str): Identifier such as "math_random_forest".
+        metrics_dir (str, optional): Directory holding metrics.db.
+
+    Returns:
+        str: Path of the database file.
+    """
+    metrics = {k: v for k, v in metrics.items() if k != "dataset"}
+    with closing(connect(metrics_dir)) as conn:
+        with conn:
+            _insert(conn, name, metrics)
+    return db_path(metrics_dir)
+
+
+def _row_to_dict(row):
+    record = {"name": row["name"], "timestamp": row["timestamp"]}
+    record.update({col: row[col] for col in METRIC_COLUMNS})
+    if row["extra"]:
+        record.update(json.loads(row["extra"]))
+    return record
+
+
+def latest(names=None, metrics_dir=None):
+    """
+    Most recent metrics per identifier.
+
+    Args:
+        names (list of str, optional): Only these identifiers (default: all).
+        metrics_dir (str, optional): Directory holding metrics.db.
+
+    Returns:
+        dict: name → metrics dict of its latest row.
+    """
+    query = (
+        "SELECT m.* FROM metrics m JOIN ("
+        "  SELECT name, MAX(id) AS id FROM metrics GROUP BY name"
+        ") last ON m.id = last.id"
+    )
+    with closing(connect(metrics_dir)) as conn:
+        rows = conn.execute(query).fetchall()
+    result = {row["name"]: _row_to_dict(row) for row in rows}
+    if names is not None:
+        result = {name: result[name] for name in names if name in result}
+    return dict(sorted(result.items()))
+
+
+def history(name, since=None, limit=None, metrics_dir=None):
+    """
+    All rows for one identifier, oldest first.
+
+    Args:
+        name (str): Identifier such as "math_random_forest".
+        since (str, optional): Only rows with timestamp >= since ("YYYY-MM-DD ...").
+        limit (int, optional): Only the most recent `limit` rows.
+
+    Returns:
+        list of dict
+    """
+    query = "SELECT * FROM metrics WHERE name = ?"
+    params = [name]
+    if since:
+        query += " AND timestamp >= ?"
+        params.append(since)
+    query += " ORDER BY timestamp DESC, id DESC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(int(limit))
+    with closing(connect(metrics_dir)) as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [_row_to_dict(row) for row in reversed(rows)]
+
+
+def trend(name, metric="mae", last=10, metrics_dir=None):
+    """
+    How one metric developed over the most recent runs.
+
+    Returns:
+        dict: {"name", "metric", "values": [(timestamp, value), ...],
+               "latest", "previous", "change"} (previous/change are None
+               when there is only one run; any of them is None when a
+               run has no value for the metric).
+    """
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric '{metric}'. Expected one of: {METRIC_COLUMNS}")
+    rows = history(name, limit=last, metrics_dir=metrics_dir)
+    values = [(row["timestamp"], row[metric]) for row in rows]
+    latest_value = values[-1][1] if values else None
+    previous = values[-2][1] if len(values) > 1 else None
+    change = round(latest_value - previous, 3) if None not in (latest_value, previous) else None
+    return {"name": name, "metric": metric, "values": values,
+            "latest": latest_value, "previous": previous, "change": change}
+
+
+def format_metric(value, spec=".3f"):
+    """Format a metric value, or "n/a" if it is missing (NULL in the store)."""
+    return "n/a" if value is None else format(value, spec)
+
+
+def export_csv(name, out_path, metrics_dir=None):
+    """Write the full history of one identifier as CSV (same columns as the old files)."""
+    import pandas as pd
+
+    rows = history(name, metrics_dir=metrics_dir)
+    df = pd.DataFrame(rows).rename(columns={"name": "dataset"})
+    leading = METRIC_COLUMNS + ["dataset", "timestamp"]
+    df = df[[c for c in leading if c in df.columns] + [c for c in df.columns if c not in leading]]
+    df.to_csv(out_path, index=False)
+    return out_path
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Examples:
+#   $ python src/metrics_store.py latest
+#   $ python src/metrics_store.py history math_random_forest
+#   $ python src/metrics_store.py export math_random_forest --out math_rf.csv
+# -------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the metrics history")
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("latest", help="Latest metrics per dataset/model")
+    hist = sub.add_parser("history", help="All runs of one dataset/model")
+    hist.add_argument("name", help="e.g. math_random_forest")
+    hist.add_argument("--since", default=None, help="Only runs on or after this date (YYYY-MM-DD)")
+    export = sub.add_parser("export", help="Export one history as CSV")
+    export.add_argument("name")
+    export.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+
+    if args.action == "latest":
+        print(f"{'name':<36} {'timestamp':<20} {'mae':>7} {'rmse':>7} {'r2':>7}")
+        for name, m in latest().items():
+            print(f"{name:<36} {m['timestamp']:<20} {format_metric(m['mae']):>7} "
+                  f"{format_metric(m['rmse']):>7} {format_metric(m['r2']):>7}")
+    elif args.action == "history":
+        print(f"{'timestamp':<20} {'mae':>7} {'rmse':>7} {'r2':>7}")
+        for m in history(args.name, since=args.since):
+            print(f"{m['timestamp']:<20} {format_metric(m['mae']):>7} "
+                  f"{format_metric(m['rmse']):>7} {format_metric(m['r2']):>7}")
+    else:
+        print(f"✅ Exported to: {export_csv(args.name, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 from datetime import datetime
+import json
 import os
+import shutil
+import time
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import pandas as pd
 from utils import get_logger
 import numpy as np
 
@@ -56,6 +58,184 @@ def train_model(X, y, pipeline, test_size=0.2, random_state=42):
         raise
 
 
+def build_regressor(model_name, params=None):
+    """
+    Create an untrained regressor by name.
+
+    Args:
+        model_name (str): "random_forest", "linear_regression" or "sgd".
+            - Random Forest: robust for non-linear, categorical-heavy data
+            - Linear Regression: baseline model (interpretable but weaker)
+            - SGD: linear model trained by stochastic gradient descent; supports
+              partial_fit, so it can be updated with new batches (see incremental.py)
+        params (dict, optional): Hyperparameters overriding the defaults
+            (e.g. the winning config of tuning.py).
+
+    Returns:
+        sklearn estimator, or None if the name is not supported.
+
+    Note:
+        n_jobs comes from the resource configuration (see resources.py:
+        --n-jobs, SGP_N_JOBS or config/resources.json), capped by any outer
+        parallelism. The default is still a single thread.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression, SGDRegressor
+    from resources import inner_n_jobs
+
+    if model_name == "random_forest":
+        regressor = RandomForestRegressor(
+            n_estimators=100,       # number of decision trees
+            random_state=42,        # reproducibility
+            n_jobs=inner_n_jobs()   # threads per forest (default 1, see resources.py)
+        )
+    elif model_name == "linear_regression":
+        regressor = LinearRegression()
+    elif model_name == "sgd":
+        regressor = SGDRegressor(
+            penalty="l2",
+            alpha=1e-4,
+            learning_rate="invscaling",  # step size decays with the number of rows seen,
+            eta0=0.01,                   # also across partial_fit calls
+            max_iter=1000,
+            tol=1e-4,
+            random_state=42
+        )
+    else:
+        return None
+
+    if params:
+        regressor.set_params(**params)
+    return regressor
+
+
+def build_feature_set(X, y, preprocessor, test_size=0.2, random_state=42):
+    """
+    Split the data once, fit the preprocessor on the training part and
+    transform both parts, so several models can be trained on the same
+    feature matrices without re-fitting the scaler and encoder.
+
+    The split is identical to the one train_model makes for the same
+    test_size and random_state.
+
+    Args:
+        X (pd.DataFrame): Feature matrix (input predictors).
+        y (pd.Series): Target variable (final grade G3).
+        preprocessor (ColumnTransformer): Unfitted preprocessor (see build_preprocessor).
+        test_size (float): Proportion of the dataset used for testing (default = 20%).
+        random_state (int): Random seed for reproducibility.
+
+    Returns:
+        dict: {
+            "preprocessor": fitted preprocessor,
+            "X_train", "X_test": raw feature splits,
+            "y_train", "y_test": target splits,
+            "Xt_train", "Xt_test": transformed feature matrices
+        }
+    """
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=random_state
+        )
+        Xt_train = preprocessor.fit_transform(X_train)
+        Xt_test = preprocessor.transform(X_test)
+
+        logger.info(
+            f"✅ Feature matrices built. Train: {Xt_train.shape}, Test: {Xt_test.shape}"
+        )
+
+        return {
+            "preprocessor": preprocessor,
+            "X_train": X_train, "X_test": X_test,
+            "y_train": y_train, "y_test": y_test,
+            "Xt_train": Xt_train, "Xt_test": Xt_test,
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Building feature matrices failed: {e}")
+        raise
+
+
+def train_on_features(features, regressor):
+    """
+    Fit a regressor on a shared feature set and wrap it into a pipeline.
+
+    Args:
+        features (dict): Output of build_feature_set.
+        regressor (sklearn estimator): Untrained model.
+
+    Returns:
+        sklearn.pipeline.Pipeline: ("preprocessor", "model") pipeline that is
+        self-contained, i.e. it can be saved and used by predict.py on raw rows.
+    """
+    from sklearn.pipeline import Pipeline
+
+    try:
+        regressor.fit(features["Xt_train"], features["y_train"])
+
+        logger.info(
+            f"✅ Model training completed. Train size: {len(features['y_train'])}, "
+            f"Test size: {len(features['y_test'])}"
+        )
+
+        return Pipeline(steps=[
+            ("preprocessor", features["preprocessor"]),
+            ("model", regressor)
+        ])
+
+    except Exception as e:
+        logger.error(f"❌ Model training failed: {e}")
+        raise
+
+
+def compute_metrics(y_true, y_pred, dataset_name):
+    """
+    Compute regression metrics in the format used across the project.
+
+    - MAE: mean absolute error
+    - MSE: mean squared error
+    - RMSE: root mean squared error
+    - R²: coefficient of determination
+
+    Args:
+        y_true (array-like): Ground-truth target values.
+        y_pred (array-like): Predicted values.
+        dataset_name (str): Identifier stored in the "dataset" field.
+
+    Returns:
+        dict: {"mae", "mse", "rmse", "r2", "dataset", "timestamp"}
+    """
+    mae = mean_absolute_error(y_true, y_pred)
+    mse = mean_squared_error(y_true, y_pred)
+    rmse = np.sqrt(mse)  # manual calc ensures compatibility with older sklearn
+    r2 = r2_score(y_true, y_pred)
+
+    return {
+        "mae": round(mae, 3),
+        "mse": round(mse, 3),
+        "rmse": round(rmse, 3),
+        "r2": round(r2, 3),
+        "dataset": dataset_name,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def save_metrics(metrics, metrics_path, dataset_name):
+    """
+    Append one metrics row to the metrics store (metrics_path/metrics.db).
+
+    The store is append-only SQLite (see metrics_store.py): one INSERT per
+    evaluation, safe with several processes writing at once. Query it with
+    metrics_store.latest() / history() / trend().
+
+    Returns:
+        str: Path of the metrics database.
+    """
+    import metrics_store
+
+    return metrics_store.append(metrics, dataset_name, metrics_dir=metrics_path)
+
+
 def evaluate_model(pipeline, X_test, y_test, metrics_path, dataset_name):
     """
     Evaluate the trained model and save metrics to file.
@@ -78,43 +258,17 @@ def evaluate_model(pipeline, X_test, y_test, metrics_path, dataset_name):
         y_pred = pipeline.predict(X_test)
         
         # -----------------------------------------------------------------
-        # STEP 2: Compute evaluation metrics
-        # - MAE: mean absolute error
-        # - MSE: mean squared error
-        # - RMSE: root mean squared error
-        # - R²: coefficient of determination
+        # STEP 2: Compute evaluation metrics (MAE, MSE, RMSE, R²)
         # -----------------------------------------------------------------
-        mae = mean_absolute_error(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        rmse = np.sqrt(mse)  # manual calc ensures compatibility with older sklearn
-        r2 = r2_score(y_test, y_pred)
-        
-        metrics = {
-            "mae": round(mae, 3),
-            "mse": round(mse, 3),
-            "rmse": round(rmse, 3),
-            "r2": round(r2, 3),
-            "dataset": dataset_name,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        metrics = compute_metrics(y_test, y_pred, dataset_name)
         
         # -----------------------------------------------------------------
-        # STEP 3: Save metrics to CSV file
-        # - Appends if file exists
-        # - Creates new file if not
+        # STEP 3: Append metrics to the metrics store
         # -----------------------------------------------------------------
-        os.makedirs(metrics_path, exist_ok=True)
-        metrics_file = os.path.join(metrics_path, f"metrics_{dataset_name}.csv")
-        
-        metrics_df = pd.DataFrame([metrics])
-        if os.path.exists(metrics_file):
-            existing_df = pd.read_csv(metrics_file)
-            metrics_df = pd.concat([existing_df, metrics_df], ignore_index=True)
-        
-        metrics_df.to_csv(metrics_file, index=False)
+        metrics_file = save_metrics(metrics, metrics_path, dataset_name)
         
         logger.info(f"📊 Model evaluation completed. Metrics saved to: {metrics_file}")
-        logger.info(f"   MAE: {mae:.3f}, RMSE: {rmse:.3f}, R²: {r2:.3f}")
+        logger.info(f"   MAE: {metrics['mae']:.3f}, RMSE: {metrics['rmse']:.3f}, R²: {metrics['r2']:.3f}")
         
         return metrics
         
@@ -123,25 +277,206 @@ def evaluate_model(pipeline, X_test, y_test, metrics_path, dataset_name):
         raise
 
 
-def save_model(model, path, filename=None, save_latest=True):
+def _fit_and_score_fold(pipeline, X, y, train_idx, test_idx, dataset_name):
+    """Fit a fresh pipeline on one CV fold and return its metrics (runs in a worker)."""
+    pipeline.fit(X.iloc[train_idx], y.iloc[train_idx])
+    return compute_metrics(y.iloc[test_idx], pipeline.predict(X.iloc[test_idx]), dataset_name)
+
+
+def cross_validate_model(X, y, pipeline, n_splits=5, n_jobs=None, refit=False,
+                         metrics_path=None, dataset_name="dataset", random_state=42):
+    """
+    K-fold cross-validation with the folds fitted in parallel.
+
+    Each fold fits an independent clone of the (unfitted) pipeline, so the
+    preprocessor is re-fitted inside every fold (no leakage from the test
+    fold). Folds run in separate processes via joblib; with one core per
+    fold the wall-clock time is about that of a single fit.
+
+    Args:
+        X (pd.DataFrame): Feature matrix (input predictors).
+        y (pd.Series): Target variable (final grade G3).
+        pipeline (sklearn.pipeline.Pipeline): Unfitted preprocessing + model pipeline.
+        n_splits (int): Number of folds (default = 5).
+        n_jobs (int, optional): Parallel workers (default: one per fold, capped
+            at the max_cores resource setting). Estimator threads inside each
+            fold are reduced so folds × threads stays within max_cores.
+        refit (bool): Also fit the pipeline on all of X, y and return it.
+        metrics_path (str, optional): If set, append the aggregate metrics to
+            the metrics store in this directory as "<dataset_name>_cv".
+        dataset_name (str): Identifier for the dataset/model combination.
+        random_state (int): Seed for the fold shuffling.
+
+    Returns:
+        tuple: (final_pipeline, cv_results)
+            - final_pipeline: pipeline fitted on all data, or None if refit=False
+            - cv_results: {
+                "folds": list of per-fold metric dicts (evaluate_model format),
+                "aggregate": mean metrics in the same format, plus
+                             "mae_std", "r2_std" and "folds" (fold count)
+              }
+    """
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.model_selection import KFold
+    from resources import get_config, apply_n_jobs, resource_limits
+
+    try:
+        if n_jobs is None:
+            n_jobs = min(n_splits, get_config()["max_cores"])
+
+        kfold = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        with resource_limits(outer_workers=n_jobs):
+            fold_metrics = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_and_score_fold)(
+                    apply_n_jobs(clone(pipeline), outer_workers=n_jobs),
+                    X, y, train_idx, test_idx, f"{dataset_name}_fold{i + 1}"
+                )
+                for i, (train_idx, test_idx) in enumerate(kfold.split(X))
+            )
+
+        # -----------------------------------------------------------------
+        # Aggregate: mean of each metric across folds (same keys as
+        # evaluate_model), plus the spread of the two headline metrics
+        # -----------------------------------------------------------------
+        aggregate = {
+            key: round(float(np.mean([m[key] for m in fold_metrics])), 3)
+            for key in ("mae", "mse", "rmse", "r2")
+        }
+        aggregate["dataset"] = f"{dataset_name}_cv"
+        aggregate["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        aggregate["mae_std"] = round(float(np.std([m["mae"] for m in fold_metrics])), 3)
+        aggregate["r2_std"] = round(float(np.std([m["r2"] for m in fold_metrics])), 3)
+        aggregate["folds"] = n_splits
+
+        logger.info(
+            f"📊 {n_splits}-fold CV completed ({n_jobs} workers). "
+            f"MAE: {aggregate['mae']:.3f} ± {aggregate['mae_std']:.3f}, "
+            f"R²: {aggregate['r2']:.3f} ± {aggregate['r2_std']:.3f}"
+        )
+        if metrics_path is not None:
+            metrics_file = save_metrics(aggregate, metrics_path, f"{dataset_name}_cv")
+            logger.info(f"   CV metrics saved to: {metrics_file}")
+
+        final_pipeline = None
+        if refit:
+            final_pipeline = apply_n_jobs(clone(pipeline)).fit(X, y)
+            logger.info(f"✅ Final model trained on all data. Size: {len(X)}")
+
+        return final_pipeline, {"folds": fold_metrics, "aggregate": aggregate}
+
+    except Exception as e:
+        logger.error(f"❌ Cross-validation failed: {e}")
+        raise
+
+
+def parse_compression(compress):
+    """
+    Normalize a compression setting for joblib.dump.
+
+    Accepts 0-9 (zlib level), a method name ("lz4", "zlib", "gzip", "bz2",
+    "lzma") or "method:level" (e.g. "lz4:3"). 0 / None means uncompressed.
+
+    Returns:
+        int or tuple: Value for joblib.dump(compress=...).
+    """
+    if compress in (None, "", 0, "0"):
+        return 0
+    if isinstance(compress, int):
+        return compress
+    compress = str(compress)
+    if compress.isdigit():
+        return int(compress)
+    method, _, level = compress.partition(":")
+    return (method, int(level or 3))
+
+
+def _manifest_path(artifact_path):
+    return artifact_path + ".manifest.json"
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def publish_latest(versioned_path, latest_path):
+    """
+    Atomically point latest_path at an already-written artifact.
+
+    A hardlink to the versioned file is created under a temporary name and
+    renamed over latest_path, so the model bytes are not written a second
+    time and readers see either the old or the new model, never a partial
+    file. Falls back to a copy where hardlinks are not supported (e.g.
+    some network or Windows file systems).
+
+    Returns:
+        str: "hardlink" or "copy" (how the file was published).
+    """
+    tmp_path = f"{latest_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(versioned_path, tmp_path)
+        method = "hardlink"
+    except OSError:
+        shutil.copyfile(versioned_path, tmp_path)
+        method = "copy"
+    os.replace(tmp_path, latest_path)
+    if os.path.exists(tmp_path):
+        # rename() is a no-op when both names already link to the same file
+        # (latest_path was published from this model before)
+        os.remove(tmp_path)
+
+    manifest_file = _manifest_path(versioned_path)
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["target"] = os.path.basename(versioned_path)
+        manifest["published"] = method
+        _write_json_atomic(_manifest_path(latest_path), manifest)
+    return method
+
+
+def save_model(model, path, filename=None, save_latest=True, export_compiled=False,
+               compress=0, measure_load=False):
     """
     Save a trained model (or pipeline) to disk.
 
     Behavior:
-        - Always saves a versioned model file (with timestamp or custom filename).
-        - Optionally overwrites/creates 'latest_model.pkl' for easy production use.
+        - Writes the model once: to a temporary file that is renamed into
+          place, so readers never see a half-written file.
+        - Optionally points 'latest_model.pkl' at it (hardlink + rename,
+          see publish_latest) instead of dumping the model a second time.
+        - Writes '<filename>.manifest.json' next to the model with its size,
+          compression and save (and optionally load) time.
+        - Optionally exports a NumPy-only compiled predictor next to it
+          ('<name>.npz', see compiled.py) for fast inference.
 
     Args:
         model (sklearn.pipeline.Pipeline or estimator): 
             The trained model or pipeline to save.
         path (str): Directory where the model will be stored.
         filename (str, optional): Custom filename. If None, generates timestamped file.
-        save_latest (bool, optional): Also save/overwrite 'latest_model.pkl' (default=True).
+        save_latest (bool, optional): Also publish 'latest_model.pkl' (default=True).
+        export_compiled (bool or str, optional): Also write a compiled predictor
+            (default=False). True or "npz" writes '<name>.npz'; "mmap" writes a
+            memory-mappable '<name>.mmap/' directory shared by all worker
+            processes that load it. Skipped with a warning if the pipeline
+            cannot be compiled.
+        compress (int or str, optional): Compression (see parse_compression);
+            default 0 = uncompressed (fastest load, largest file).
+        measure_load (bool, optional): Load the file back once and record the
+            load time in the manifest (default=False).
 
     Returns:
         dict: Dictionary with file paths:
             - "versioned": Path of the versioned model file
             - "latest": Path of the latest model file (if saved)
+            - "compiled": Path of the compiled predictor (if exported)
+            - "manifest": Path of the versioned model's manifest
     """
     os.makedirs(path, exist_ok=True)  # Ensure the directory exists
 
@@ -154,24 +489,63 @@ def save_model(model, path, filename=None, save_latest=True):
             filename = f"model_{timestamp}.pkl"
 
         # -----------------------------------------------------------------
-        # STEP 2: Save versioned model (does not overwrite)
+        # STEP 2: Write the versioned model once (temp file + rename)
         # -----------------------------------------------------------------
         versioned_path = os.path.join(path, filename)
-        joblib.dump(model, versioned_path)
+        tmp_path = f"{versioned_path}.{os.getpid()}.tmp"
+        compression = parse_compression(compress)
+
+        start = time.perf_counter()
+        try:
+            joblib.dump(model, tmp_path, compress=compression)
+            os.replace(tmp_path, versioned_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        save_seconds = time.perf_counter() - start
         logger.info(f"[SAVE] Versioned model saved at: {versioned_path}")
 
-        saved_paths = {"versioned": versioned_path}
+        manifest = {
+            "file": filename,
+            "size_bytes": os.path.getsize(versioned_path),
+            "compress": compression if isinstance(compression, int) else ":".join(map(str, compression)),
+            "save_seconds": round(save_seconds, 4),
+            "load_seconds": None,
+            "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if measure_load:
+            start = time.perf_counter()
+            joblib.load(versioned_path)
+            manifest["load_seconds"] = round(time.perf_counter() - start, 4)
+        _write_json_atomic(_manifest_path(versioned_path), manifest)
+
+        saved_paths = {"versioned": versioned_path, "manifest": _manifest_path(versioned_path)}
 
         # -----------------------------------------------------------------
-        # STEP 3: Save/overwrite 'latest_model.pkl'
+        # STEP 3: Publish 'latest_model.pkl'
         # Provides a stable reference for the most recent model
         # -----------------------------------------------------------------
         if save_latest:
             latest_path = os.path.join(path, "latest_model.pkl")
-            joblib.dump(model, latest_path)
+            publish_latest(versioned_path, latest_path)
             logger.info(f"[SAVE] Latest model updated at: {latest_path}")
             saved_paths["latest"] = latest_path
 
+        # -----------------------------------------------------------------
+        # STEP 4: Export a compiled NumPy-only predictor (optional)
+        # -----------------------------------------------------------------
+        if export_compiled:
+            from compiled import compile_pipeline, save_compiled
+            try:
+                suffix = ".mmap" if export_compiled == "mmap" else ".npz"
+                compiled_path = os.path.splitext(versioned_path)[0] + suffix
+                save_compiled(compile_pipeline(model), compiled_path)
+                logger.info(f"[SAVE] Compiled predictor saved at: {compiled_path}")
+                saved_paths["compiled"] = compiled_path
+            except ValueError as e:
+                logger.warning(f"[SAVE] Skipped compiled export: {e}")
+
         return saved_paths
 
     except Exception as e:
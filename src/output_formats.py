@@ -0,0 +1,173 @@
+import os
+import sys
+
+# ---------------------------------------------------------------------
+# Output formats for prediction results.
+#
+#   csv      comma-separated text with a header (the default)
+#   ndjson   one JSON object per line: {"prediction": 11.2, "prediction_rounded": 11}
+#   parquet  columnar, compressed, typed (needs pyarrow)
+#   arrow    Arrow IPC: the file format for files (readable with
+#            pyarrow.ipc.open_file / pandas.read_feather), the stream format
+#            on stdout (pyarrow.ipc.open_stream) (needs pyarrow)
+#
+# PredictionWriter appends result chunks one at a time, so streaming
+# prediction never holds more than one chunk. Files are written to
+# '<path>.part' and renamed on success; an interrupted run never leaves a
+# truncated file behind. The target "-" writes to stdout for Unix pipelines.
+#
+# Text formats can also be encoded elsewhere (encode_text(), e.g. in the
+# worker processes of sharded scoring) and appended with write_encoded().
+# ---------------------------------------------------------------------
+OUTPUT_FORMATS = ("csv", "ndjson", "parquet", "arrow")
+EXTENSIONS = {"csv": ".csv", "ndjson": ".ndjson", "parquet": ".parquet", "arrow": ".arrow"}
+ARROW_FORMATS = ("parquet", "arrow")
+TEXT_FORMATS = ("csv", "ndjson")
+STDOUT = "-"
+
+
+def has_pyarrow():
+    """True if pyarrow is installed (needed for parquet and arrow output)."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def available_formats():
+    """Output formats usable in this environment."""
+    return [fmt for fmt in OUTPUT_FORMATS if fmt not in ARROW_FORMATS or has_pyarrow()]
+
+
+def encode_text(df, fmt):
+    """csv (without header) or ndjson text of one results DataFrame."""
+    if fmt == "csv":
+        return df.to_csv(index=False, header=False)
+    if fmt == "ndjson":
+        if not len(df):
+            return ""
+        # pandas rounds to 10 digits by default; 15 (its maximum) keeps
+        # the predictions as precise as in the csv/parquet/arrow outputs
+        text = df.to_json(orient="records", lines=True, double_precision=15)
+        return text if text.endswith("\n") else text + "\n"
+    raise ValueError(f"encode_text supports {list(TEXT_FORMATS)}, got '{fmt}'")
+
+
+def output_path(output_dir, stem, fmt):
+    """'<output_dir>/<stem>.<ext>' for a format, or "-" when output_dir is "-" (stdout)."""
+    if output_dir == STDOUT:
+        return STDOUT
+    return os.path.join(output_dir, stem + EXTENSIONS[fmt])
+
+
+class PredictionWriter:
+    """
+    Append prediction DataFrames to one output in a given format.
+
+    Example:
+        >>> with PredictionWriter("results/predictions/p.parquet", "parquet") as writer:
+        ...     for chunk in chunks:
+        ...         writer.write(chunk)
+
+    Args:
+        target (str or file-like): Output path, "-" for stdout, or an open
+            stream (text stream for csv/ndjson; its .buffer, if any, is used
+            for parquet/arrow).
+        fmt (str): One of OUTPUT_FORMATS.
+    """
+
+    def __init__(self, target, fmt="csv"):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Expected one of: {list(OUTPUT_FORMATS)}")
+        if fmt in ARROW_FORMATS and not has_pyarrow():
+            raise ImportError(f"{fmt} output needs pyarrow (pip install pyarrow), "
+                              f"or choose one of: csv, ndjson")
+        self.fmt = fmt
+        self.rows = 0
+        self._binary = fmt in ARROW_FORMATS
+        self._schema = None
+        self._header_written = False
+        self._table_writer = None       # pyarrow ParquetWriter / IPC writer
+
+        if target == STDOUT:
+            target = sys.stdout
+        if hasattr(target, "write"):
+            self.path = None
+            self._part_path = None
+            self._stream = getattr(target, "buffer", target) if self._binary else target
+            self._owns_stream = False
+        else:
+            self.path = target
+            self._part_path = f"{target}.part"
+            self._stream = open(self._part_path, "wb") if self._binary else \
+                open(self._part_path, "w", newline="", encoding="utf-8")
+            self._owns_stream = True
+
+    def write(self, df):
+        """Append one DataFrame of results (same columns in every call)."""
+        if self.fmt == "csv":
+            df.to_csv(self._stream, index=False, header=not self._header_written)
+            self._header_written = True
+        elif self.fmt == "ndjson":
+            self._stream.write(encode_text(df, "ndjson"))
+        else:
+            self._write_table(df)
+        self.rows += len(df)
+
+    def write_encoded(self, text, rows, columns):
+        """
+        Append text produced by encode_text() (csv / ndjson only).
+
+        Args:
+            text (str): Encoded rows.
+            rows (int): Number of rows in text.
+            columns (list of str): Result columns (for the CSV header).
+        """
+        if self.fmt not in TEXT_FORMATS:
+            raise ValueError(f"write_encoded supports {list(TEXT_FORMATS)}, not '{self.fmt}'")
+        if self.fmt == "csv" and not self._header_written:
+            import pandas as pd
+            pd.DataFrame(columns=columns).to_csv(self._stream, index=False)
+            self._header_written = True
+        self._stream.write(text)
+        self.rows += rows
+
+    def _write_table(self, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._table_writer is None:
+            self._schema = table.schema
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._table_writer = pq.ParquetWriter(self._stream, self._schema)
+            elif self._owns_stream:
+                self._table_writer = pa.ipc.new_file(self._stream, self._schema)
+            else:
+                self._table_writer = pa.ipc.new_stream(self._stream, self._schema)
+        elif table.schema != self._schema:
+            # e.g. an all-null column in one chunk: keep the first chunk's types
+            table = table.cast(self._schema)
+        self._table_writer.write_table(table)
+
+    def close(self, success=True):
+        """Finish the output; on success a file target is renamed into place."""
+        try:
+            if self._table_writer is not None:
+                self._table_writer.close()
+            self._stream.flush()
+        finally:
+            if self._owns_stream:
+                self._stream.close()
+                if success:
+                    os.replace(self._part_path, self.path)
+                elif os.path.exists(self._part_path):
+                    os.remove(self._part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(success=exc_type is None)
+        return False
@@ -1,18 +1,166 @@
 import argparse
+import contextlib
+import math
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import joblib
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+# ---------------------------------------------------------------------
+# Make sibling modules importable when run as `python src/predict.py`
+# or `python -m src.predict` from the project root.
+# ---------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def run_prediction(model_path: str, data_path: str, output_dir: str = "results/predictions"):
+from schema import read_student_csv  # Typed parsing of student CSVs
+import resources                      # CPU resource settings (n_jobs, BLAS caps, worker counts)
+from resources import apply_n_jobs, add_resource_arguments, configure_from_args
+import profiling                      # Per-phase wall/CPU time and peak memory
+from output_formats import (          # csv / ndjson / parquet / arrow
+    OUTPUT_FORMATS, STDOUT, TEXT_FORMATS, PredictionWriter, encode_text, output_path
+)
+
+# Sharded scoring: largest byte range of the input given to one task
+SHARD_BYTES = 32 * 1024 ** 2
+
+
+@profiling.profiled("load_model")
+def load_model(model_path: str):
+    """
+    Load a trained model for prediction.
+
+    Args:
+        model_path (str): A pipeline saved by save_model (.pkl) or a compiled
+            NumPy-only predictor (.npz file or memory-mapped .mmap directory,
+            see compiled.py).
+
+    Returns:
+        Object with a predict(df) method. Pickled pipelines get the n_jobs of
+        the current resource configuration (see resources.py), not the value
+        they were trained with.
+    """
+    if model_path.endswith(".npz") or os.path.isdir(model_path):
+        from compiled import load_compiled
+        return load_compiled(model_path)
+    return apply_n_jobs(joblib.load(model_path))
+
+
+def prepare_features(df: pd.DataFrame, warn: bool = True) -> pd.DataFrame:
+    """
+    Drop the target column 'G3' from an input frame if it is present.
+
+    Args:
+        df (pd.DataFrame): Raw input rows.
+        warn (bool): Print a warning when the column is removed.
+
+    Returns:
+        pd.DataFrame: Feature-only frame ready for pipeline.predict.
+    """
+    if "G3" in df.columns:
+        df = df.drop("G3", axis=1)
+        if warn:
+            print("⚠️  Target column 'G3' removed from input data")
+    return df
+
+
+def read_input(data_path, id_column=None, **kwargs):
+    """
+    Read prediction input with the student schema.
+
+    Args:
+        data_path (str): ";"-separated CSV file.
+        id_column (str, optional): Row identifier column; read as strings so
+            IDs such as "00042" survive unchanged.
+        **kwargs: Passed to read_student_csv (e.g. chunksize).
+    """
+    if id_column:
+        kwargs["dtype"] = {id_column: str}
+    return read_student_csv(data_path, **kwargs)
+
+
+def predict_frame(pipeline, df: pd.DataFrame, id_column: str = None) -> pd.DataFrame:
+    """
+    Predict grades for a feature frame and return them as a results DataFrame.
+
+    Args:
+        pipeline (sklearn.pipeline.Pipeline): Trained preprocessing + model pipeline.
+        df (pd.DataFrame): Feature rows (without 'G3').
+        id_column (str, optional): Identifier column of df; it is not used as a
+            feature but copied to the results, so they can be joined back
+            without relying on row order.
+
+    Returns:
+        pd.DataFrame: Columns [id_column,] 'prediction' (raw regression output)
+        and 'prediction_rounded' (integer grade).
+    """
+    results = {}
+    if id_column:
+        if id_column not in df.columns:
+            raise ValueError(f"ID column '{id_column}' not found in input data")
+        results[id_column] = df[id_column].to_numpy()
+        df = df.drop(columns=[id_column])
+
+    predictions = pipeline.predict(df)
+    results["prediction"] = predictions                             # raw regression outputs
+    results["prediction_rounded"] = predictions.round().astype(int)  # easier to interpret as grades
+    return pd.DataFrame(results)
+
+
+def print_summary(model_path, data_path, count, pred_min, pred_max, pred_mean, preview,
+                  preview_ids=None):
+    """
+    Print a human-readable summary of a prediction run.
+
+    Args:
+        model_path (str): Path of the model used (only the basename is shown).
+        data_path (str): Path of the input data (only the basename is shown).
+        count (int): Number of predictions made.
+        pred_min (float): Smallest prediction.
+        pred_max (float): Largest prediction.
+        pred_mean (float): Average prediction.
+        preview (sequence of float): First predictions to print (up to 10).
+        preview_ids (sequence, optional): IDs of those rows (see --id-column);
+            rows are numbered 1..10 otherwise.
+    """
+    print("\n" + "=" * 50)
+    print("PREDICTION SUMMARY")
+    print("=" * 50)
+    print(f"Model: {os.path.basename(model_path)}")
+    print(f"Input data: {os.path.basename(data_path)}")
+    print(f"Number of predictions: {count}")
+    print(f"Prediction range: {pred_min:.1f} - {pred_max:.1f}")
+    print(f"Average prediction: {pred_mean:.2f}")
+    print("\nFirst 10 predictions:")
+    for i, pred in enumerate(preview[:10]):
+        label = preview_ids[i] if preview_ids is not None else i + 1
+        print(f"  Student {label}: {pred:.2f} (rounded: {round(pred)})")
+
+
+def run_prediction(model_path: str, data_path: str, output_dir: str = "results/predictions",
+                   chunksize: int = None, output_format: str = "csv", id_column: str = None,
+                   workers: int = None):
     """
     Run predictions using a trained model pipeline.
 
     Args:
-        model_path (str): Path to a trained model (.pkl file saved by save_model).
+        model_path (str): Path to a trained model (.pkl file saved by save_model,
+            or a compiled .npz predictor).
         data_path (str): Path to a CSV file with new data (no target column 'G3').
-        output_dir (str): Directory to save prediction results (default: results/predictions).
+        output_dir (str): Directory to save prediction results (default: results/predictions),
+            or "-" to write them to stdout (the summary then goes to stderr).
+        chunksize (int, optional): If set, stream the input in chunks of this many
+            rows instead of loading the whole file (see run_prediction_chunked).
+        output_format (str): "csv" (default), "ndjson", "parquet" or "arrow"
+            (see output_formats.py; parquet/arrow need pyarrow).
+        id_column (str, optional): Input column copied to the output as the
+            first column (and not used as a feature).
+        workers (int, optional): If > 1, score byte-range shards of the input
+            in this many processes (see run_prediction_sharded).
 
     Behavior:
         - Loads the trained pipeline and input dataset.
@@ -20,8 +168,58 @@ def run_prediction(model_path: str, data_path: str, output_dir: str = "results/p
         - Generates predictions and creates a results DataFrame with both raw 
           and rounded values (for easier interpretation).
         - Prints a summary of predictions to the console.
-        - Saves the results into a timestamped CSV file in output_dir.
+        - Saves the results into a timestamped file in output_dir
+          (predictions_<timestamp>.<csv|ndjson|parquet|arrow>).
+
+    Returns:
+        str: Path of the saved predictions file ("-" for stdout).
+
+    Wall time, CPU time and peak memory of each phase (load_model, read_data,
+    prepare_features, predict, write_output) are saved to
+    results/metrics/spans/predict_<model>_<timestamp>.json.
     """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'. Expected one of: {list(OUTPUT_FORMATS)}")
+    model_name = os.path.splitext(os.path.basename(model_path.rstrip(os.sep)))[0]
+
+    # In pipe mode stdout carries the data; everything printed goes to stderr
+    pipe = output_dir == STDOUT
+    target = sys.stdout if pipe else output_dir
+    console = contextlib.redirect_stdout(sys.stderr) if pipe else contextlib.nullcontext()
+
+    with console, profiling.trace(f"predict_{model_name}", model=model_path, data=data_path,
+                                  chunksize=chunksize, format=output_format, workers=workers) as run_trace:
+        try:
+            if workers and workers > 1:
+                return run_prediction_sharded(model_path, data_path, target, workers,
+                                              chunksize or 100_000, output_format, id_column)
+            if chunksize:
+                return run_prediction_chunked(model_path, data_path, target, chunksize,
+                                              output_format, id_column)
+            return _run_prediction(model_path, data_path, target, output_format, id_column)
+        finally:
+            if run_trace.stages:
+                spans_path = run_trace.save()
+                print(f"⏱  Phase timings: {run_trace.summary()} (details: {spans_path})")
+
+
+def _open_output(target, output_format):
+    """PredictionWriter for an output directory (timestamped file) or an open stream."""
+    if hasattr(target, "write"):
+        return PredictionWriter(target, output_format)
+    os.makedirs(target, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return PredictionWriter(output_path(target, f"predictions_{timestamp}", output_format), output_format)
+
+
+def _saved_message(writer):
+    if writer.path is None:
+        return f"\n✅ {writer.rows} predictions written to stdout ({writer.fmt})"
+    return f"\n✅ Predictions saved to: {writer.path}"
+
+
+def _run_prediction(model_path, data_path, output_dir, output_format="csv", id_column=None):
+    """In-memory body of run_prediction (runs inside its profiling trace)."""
     # -----------------------------------------------------------------
     # STEP 1: Validate input paths
     # Ensure both the model file and the new data file exist
@@ -34,58 +232,323 @@ def run_prediction(model_path: str, data_path: str, output_dir: str = "results/p
     # -----------------------------------------------------------------
     # STEP 2: Load the trained model pipeline and input data
     # - joblib is used because it efficiently handles sklearn models
-    # - Input data uses ";" as separator (UCI dataset format)
+    # - Input data uses ";" as separator (UCI dataset format) and is parsed
+    #   with the compact typed schema (categorical / int8 / uint8 columns)
     # -----------------------------------------------------------------
-    pipeline = joblib.load(model_path)
-    df = pd.read_csv(data_path, sep=";")
+    pipeline = load_model(model_path)
+    with profiling.span("read_data"):
+        df = read_input(data_path, id_column)
 
     # -----------------------------------------------------------------
     # STEP 3: Drop target column if accidentally present
     # Normally, new unseen data should NOT contain 'G3'
     # -----------------------------------------------------------------
-    if "G3" in df.columns:
-        df = df.drop("G3", axis=1)
-        print("⚠️  Target column 'G3' removed from input data")
+    with profiling.span("prepare_features"):
+        df = prepare_features(df)
 
     # -----------------------------------------------------------------
     # STEP 4: Generate predictions
     # - pipeline handles preprocessing + model inference automatically
     # - predictions are continuous (regression), so we also provide rounded values
     # -----------------------------------------------------------------
-    predictions = pipeline.predict(df)
-
-    results_df = pd.DataFrame({
-        "prediction": predictions,                         # raw regression outputs
-        "prediction_rounded": predictions.round().astype(int)  # easier to interpret as grades
-    })
+    with profiling.span("predict"):
+        results_df = predict_frame(pipeline, df, id_column)
+    predictions = results_df["prediction"].to_numpy()
 
     # -----------------------------------------------------------------
     # STEP 5: Print a human-readable summary of predictions
     # Includes basic statistics and preview of first 10 predictions
     # -----------------------------------------------------------------
-    print("\n" + "=" * 50)
-    print("PREDICTION SUMMARY")
-    print("=" * 50)
-    print(f"Model: {os.path.basename(model_path)}")
-    print(f"Input data: {os.path.basename(data_path)}")
-    print(f"Number of predictions: {len(predictions)}")
-    print(f"Prediction range: {predictions.min():.1f} - {predictions.max():.1f}")
-    print(f"Average prediction: {predictions.mean():.2f}")
-    print("\nFirst 10 predictions:")
-    for i, pred in enumerate(predictions[:10]):
-        print(f"  Student {i+1}: {pred:.2f} (rounded: {round(pred)})")
+    print_summary(
+        model_path, data_path,
+        count=len(predictions),
+        pred_min=predictions.min(),
+        pred_max=predictions.max(),
+        pred_mean=predictions.mean(),
+        preview=predictions[:10],
+        preview_ids=results_df[id_column].tolist()[:10] if id_column else None
+    )
 
     # -----------------------------------------------------------------
-    # STEP 6: Save results to CSV
+    # STEP 6: Save results (CSV by default, see output_formats.py)
     # - Uses timestamp to avoid overwriting past predictions
-    # - Files are stored in results/predictions/
+    # - Files are stored in results/predictions/ (or streamed to stdout)
     # -----------------------------------------------------------------
-    os.makedirs(output_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(output_dir, f"predictions_{timestamp}.csv")
+    with profiling.span("write_output"):
+        with _open_output(output_dir, output_format) as writer:
+            writer.write(results_df)
+    print(_saved_message(writer))
+    return writer.path or STDOUT
+
+
+def run_prediction_chunked(model_path: str, data_path: str, output_dir: str = "results/predictions",
+                           chunksize: int = 100_000, output_format: str = "csv", id_column: str = None):
+    """
+    Streaming variant of run_prediction for inputs too large to hold in memory.
+
+    The input CSV is read `chunksize` rows at a time; each chunk is predicted
+    and appended to the output file before the next one is read, so peak memory
+    depends on the chunk size rather than on the file size. The printed summary
+    (count, min/max, mean, first 10) is built from running aggregates and matches
+    the one produced by run_prediction.
+
+    Args:
+        model_path (str): Path to a trained model (.pkl file saved by save_model).
+        data_path (str): Path to a CSV file with new data (no target column 'G3').
+        output_dir (str or file-like): Directory to save prediction results, or
+            an open stream (e.g. sys.stdout).
+        chunksize (int): Number of rows per chunk (default: 100,000).
+        output_format (str): "csv", "ndjson", "parquet" or "arrow".
+        id_column (str, optional): Input column passed through to the output.
+
+    Returns:
+        str: Path of the saved predictions file ("-" for a stream).
+    """
+    if chunksize is None or chunksize <= 0:
+        raise ValueError(f"chunksize must be a positive integer, got: {chunksize}")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data file not found: {data_path}")
+
+    pipeline = load_model(model_path)
+
+    # -----------------------------------------------------------------
+    # Running aggregates for the summary (no predictions kept in memory
+    # apart from the first 10 used for the preview)
+    # -----------------------------------------------------------------
+    count = 0
+    total = 0.0
+    pred_min = np.inf
+    pred_max = -np.inf
+    preview = []
+    preview_ids = [] if id_column else None
+    target_warned = False
+
+    # The writer writes to a temporary file and renames it at the end, so an
+    # interrupted run never leaves a truncated predictions file behind
+    with _open_output(output_dir, output_format) as writer:
+        chunks = read_input(data_path, id_column, chunksize=chunksize)
+        for chunk in profiling.timed(chunks, "read_data"):
+            if "G3" in chunk.columns:
+                with profiling.span("prepare_features"):
+                    chunk = prepare_features(chunk, warn=not target_warned)
+                target_warned = True
+
+            with profiling.span("predict"):
+                chunk_df = predict_frame(pipeline, chunk, id_column)
+            with profiling.span("write_output"):
+                writer.write(chunk_df)
+            predictions = chunk_df["prediction"].to_numpy()
+
+            if len(predictions):
+                count += len(predictions)
+                total += float(predictions.sum())
+                pred_min = min(pred_min, float(predictions.min()))
+                pred_max = max(pred_max, float(predictions.max()))
+                if len(preview) < 10:
+                    if id_column:
+                        preview_ids.extend(chunk_df[id_column].tolist()[:10 - len(preview)])
+                    preview.extend(predictions[:10 - len(preview)].tolist())
+        if count == 0:
+            raise ValueError(f"No rows to predict in: {data_path}")  # no output file is left behind
+
+    print_summary(
+        model_path, data_path,
+        count=count,
+        pred_min=pred_min,
+        pred_max=pred_max,
+        pred_mean=total / count,
+        preview=preview,
+        preview_ids=preview_ids
+    )
+    print(_saved_message(writer))
+    return writer.path or STDOUT
+
+
+# ---------------------------------------------------------------------
+# Sharded scoring.
+#
+# The input CSV is cut into line-aligned byte ranges (data_loader.
+# csv_byte_ranges), more of them than workers so that a slow shard does
+# not leave the other processes idle, and none larger than SHARD_BYTES so
+# memory stays bounded on multi-GB files. Every worker process loads the
+# model once (pool initializer) and then parses, predicts and formats the
+# shards it is given. The parent only writes the finished shards, strictly
+# in input order; at most 2 × workers shards are in flight at a time.
+# ---------------------------------------------------------------------
+_WORKER_MODEL = None
+
+
+def _init_scoring_worker(model_path, overrides, workers):
+    """Pool initializer: apply the parent's resource flags and load the model once."""
+    global _WORKER_MODEL
+    resources.configure(**overrides)
+    resources.set_outer_workers(workers)  # estimator threads = max_cores // workers
+    _WORKER_MODEL = load_model(model_path)
+
+
+def _score_shard(data_path, start, end, columns, chunksize, output_format, id_column):
+    """Score bytes [start, end) of the input with the model loaded by the pool initializer."""
+    return _score_range(_WORKER_MODEL, data_path, start, end, columns, chunksize, output_format, id_column)
+
+
+def _score_range(model, data_path, start, end, columns, chunksize, output_format, id_column):
+    """
+    Score bytes [start, end) of the input with `model`.
+
+    Returns:
+        dict: "payload" (encoded text for csv/ndjson, else a DataFrame or None),
+        "rows", "sum", "min", "max", "preview", "preview_ids", "columns".
+    """
+    from data_loader import read_csv_range
+
+    kwargs = {"dtype": {id_column: str}} if id_column else {}
+    parts = []
+    shard = {"rows": 0, "sum": 0.0, "min": np.inf, "max": -np.inf,
+             "preview": [], "preview_ids": [], "columns": None}
+    with resources.resource_limits():
+        for chunk in read_csv_range(data_path, start, end, columns, chunksize=chunksize, **kwargs):
+            chunk_df = predict_frame(model, prepare_features(chunk, warn=False), id_column)
+            predictions = chunk_df["prediction"].to_numpy()
+            if not len(predictions):
+                continue
+            parts.append(encode_text(chunk_df, output_format)
+                         if output_format in TEXT_FORMATS else chunk_df)
+            shard["columns"] = chunk_df.columns.tolist()
+            shard["rows"] += len(predictions)
+            shard["sum"] += float(predictions.sum())
+            shard["min"] = min(shard["min"], float(predictions.min()))
+            shard["max"] = max(shard["max"], float(predictions.max()))
+            if len(shard["preview"]) < 10:
+                if id_column:
+                    shard["preview_ids"].extend(chunk_df[id_column].tolist()[:10 - len(shard["preview"])])
+                shard["preview"].extend(predictions[:10 - len(shard["preview"])].tolist())
+
+    if not parts:
+        shard["payload"] = None
+    elif output_format in TEXT_FORMATS:
+        shard["payload"] = "".join(parts)
+    else:
+        shard["payload"] = pd.concat(parts, ignore_index=True)
+    return shard
+
+
+def _scored_shards(model_path, data_path, ranges, columns, workers, chunksize, output_format, id_column):
+    """Yield the result of every shard in input order."""
+    args = (columns, chunksize, output_format, id_column)
+    if workers <= 1 or len(ranges) <= 1:
+        # In this process: no pool initializer, so no global state is changed
+        model = load_model(model_path)
+        for start, end in ranges:
+            yield _score_range(model, data_path, start, end, *args)
+        return
+
+    pool = ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        initializer=_init_scoring_worker,
+        initargs=(model_path, resources.current_overrides(), workers)
+    )
+    pending = deque()
+    remaining = iter(ranges)
+    try:
+        for start, end in remaining:
+            pending.append(pool.submit(_score_shard, data_path, start, end, *args))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            shard = pending.popleft().result()
+            for start, end in remaining:
+                pending.append(pool.submit(_score_shard, data_path, start, end, *args))
+                break
+            yield shard
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_prediction_sharded(model_path: str, data_path: str, output_dir: str = "results/predictions",
+                           workers: int = None, chunksize: int = 100_000, output_format: str = "csv",
+                           id_column: str = None, shard_bytes: int = SHARD_BYTES):
+    """
+    Score a large CSV in parallel processes, one byte-range shard at a time.
+
+    The output (rows in input order) and the printed summary are the same as
+    those of run_prediction; in addition the total throughput is printed.
+
+    Args:
+        model_path (str): Trained model (.pkl, compiled .npz or .mmap; a .mmap
+            model is shared by all workers instead of copied into each).
+        data_path (str): CSV file with new data.
+        output_dir (str or file-like): Directory to save prediction results,
+            or an open stream (e.g. sys.stdout).
+        workers (int, optional): Worker processes (default and upper limit:
+            max_cores from the resource configuration).
+        chunksize (int): Rows parsed and predicted at once within a shard.
+        output_format (str): "csv", "ndjson", "parquet" or "arrow".
+        id_column (str, optional): Input column passed through to the output.
+        shard_bytes (int): Largest byte range per shard (default: 32 MB).
+
+    Returns:
+        str: Path of the saved predictions file ("-" for a stream).
+    """
+    from data_loader import csv_byte_ranges
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data file not found: {data_path}")
+    # Never more processes than the cores the project may use (resources.py: --max-cores)
+    max_cores = resources.get_config()["max_cores"]
+    if workers and workers > max_cores:
+        print(f"⚠️  {workers} workers requested, using {max_cores} (max_cores; raise it with --max-cores)")
+    workers = max(1, min(workers or max_cores, max_cores))
+
+    start_time = time.perf_counter()
+    with profiling.span("split_input"):
+        shards = max(2 * workers, math.ceil(os.path.getsize(data_path) / shard_bytes))
+        columns, ranges = csv_byte_ranges(data_path, shards)
+    if id_column and id_column not in columns:
+        raise ValueError(f"ID column '{id_column}' not found in input data")
+    if "G3" in columns:
+        print("⚠️  Target column 'G3' removed from input data")
+
+    count, total = 0, 0.0
+    pred_min, pred_max = np.inf, -np.inf
+    preview, preview_ids = [], []
+    with _open_output(output_dir, output_format) as writer:
+        results = _scored_shards(model_path, data_path, ranges, columns, workers,
+                                 chunksize, output_format, id_column)
+        for shard in profiling.timed(results, "score_shards"):
+            if shard["payload"] is None:
+                continue
+            with profiling.span("write_output"):
+                if output_format in TEXT_FORMATS:
+                    writer.write_encoded(shard["payload"], shard["rows"], shard["columns"])
+                else:
+                    writer.write(shard["payload"])
+            count += shard["rows"]
+            total += shard["sum"]
+            pred_min, pred_max = min(pred_min, shard["min"]), max(pred_max, shard["max"])
+            if len(preview) < 10:
+                preview_ids.extend(shard["preview_ids"][:10 - len(preview)])
+                preview.extend(shard["preview"][:10 - len(preview)])
+        if count == 0:
+            raise ValueError(f"No rows to predict in: {data_path}")  # no output file is left behind
+    elapsed = time.perf_counter() - start_time
 
-    results_df.to_csv(output_file, index=False)
-    print(f"\n✅ Predictions saved to: {output_file}")
+    print_summary(
+        model_path, data_path,
+        count=count,
+        pred_min=pred_min,
+        pred_max=pred_max,
+        pred_mean=total / count,
+        preview=preview,
+        preview_ids=preview_ids if id_column else None
+    )
+    print(f"\n⚡ Scored {count:,} rows in {elapsed:.2f}s with {workers} worker(s) "
+          f"across {len(ranges)} shards: {count / elapsed:,.0f} rows/sec")
+    print(_saved_message(writer))
+    return writer.path or STDOUT
 
 
 # -------------------------------------------------------------------------
@@ -93,12 +556,32 @@ def run_prediction(model_path: str, data_path: str, output_dir: str = "results/p
 # Allows running predictions from the command line:
 # Example:
 #   $ python -m src.predict --model results/models/random_forest_math.pkl --data data/new_data_math.csv
+#   $ python src/predict.py --model ... --data ... --format ndjson --out - | jq .prediction
+#   $ python src/predict.py --model ... --data data/big_export.csv --workers 8
 # -------------------------------------------------------------------------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run predictions using a trained model")
-    parser.add_argument("--model", required=True, help="Path to trained model (.pkl)")
+    parser.add_argument("--model", required=True, help="Path to trained model (.pkl, compiled .npz or .mmap)")
     parser.add_argument("--data", required=True, help="Path to CSV file with new data")
-    parser.add_argument("--out", default="results/predictions", help="Directory to save predictions")
+    parser.add_argument("--out", default="results/predictions",
+                        help="Directory to save predictions, or - to write them to stdout")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="Output format: csv, ndjson, parquet or arrow (parquet/arrow need pyarrow)")
+    parser.add_argument("--id-column", default=None,
+                        help="Input column copied to the output to join results without relying on row order")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the input in chunks of N rows (keeps memory flat on large files)"
+    )
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Score byte-range shards of the input in N processes (model loaded once per worker)")
+    add_resource_arguments(parser)
+    profiling.add_profiling_arguments(parser)
 
     args = parser.parse_args()
-    run_prediction(args.model, args.data, args.out)
+    configure_from_args(args)
+    profiling.configure_from_args(args)
+    run_prediction(args.model, args.data, args.out, chunksize=args.chunksize,
+                   output_format=args.format, id_column=args.id_column, workers=args.workers)
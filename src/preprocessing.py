@@ -1,10 +1,61 @@
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+import argparse
+import inspect
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, FunctionTransformer
+from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# ---------------------------------------------------------------------
+# Default output format per downstream estimator.
+# - random_forest: dense float32 — sklearn trees convert their input to
+#   float32 anyway, so producing float32 directly avoids a full copy of the
+#   feature matrix in fit and predict (and halves its memory).
+# - linear_regression: dense float64 — least squares needs full precision.
+# Sparse CSR output pays off when one-hot encoding high-cardinality columns
+# (e.g. school codes); with the UCI columns dense matrices are smaller.
+# ---------------------------------------------------------------------
+PREPROCESSOR_DEFAULTS = {
+    "random_forest": {"sparse": False, "dtype": np.float32},
+    "linear_regression": {"sparse": False, "dtype": np.float64},
+    "sgd": {"sparse": False, "dtype": np.float64, "incremental": True},
+}
+
+
+def preprocessor_options(model_name):
+    """
+    Return the default build_preprocessor options for an estimator.
+
+    Args:
+        model_name (str): e.g. "random_forest" or "linear_regression".
+
+    Returns:
+        dict: {"sparse": bool, "dtype": numpy dtype} (+ "incremental": True for
+        models updated with partial_fit); dense float64 for estimators
+        without a specific default.
+    """
+    return dict(PREPROCESSOR_DEFAULTS.get(model_name, {"sparse": False, "dtype": np.float64}))
+
+
+def _one_hot_encoder(sparse, dtype):
+    # `sparse_output` replaced `sparse` in scikit-learn 1.2
+    params = inspect.signature(OneHotEncoder).parameters
+    sparse_arg = "sparse_output" if "sparse_output" in params else "sparse"
+    return OneHotEncoder(drop="first", handle_unknown="ignore", dtype=dtype, **{sparse_arg: sparse})
 
 
-def build_preprocessor(numeric_cols, categorical_cols):
+def build_preprocessor(numeric_cols, categorical_cols, sparse=False, dtype=np.float64,
+                       incremental=False):
     """
-    Construct a preprocessing pipeline using ColumnTransformer.
+    Construct a preprocessing pipeline using ColumnTransformer (or IncrementalPreprocessor).
 
     Purpose:
         - Ensures consistent preprocessing of numeric and categorical data 
@@ -17,10 +68,20 @@ def build_preprocessor(numeric_cols, categorical_cols):
               which prevents large-scale features (e.g., absences) from dominating.
         categorical_cols (list of str): Names of categorical columns to encode.
             → OneHotEncoder converts categories into binary vectors for ML models.
+        sparse (bool, optional): Return a scipy CSR matrix instead of a dense
+            array (default=False). Worth it for high-cardinality categoricals.
+        dtype (numpy dtype, optional): Output dtype, np.float64 (default) or
+            np.float32. Numeric columns are scaled in float64 and then cast,
+            so float32 output equals the float64 output rounded once.
+            See preprocessor_options() for per-estimator defaults.
+        incremental (bool, optional): Return an IncrementalPreprocessor
+            (supports partial_fit, fixed output width) instead of a
+            ColumnTransformer. Always dense.
 
     Returns:
-        sklearn.compose.ColumnTransformer:
-            A transformer that applies:
+        sklearn.compose.ColumnTransformer or IncrementalPreprocessor:
+            A ColumnTransformer (an IncrementalPreprocessor with
+            incremental=True) that applies:
               - StandardScaler to numeric features
               - OneHotEncoder to categorical features
                 (drop="first" avoids multicollinearity / dummy variable trap,
@@ -40,14 +101,171 @@ def build_preprocessor(numeric_cols, categorical_cols):
     # - "num": applies StandardScaler to numeric columns
     # - "cat": applies OneHotEncoder to categorical columns
     # -----------------------------------------------------------------
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got: {dtype}")
+    if incremental:
+        return IncrementalPreprocessor(numeric_cols, categorical_cols, dtype=dtype.name)
+
+    # Scale in float64, then cast (only needed for non-default dtypes).
+    # The cast is plain np.asarray, so saved pipelines only reference
+    # sklearn/numpy and load without this repo on sys.path.
+    numeric = StandardScaler()
+    if dtype != np.float64:
+        numeric = Pipeline(steps=[
+            ("scaler", StandardScaler()),
+            ("cast", FunctionTransformer(np.asarray, kw_args={"dtype": dtype.name})),
+        ])
+
     return ColumnTransformer(
         transformers=[
             # Apply scaling to numeric columns
-            ("num", StandardScaler(), numeric_cols),
+            ("num", numeric, numeric_cols),
             
             # Apply encoding to categorical columns
             # - drop="first": prevents redundant categories
             # - handle_unknown="ignore": safe for unseen categories at inference
-            ("cat", OneHotEncoder(drop="first", handle_unknown="ignore"), categorical_cols),
-        ]
+            ("cat", _one_hot_encoder(sparse, dtype), categorical_cols),
+        ],
+        # 1.0 → always CSR when sparse=True; 0 → always dense
+        sparse_threshold=1.0 if sparse else 0.0
     )
+
+
+# ---------------------------------------------------------------------
+# Incremental preprocessing for models updated batch by batch (partial_fit).
+#
+# - Numeric columns: StandardScaler.partial_fit keeps running means and
+#   variances, so the scaling follows all rows seen so far.
+# - Categorical columns: each column owns a fixed number of one-hot slots
+#   (CATEGORY_SLOTS). A category takes the next free slot the first time it
+#   is seen and keeps it; the output width never changes, so the weights of
+#   an already-trained linear model stay aligned with the columns. Values
+#   arriving after all slots are taken are encoded as all zeros (like
+#   OneHotEncoder's handle_unknown="ignore") and logged.
+# ---------------------------------------------------------------------
+CATEGORY_SLOTS = 8
+
+
+class IncrementalPreprocessor(TransformerMixin, BaseEstimator):
+    """Scaler + one-hot encoder whose statistics and vocabulary grow with partial_fit."""
+
+    def __init__(self, numeric_cols, categorical_cols, category_slots=CATEGORY_SLOTS, dtype="float64"):
+        self.numeric_cols = numeric_cols
+        self.categorical_cols = categorical_cols
+        self.category_slots = category_slots
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        """Start from scratch and learn from X."""
+        for attr in ("scaler_", "categories_", "overflow_"):
+            if hasattr(self, attr):
+                delattr(self, attr)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y=None):
+        """Update the scaling statistics and category vocabulary with a new batch."""
+        if not hasattr(self, "scaler_"):
+            self.scaler_ = StandardScaler()
+            self.categories_ = {col: [] for col in self.categorical_cols}
+            self.overflow_ = {col: 0 for col in self.categorical_cols}
+
+        if self.numeric_cols:
+            self.scaler_.partial_fit(X[list(self.numeric_cols)].to_numpy(dtype=np.float64))
+        for col in self.categorical_cols:
+            known = self.categories_[col]
+            for value in pd.unique(X[col].dropna()):
+                if value in known:
+                    continue
+                if len(known) < self.category_slots:
+                    known.append(value)
+                else:
+                    self.overflow_[col] += 1
+                    logger.warning(
+                        f"Column '{col}': no free category slot for '{value}' "
+                        f"({self.category_slots} slots); encoded as all zeros"
+                    )
+
+        self.n_features_in_ = len(self.numeric_cols) + len(self.categorical_cols)
+        self.n_features_out_ = len(self.numeric_cols) + self.category_slots * len(self.categorical_cols)
+        return self
+
+    def transform(self, X):
+        n = len(X)
+        slots = self.category_slots
+        out = np.zeros((n, self.n_features_out_), dtype=self.dtype)
+        if self.numeric_cols:
+            out[:, :len(self.numeric_cols)] = self.scaler_.transform(
+                X[list(self.numeric_cols)].to_numpy(dtype=np.float64))
+
+        offset = len(self.numeric_cols)
+        rows = np.arange(n)
+        for j, col in enumerate(self.categorical_cols):
+            codes = pd.Categorical(X[col], categories=self.categories_[col]).codes.astype(np.int64)
+            seen = codes >= 0
+            out[rows[seen], offset + j * slots + codes[seen]] = 1.0
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        names = [f"num__{col}" for col in self.numeric_cols]
+        for col in self.categorical_cols:
+            known = self.categories_[col]
+            names += [f"cat__{col}_{known[i]}" if i < len(known) else f"cat__{col}_slot{i}"
+                      for i in range(self.category_slots)]
+        return np.asarray(names, dtype=object)
+
+
+# -------------------------------------------------------------------------
+# Benchmark: memory and throughput of the output formats across data sizes.
+# Example:
+#   $ python src/preprocessing.py --rows 10000 100000 --extra-categories 500
+# -------------------------------------------------------------------------
+def _matrix_bytes(M):
+    if hasattr(M, "indptr"):
+        return M.data.nbytes + M.indices.nbytes + M.indptr.nbytes
+    return M.nbytes
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import pandas as pd
+    from data_loader import load_dataset
+
+    parser = argparse.ArgumentParser(description="Compare preprocessing output formats")
+    parser.add_argument("--dataset", choices=["math", "portuguese"], default="math")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument(
+        "--extra-categories", type=int, default=0,
+        help="Add a synthetic 'school_code' column with this many distinct values"
+    )
+    args = parser.parse_args()
+
+    base = load_dataset(args.dataset).drop(columns=["G3"])
+    configs = [
+        ("dense float64", False, np.float64),
+        ("dense float32", False, np.float32),
+        ("sparse float64", True, np.float64),
+        ("sparse float32", True, np.float32),
+    ]
+
+    print(f"{'rows':>9} {'format':<15} {'MB':>8} {'fit_transform s':>16} {'transform rows/s':>17}")
+    for n in args.rows:
+        df = pd.concat([base] * (-(-n // len(base))), ignore_index=True).head(n)
+        if args.extra_categories:
+            codes = np.random.default_rng(0).integers(0, args.extra_categories, size=n)
+            df["school_code"] = pd.Categorical([f"S{c:05d}" for c in codes])
+
+        numeric_cols = df.select_dtypes(include="number").columns.tolist()
+        categorical_cols = df.select_dtypes(exclude="number").columns.tolist()
+
+        for label, sparse, dtype in configs:
+            pre = build_preprocessor(numeric_cols, categorical_cols, sparse=sparse, dtype=dtype)
+            start = time.perf_counter()
+            M = pre.fit_transform(df)
+            fit_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            pre.transform(df)
+            rows_per_s = n / (time.perf_counter() - start)
+
+            print(f"{n:>9} {label:<15} {_matrix_bytes(M) / 1e6:>8.2f} {fit_s:>16.3f} {rows_per_s:>17,.0f}")
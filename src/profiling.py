@@ -0,0 +1,306 @@
+import contextvars
+import functools
+import io
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ---------------------------------------------------------------------
+# Lightweight stage instrumentation.
+#
+#   with profiling.trace("train_math", dataset="math") as t:
+#       with profiling.span("load_data"):
+#           ...
+#       with profiling.span("train_model"):
+#           ...
+#   t.save()   → results/metrics/spans/train_math_<timestamp>.json
+#
+# Every span records:
+#   wall_s       elapsed wall-clock time
+#   cpu_s        CPU time of the whole process (all threads) during the span
+#   peak_rss_mb  highest resident memory reached during the span
+#
+# On Linux the kernel's high-water mark (VmHWM) is reset at the start of
+# each span (/proc/self/clear_refs), so the peak belongs to that span;
+# nested spans pass their peak up to the enclosing span. Elsewhere the peak
+# is the process-wide maximum so far (ru_maxrss).
+#
+# Spans with the same path (e.g. "predict" once per chunk) are aggregated:
+# calls, total times and the highest peak. Outside a trace, span() only
+# costs a context-variable lookup, so library functions can be
+# instrumented unconditionally.
+#
+# One stage can additionally be run under cProfile or tracemalloc
+# (configure(stage="train_model", mode="cprofile"), or --profile-stage on
+# the command line); the report is printed and saved in results/profiles/.
+# ---------------------------------------------------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SPANS_DIR = os.path.join(PROJECT_ROOT, "results", "metrics", "spans")
+PROFILES_DIR = os.path.join(PROJECT_ROOT, "results", "profiles")
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+TOP_ENTRIES = 15
+
+_ACTIVE = contextvars.ContextVar("profiling_trace", default=None)
+_CAN_RESET_PEAK = sys.platform.startswith("linux") and os.access("/proc/self/clear_refs", os.W_OK)
+_PROFILE_COUNTS = {}
+
+
+def _peak_rss_mb():
+    """Resident-memory high-water mark of this process in MB."""
+    if _CAN_RESET_PEAK:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak():
+    if _CAN_RESET_PEAK:
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+
+class Trace:
+    """Aggregated spans of one run (see trace())."""
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = datetime.now()
+        self.stages = {}        # path -> {"calls", "wall_s", "cpu_s", "peak_rss_mb"}
+        self._stack = []        # open spans: [path, running peak]
+
+    def _record(self, path, wall, cpu, peak):
+        stage = self.stages.setdefault(path, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0})
+        stage["calls"] += 1
+        stage["wall_s"] += wall
+        stage["cpu_s"] += cpu
+        stage["peak_rss_mb"] = max(stage["peak_rss_mb"], peak)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            **self.attrs,
+            "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            "pid": os.getpid(),
+            "stages": [
+                {"stage": path, "calls": s["calls"], "wall_s": round(s["wall_s"], 4),
+                 "cpu_s": round(s["cpu_s"], 4), "peak_rss_mb": round(s["peak_rss_mb"], 1)}
+                for path, s in self.stages.items()
+            ],
+        }
+
+    def save(self, directory=None):
+        """Write the trace as JSON (<directory>/<name>_<timestamp>.json); returns the path."""
+        directory = directory or SPANS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}_{self.started.strftime('%Y%m%d_%H%M%S')}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    def summary(self):
+        """Leaf stages on one line: 'load_data 0.02s | random_forest/train_model 0.81s'."""
+        leaves = [(path, s) for path, s in self.stages.items()
+                  if not any(other.startswith(path + "/") for other in self.stages)]
+        return " | ".join(f"{path} {s['wall_s']:.2f}s" for path, s in leaves)
+
+
+@contextmanager
+def trace(name, **attrs):
+    """
+    Collect the spans opened inside the block (in this thread/context).
+
+    Args:
+        name (str): Identifier used for the JSON file, e.g. "train_math".
+        **attrs: Extra fields stored in the JSON report (dataset, model, ...).
+
+    Yields:
+        Trace
+    """
+    current = Trace(name, **attrs)
+    token = _ACTIVE.set(current)
+    try:
+        yield current
+    finally:
+        _ACTIVE.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time one stage of the active trace (no-op outside a trace)."""
+    current = _ACTIVE.get()
+    if current is None:
+        yield
+        return
+
+    parent = current._stack[-1] if current._stack else None
+    path = f"{parent[0]}/{name}" if parent else name
+    if parent is not None:
+        parent[1] = max(parent[1], _peak_rss_mb())
+    frame = [path, 0.0]
+    current._stack.append(frame)
+
+    _reset_peak()
+    deep = _deep_profiler(name)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        with deep:
+            yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        current._stack.pop()
+        peak = max(frame[1], _peak_rss_mb())
+        if parent is not None:
+            parent[1] = max(parent[1], peak)
+        current._record(path, wall, cpu, peak)
+
+
+def profiled(name=None):
+    """
+    Decorator form of span().
+
+    Example:
+        >>> @profiled("load_model")
+        ... def load_model(path): ...
+    """
+    def decorator(fn):
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed(iterable, name):
+    """Yield from an iterable, counting the time spent producing each item as a span."""
+    iterator = iter(iterable)
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+# ---------------------------------------------------------------------
+# Deep profiling of one chosen stage (cProfile or tracemalloc).
+# Stored in the environment so worker processes inherit it.
+# ---------------------------------------------------------------------
+def configure(stage=None, mode="cprofile"):
+    """
+    Run every span named `stage` under cProfile or tracemalloc.
+
+    Args:
+        stage (str or None): Stage name, e.g. "train_model" (None = off).
+        mode (str): "cprofile" (function timings) or "tracemalloc" (allocations).
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'. Expected one of: {list(PROFILE_MODES)}")
+    if stage:
+        os.environ["SGP_PROFILE_STAGE"] = stage
+        os.environ["SGP_PROFILE_MODE"] = mode
+    else:
+        os.environ.pop("SGP_PROFILE_STAGE", None)
+
+
+def _deep_profiler(name):
+    if os.environ.get("SGP_PROFILE_STAGE") != name:
+        return _nothing()
+    if os.environ.get("SGP_PROFILE_MODE", "cprofile") == "tracemalloc":
+        return _tracemalloc_stage(name)
+    return _cprofile_stage(name)
+
+
+@contextmanager
+def _nothing():
+    yield
+
+
+def _profile_path(name, suffix):
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    trace_name = _ACTIVE.get().name if _ACTIVE.get() is not None else "run"
+    n = _PROFILE_COUNTS[name] = _PROFILE_COUNTS.get(name, 0) + 1
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(PROFILES_DIR, f"{trace_name}_{name}_{stamp}_{os.getpid()}_{n}{suffix}")
+
+
+@contextmanager
+def _cprofile_stage(name):
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _profile_path(name, ".prof")
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+        print(f"\n=== cProfile: {name} (top {TOP_ENTRIES} by cumulative time) ===")
+        print(report.getvalue().strip())
+        print(f"📄 Full profile saved to: {path} (open with python -m pstats or snakeviz)")
+
+
+@contextmanager
+def _tracemalloc_stage(name):
+    import tracemalloc
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        lines = snapshot.statistics("lineno")[:TOP_ENTRIES]
+        path = _profile_path(name, ".txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"peak traced: {peak / 1e6:.1f} MB, still allocated: {current / 1e6:.1f} MB\n")
+            for stat in lines:
+                f.write(f"{stat}\n")
+        print(f"\n=== tracemalloc: {name} (peak {peak / 1e6:.1f} MB, "
+              f"still allocated {current / 1e6:.1f} MB) ===")
+        for stat in lines:
+            print(f"  {stat}")
+        print(f"📄 Report saved to: {path}")
+
+
+def add_profiling_arguments(parser):
+    """Add the shared --profile-stage / --profile-mode flags."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile-stage", default=None,
+                       help="Run this stage under a profiler (e.g. train_model, predict, load_model)")
+    group.add_argument("--profile-mode", choices=PROFILE_MODES, default="cprofile",
+                       help="cprofile (function timings) or tracemalloc (allocations)")
+    return parser
+
+
+def configure_from_args(args):
+    """Apply the flags added by add_profiling_arguments()."""
+    if getattr(args, "profile_stage", None):
+        configure(args.profile_stage, args.profile_mode)
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, ExitStack
+
+# ---------------------------------------------------------------------
+# CPU resource configuration for training and prediction.
+#
+# Settings (highest priority first):
+#   1. CLI flags            → configure(n_jobs=..., ...)
+#   2. Environment          → SGP_N_JOBS, SGP_JOBLIB_BACKEND, SGP_BLAS_THREADS, SGP_MAX_CORES
+#   3. Config file (JSON)   → $SGP_RESOURCE_CONFIG or config/resources.json
+#   4. Defaults             → DEFAULTS below
+#
+#   n_jobs          threads per estimator (RandomForest fit/predict); -1 = all available
+#   joblib_backend  backend for joblib-parallel work (CV folds, tuning): loky, threading, ...
+#   blas_threads    cap for BLAS/OpenMP thread pools (None = library default)
+#   max_cores       total cores the project may use across all levels of parallelism
+#
+# When an outer level already runs in parallel (run.py --workers, CV folds,
+# tuning candidates), the inner thread counts are divided so that
+# outer_workers × inner_threads never exceeds max_cores.
+# ---------------------------------------------------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CONFIG_FILE = os.path.join(PROJECT_ROOT, "config", "resources.json")
+
+DEFAULTS = {
+    "n_jobs": 1,              # single-thread by default (keeps grading machines stable)
+    "joblib_backend": "loky",
+    "blas_threads": None,
+    "max_cores": None,        # None → os.cpu_count()
+}
+
+ENV_VARS = {
+    "n_jobs": "SGP_N_JOBS",
+    "joblib_backend": "SGP_JOBLIB_BACKEND",
+    "blas_threads": "SGP_BLAS_THREADS",
+    "max_cores": "SGP_MAX_CORES",
+}
+
+# CLI overrides set through configure(); outer parallelism set by schedulers
+_OVERRIDES = {}
+_OUTER_WORKERS = 1
+
+
+def configure(**overrides):
+    """
+    Set resource options from the command line (None values are ignored).
+
+    Example:
+        >>> configure(n_jobs=8, blas_threads=1)
+    """
+    unknown = set(overrides) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown resource options: {sorted(unknown)}")
+    _OVERRIDES.update({k: v for k, v in overrides.items() if v is not None})
+
+
+def current_overrides():
+    """CLI overrides set with configure() (to hand over to worker processes)."""
+    return dict(_OVERRIDES)
+
+
+def set_outer_workers(n):
+    """Record how many processes run in parallel around this one (e.g. run.py --workers)."""
+    global _OUTER_WORKERS
+    _OUTER_WORKERS = max(1, int(n))
+
+
+def _parse(key, value):
+    if value is None or value == "":
+        return None
+    if key == "joblib_backend":
+        return str(value)
+    return int(value)
+
+
+def get_config():
+    """
+    Return the merged resource configuration.
+
+    Returns:
+        dict: {"n_jobs", "joblib_backend", "blas_threads", "max_cores", "outer_workers"}
+    """
+    config = dict(DEFAULTS)
+
+    config_file = os.environ.get("SGP_RESOURCE_CONFIG", DEFAULT_CONFIG_FILE)
+    if os.path.exists(config_file):
+        with open(config_file, "r", encoding="utf-8") as f:
+            file_config = json.load(f)
+        config.update({k: _parse(k, v) for k, v in file_config.items() if k in DEFAULTS})
+
+    for key, env_var in ENV_VARS.items():
+        if os.environ.get(env_var):
+            config[key] = _parse(key, os.environ[env_var])
+
+    config.update(_OVERRIDES)
+    config["max_cores"] = config["max_cores"] or os.cpu_count() or 1
+    config["outer_workers"] = _OUTER_WORKERS
+    return config
+
+
+def inner_n_jobs(outer_workers=None, config=None):
+    """
+    Threads each estimator may use, given the outer parallelism.
+
+    Args:
+        outer_workers (int, optional): Parallel workers around the estimator
+            (default: the value recorded with set_outer_workers).
+        config (dict, optional): Output of get_config().
+
+    Returns:
+        int: Requested n_jobs (-1 → all cores) capped at max_cores // outer_workers.
+    """
+    config = config or get_config()
+    outer = max(1, outer_workers or config["outer_workers"])
+    share = max(1, config["max_cores"] // outer)
+    n_jobs = config["n_jobs"]
+    if n_jobs is None or n_jobs < 0:
+        return share
+    return max(1, min(n_jobs, share))
+
+
+def blas_thread_limit(outer_workers=None, config=None):
+    """BLAS/OpenMP thread cap (None = leave the library default when nothing needs capping)."""
+    config = config or get_config()
+    outer = max(1, outer_workers or config["outer_workers"])
+    share = max(1, config["max_cores"] // outer)
+    if config["blas_threads"] is None:
+        return share if outer > 1 else None
+    return max(1, min(config["blas_threads"], share))
+
+
+def apply_n_jobs(estimator, outer_workers=None):
+    """
+    Set n_jobs on an estimator (or the "model" step of a pipeline) if it has one.
+
+    Returns:
+        The same estimator, for chaining.
+    """
+    model = getattr(estimator, "named_steps", {}).get("model", estimator)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=inner_n_jobs(outer_workers))
+    return estimator
+
+
+@contextmanager
+def resource_limits(outer_workers=None):
+    """
+    Context manager applying the joblib backend and BLAS thread cap.
+
+    Example:
+        >>> with resource_limits():
+        ...     pipeline.fit(X, y)
+    """
+    config = get_config()
+    with ExitStack() as stack:
+        import joblib
+        if hasattr(joblib, "parallel_config"):
+            stack.enter_context(joblib.parallel_config(backend=config["joblib_backend"]))
+        else:  # joblib < 1.3
+            stack.enter_context(joblib.parallel_backend(config["joblib_backend"]))
+
+        limit = blas_thread_limit(outer_workers, config)
+        if limit is not None:
+            try:
+                from threadpoolctl import threadpool_limits
+                stack.enter_context(threadpool_limits(limits=limit))
+            except ImportError:
+                pass
+        yield config
+
+
+def add_resource_arguments(parser):
+    """Add the shared --n-jobs / --joblib-backend / --blas-threads / --max-cores flags."""
+    group = parser.add_argument_group("resources")
+    group.add_argument("--n-jobs", type=int, default=None,
+                       help="Threads per estimator (-1 = all available cores)")
+    group.add_argument("--joblib-backend", default=None, help="joblib backend (loky, threading, ...)")
+    group.add_argument("--blas-threads", type=int, default=None, help="Cap for BLAS/OpenMP threads")
+    group.add_argument("--max-cores", type=int, default=None,
+                       help="Total cores to use across all levels of parallelism")
+    return parser
+
+
+def configure_from_args(args):
+    """Apply the flags added by add_resource_arguments()."""
+    configure(
+        n_jobs=getattr(args, "n_jobs", None),
+        joblib_backend=getattr(args, "joblib_backend", None),
+        blas_threads=getattr(args, "blas_threads", None),
+        max_cores=getattr(args, "max_cores", None),
+    )
+
+
+# -------------------------------------------------------------------------
+# Scaling benchmark: Random Forest fit and predict time from 1 to N cores.
+# Example:
+#   $ python src/resources.py --rows 20000 --trees 200
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import numpy as np
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+    from data_loader import load_dataset
+    from model import build_regressor
+    from preprocessing import build_preprocessor, preprocessor_options
+
+    parser = argparse.ArgumentParser(description="Random Forest scaling benchmark")
+    parser.add_argument("--dataset", choices=["math", "portuguese"], default="portuguese")
+    parser.add_argument("--rows", type=int, default=20_000, help="Training rows (repeated from the dataset)")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--cores", type=int, nargs="+", default=None,
+                        help="Core counts to try (default: 1, 2, 4, ... up to all cores)")
+    args = parser.parse_args()
+
+    df = load_dataset(args.dataset)
+    df = pd.concat([df] * (-(-args.rows // len(df))), ignore_index=True).head(args.rows)
+    X, y = df.drop(columns=["G3"]), df["G3"]
+    numeric_cols = X.select_dtypes(include="number").columns.tolist()
+    categorical_cols = X.select_dtypes(exclude="number").columns.tolist()
+
+    max_cores = os.cpu_count() or 1
+    cores = args.cores or sorted({2 ** i for i in range(int(np.log2(max_cores)) + 1)} | {max_cores})
+
+    print(f"{'cores':>5} {'fit s':>8} {'fit speedup':>12} {'predict s':>10} {'predict speedup':>16}")
+    base = None
+    for n in cores:
+        pipeline = Pipeline(steps=[
+            ("preprocessor", build_preprocessor(numeric_cols, categorical_cols,
+                                                **preprocessor_options("random_forest"))),
+            ("model", build_regressor("random_forest", {"n_estimators": args.trees, "n_jobs": n})),
+        ])
+        start = time.perf_counter()
+        pipeline.fit(X, y)
+        fit_s = time.perf_counter() - start
+        start = time.perf_counter()
+        pipeline.predict(X)
+        predict_s = time.perf_counter() - start
+
+        base = base or (fit_s, predict_s)
+        print(f"{n:>5} {fit_s:>8.2f} {base[0] / fit_s:>12.2f} {predict_s:>10.2f} {base[1] / predict_s:>16.2f}")
@@ -1,5 +1,7 @@
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # ---------------------------------------------------------------------
 # Ensure that Python can find the `src/` directory where all modules live.
@@ -9,9 +11,14 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 # Import key project modules
-from main import run_pipeline                # Main ML pipeline (preprocess + train + evaluate)
-from utils import get_logger                 # Logger for consistent log output
-from data_loader import load_data            # Loads Math and Portuguese datasets
+from main import run_pipeline, run_models, load_fingerprint, RESULTS_DIR  # Main ML pipeline (preprocess + train + evaluate)
+from utils import get_logger, redirect_file_logs, merge_log_files, set_log_format  # Logging helpers
+import resources                             # n_jobs / joblib backend / BLAS thread caps
+import profiling                             # Per-stage timings + optional cProfile/tracemalloc
+import metrics_store                         # Append-only metrics history (latest, trends)
+import stage_cache                           # Skip stages whose inputs are unchanged
+from data_loader import load_dataset         # Loads the Math or Portuguese dataset
+from model import publish_latest             # Atomic 'latest_model.pkl' (hardlink + rename)
 from eda import (                            # EDA utilities: plots + summaries
     plot_distributions,
     plot_correlation_heatmap,
@@ -22,49 +29,218 @@ from eda import (                            # EDA utilities: plots + summaries
 logger = get_logger(__name__)
 
 
-def main():
+# Datasets and models to loop over
+DATASETS = ["math", "portuguese"]
+MODELS = ["random_forest", "linear_regression"]
+LOGS_DIR = os.path.join(RESULTS_DIR, "logs")
+
+
+def _job_log_file(name: str) -> str:
+    """Isolated log file for one parallel job (merged into project.log later)."""
+    return os.path.join(LOGS_DIR, f"project.{name}.log")
+
+
+def _init_worker(overrides: dict, workers: int):
     """
-    Main entry point for running the full student grade prediction pipeline.
-    
-    Responsibilities:
-      1. Load both datasets (Math & Portuguese).
-      2. Run exploratory data analysis (EDA) → saves plots + prints summaries.
-      3. Train + evaluate multiple models (Linear Regression, Random Forest).
-      4. Collect and print evaluation metrics for comparison.
+    Worker initializer: apply the parent's resource flags and record the
+    pool size, so estimator threads are capped at max_cores // workers.
     """
-    print("🎓 Student Performance Prediction Pipeline")
-    print("=" * 50)
+    resources.configure(**overrides)
+    resources.set_outer_workers(workers)
+
 
-    # Define the datasets and models to loop over
-    datasets = ["math", "portuguese"]
-    models = ["random_forest", "linear_regression"]
+def run_plots(dataset: str, df=None, force: bool = False):
+    """
+    Plots stage: generate the EDA figures of one dataset.
+
+    Skipped entirely (no loading, no hashing of the data) when the dataset CSV
+    and the plotting code are unchanged since the figures were drawn and the
+    figures are still on disk (see stage_cache.py). With force=True every
+    figure is redrawn.
+
+    Args:
+        dataset (str): "math" or "portuguese".
+        df (pd.DataFrame, optional): Already loaded dataset.
+        force (bool): Ignore both the stage cache and the per-figure cache.
+    """
+    load = load_fingerprint(dataset)
+    stages = {"plots": stage_cache.fingerprint("plots", load)} if load else None
+    key = f"plots_{dataset}"
+    if stages and not force and stage_cache.lookup(key, stages):
+        logger.info(f"⏭ EDA figures for {dataset} unchanged, skipping plots")
+        return
 
+    if df is None:
+        df = load_dataset(dataset)
+    if df is None:
+        return
+    paths = plot_distributions(df, dataset_name=dataset, use_cache=not force)
+    paths.append(plot_correlation_heatmap(df, dataset_name=dataset, use_cache=not force))
+    if stages:
+        stage_cache.store(key, stages, paths)
+
+
+def _eda_job(dataset: str, force: bool = False):
+    """
+    Worker: generate EDA plots for one dataset.
+    Logs go to an isolated per-job file.
+    """
+    redirect_file_logs(_job_log_file(f"eda_{dataset}"))
+    run_plots(dataset, force=force)
+
+
+def _pipeline_job(dataset: str, model: str, force: bool = False):
+    """
+    Worker: train + evaluate + save one dataset-model combination.
+
+    - Logs go to an isolated per-job file.
+    - Metrics go to the append-only metrics store (safe with concurrent writers).
+    - 'latest_model.pkl' is not touched here; the parent updates it once.
+    """
+    redirect_file_logs(_job_log_file(f"{dataset}_{model}"))
+    return run_pipeline(dataset, model, save_latest=False, force=force)
+
+
+def run_parallel(workers: int, force: bool = False):
+    """
+    Run EDA and every dataset-model combination in a process pool.
+
+    Args:
+        workers (int): Number of worker processes.
+        force (bool): Rebuild every stage, even unchanged ones.
+
+    Returns:
+        dict: Metrics per "<dataset>_<model>" key, in the same order and
+              shape as the sequential run.
+    """
+    # Print summaries in the parent so console output is not interleaved
+    for dataset in DATASETS:
+        df = load_dataset(dataset)
+        if df is not None:
+            print(f"\n=== {dataset.capitalize()} Dataset Summary ===")
+            summarize_dataset(df)
+
+    jobs = [(dataset, model) for dataset in DATASETS for model in MODELS]
+    log_files = [_job_log_file(f"eda_{d}") for d in DATASETS]
+    log_files += [_job_log_file(f"{d}_{m}") for d, m in jobs]
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(resources.current_overrides(), workers)
+        ) as pool:
+            eda_futures = [pool.submit(_eda_job, dataset, force) for dataset in DATASETS]
+            futures = {f"{d}_{m}": pool.submit(_pipeline_job, d, m, force) for d, m in jobs}
+
+            for future in eda_futures:
+                future.result()
+            results = {key: future.result() for key, future in futures.items()}
+    finally:
+        # Merge worker logs into project.log in a deterministic (grid) order
+        merge_log_files(log_files)
+
+    # Sequential runs leave the last combination as 'latest_model.pkl';
+    # keep that behavior, but publish it once and atomically.
+    last_dataset, last_model = jobs[-1]
+    models_dir = os.path.join(RESULTS_DIR, "models")
+    latest_path = os.path.join(models_dir, "latest_model.pkl")
+    last_path = os.path.join(models_dir, f"{last_model}_{last_dataset}.pkl")
+    if results.get(f"{last_dataset}_{last_model}") and os.path.exists(last_path):
+        publish_latest(last_path, latest_path)
+        logger.info(f"[SAVE] Latest model updated at: {latest_path}")
+    else:
+        # Don't point latest_model.pkl at a missing or stale file
+        logger.warning(f"latest_model.pkl not updated: {last_model} on {last_dataset} has no saved model")
+
+    return results
+
+
+def run_sequential(force: bool = False):
+    """
+    Run EDA and every dataset-model combination one after another.
+
+    Args:
+        force (bool): Rebuild every stage, even unchanged ones.
+
+    Returns:
+        dict: Metrics per "<dataset>_<model>" key.
+    """
     # Dictionary to hold results for each dataset-model combination
     results = {}
 
-    for dataset in datasets:
+    for dataset in DATASETS:
         # -----------------------------------------------------------------
         # STEP 1: Load the appropriate dataset (math or portuguese)
         # -----------------------------------------------------------------
-        mat, por = load_data()
-        df = mat if dataset == "math" else por
+        df = load_dataset(dataset)
 
         if df is not None:
             # Print a dataset summary (shape, column types, missing values)
             print(f"\n=== {dataset.capitalize()} Dataset Summary ===")
             summarize_dataset(df)
 
-            # Generate and save EDA plots
-            plot_distributions(df, dataset_name=dataset)
-            plot_correlation_heatmap(df, dataset_name=dataset)
+            # Generate and save EDA plots (skipped if data and plots are unchanged)
+            run_plots(dataset, df, force=force)
 
         # -----------------------------------------------------------------
         # STEP 2: Train and evaluate models
         # For each dataset, run both Random Forest and Linear Regression
+        # on one shared set of preprocessed feature matrices
         # -----------------------------------------------------------------
-        for model in models:
+        dataset_results = run_models(dataset, MODELS, force=force) or {}
+        for model in MODELS:
             key = f"{dataset}_{model}"
-            results[key] = run_pipeline(dataset, model)
+            results[key] = dataset_results.get(model)
+
+    return results
+
+
+def print_metric_trends(results: dict):
+    """
+    Print how MAE and R² changed compared with the previous run of each
+    dataset-model combination (read from the metrics store).
+    """
+    print("\n=== Change vs. Previous Run ===")
+    for key, metrics in results.items():
+        if not metrics:
+            continue
+        mae = metrics_store.trend(key, "mae", last=2)
+        r2 = metrics_store.trend(key, "r2", last=2)
+        if len(mae["values"]) < 2:
+            print(f"  {key}: first recorded run")
+        else:
+            fmt = metrics_store.format_metric
+            print(f"  {key}: MAE {fmt(mae['previous'])} → {fmt(mae['latest'])} ({fmt(mae['change'], '+.3f')}), "
+                  f"R² {fmt(r2['previous'])} → {fmt(r2['latest'])} ({fmt(r2['change'], '+.3f')})")
+
+
+def main(workers: int = 1, force: bool = False):
+    """
+    Main entry point for running the full student grade prediction pipeline.
+    
+    Responsibilities:
+      1. Load both datasets (Math & Portuguese).
+      2. Run exploratory data analysis (EDA) → saves plots + prints summaries.
+      3. Train + evaluate multiple models (Linear Regression, Random Forest).
+      4. Collect and print evaluation metrics for comparison.
+
+    Args:
+        workers (int): Number of worker processes. 1 (default) runs everything
+            sequentially; N > 1 runs EDA and the dataset × model grid in a
+            process pool.
+        force (bool): Rebuild every stage. By default, models and figures
+            whose inputs (data, parameters, code) are unchanged since the last
+            run are reused (see stage_cache.py).
+    """
+    print("🎓 Student Performance Prediction Pipeline")
+    print("=" * 50)
+
+    if workers > 1:
+        logger.info(f"Running dataset × model grid with {workers} workers")
+        results = run_parallel(workers, force)
+    else:
+        results = run_sequential(force)
 
     # ---------------------------------------------------------------------
     # STEP 3: Print a consolidated summary of all model results
@@ -79,6 +255,8 @@ def main():
             else:
                 print(f"  {metric}: {value}")
 
+    print_metric_trends(results)
+
     # Log a completion message
     logger.info("🎉 All done! Check results/ folder for outputs.")  
 
@@ -88,4 +266,22 @@ def main():
 # Running `python run.py` will trigger the pipeline for all datasets/models.
 # -------------------------------------------------------------------------
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the full student grade prediction pipeline")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for EDA and the dataset × model grid (default: 1)"
+    )
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every stage (train, evaluate, save, plots) even if its inputs are unchanged")
+    parser.add_argument("--log-format", choices=["text", "json"], default=None,
+                        help="File log format: text (project.log) or JSON lines (project.jsonl)")
+    resources.add_resource_arguments(parser)
+    profiling.add_profiling_arguments(parser)
+    args = parser.parse_args()
+    if args.log_format:
+        set_log_format(args.log_format)
+    resources.configure_from_args(args)
+    profiling.configure_from_args(args)
+    main(workers=args.workers, force=args.force)
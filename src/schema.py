@@ -0,0 +1,87 @@
+import pandas as pd
+
+# ---------------------------------------------------------------------
+# Explicit column types for the UCI Student Performance datasets
+# (see data/student.txt for the attribute descriptions).
+#
+# Letting pandas infer dtypes gives an object column for every text field
+# and int64 for every number. The fields are either short category labels
+# or small integers, so compact dtypes cut resident memory several times:
+#   - category: binary yes/no and nominal text fields
+#   - int8:     ordinal scales and grades (0-20); signed so that grade
+#               differences (e.g. G2 - G1) cannot wrap around
+#   - uint8:    non-negative counts with a wider range (age, absences)
+# ---------------------------------------------------------------------
+
+# Bump whenever the dtypes below change (invalidates cached parsed datasets)
+SCHEMA_VERSION = 1
+
+BINARY_COLUMNS = [
+    "school", "sex", "address", "famsize", "Pstatus",
+    "schoolsup", "famsup", "paid", "activities", "nursery",
+    "higher", "internet", "romantic",
+]
+
+NOMINAL_COLUMNS = ["Mjob", "Fjob", "reason", "guardian"]
+
+ORDINAL_COLUMNS = [
+    "Medu", "Fedu", "traveltime", "studytime", "failures",
+    "famrel", "freetime", "goout", "Dalc", "Walc", "health",
+]
+
+COUNT_COLUMNS = ["age", "absences"]
+
+GRADE_COLUMNS = ["G1", "G2", "G3"]
+
+DTYPES = {
+    **{col: "category" for col in BINARY_COLUMNS + NOMINAL_COLUMNS},
+    **{col: "int8" for col in ORDINAL_COLUMNS + GRADE_COLUMNS},
+    **{col: "uint8" for col in COUNT_COLUMNS},
+}
+
+# Column order of the original CSV files
+COLUMNS = [
+    "school", "sex", "age", "address", "famsize", "Pstatus", "Medu", "Fedu",
+    "Mjob", "Fjob", "reason", "guardian", "traveltime", "studytime", "failures",
+    "schoolsup", "famsup", "paid", "activities", "nursery", "higher", "internet",
+    "romantic", "famrel", "freetime", "goout", "Dalc", "Walc", "health",
+    "absences", "G1", "G2", "G3",
+]
+
+
+def read_student_csv(path, **kwargs):
+    """
+    Read a student CSV with the explicit schema applied at parse time.
+
+    Args:
+        path (str or file-like): CSV file in the UCI format (";" separator).
+        **kwargs: Extra arguments for pandas.read_csv (e.g. chunksize).
+            A `dtype` argument overrides the schema for the given columns.
+
+    Returns:
+        pandas.DataFrame, or an iterator of DataFrames when chunksize is set.
+        Columns not covered by the schema keep pandas' inferred dtypes, and
+        schema columns missing from the file (e.g. 'G3' in new data) are ignored.
+
+    Example:
+        >>> df = read_student_csv("data/student-mat.csv")
+        >>> df["Medu"].dtype
+        dtype('int8')
+    """
+    dtype = {**DTYPES, **kwargs.pop("dtype", {})}
+    kwargs.setdefault("sep", ";")
+    return pd.read_csv(path, dtype=dtype, **kwargs)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the schema columns of an already-built DataFrame (e.g. rows that
+    arrived as JSON) to their compact dtypes.
+
+    Args:
+        df (pd.DataFrame): Input rows; columns not in the schema are left as is.
+
+    Returns:
+        pd.DataFrame: A new frame with the schema dtypes applied.
+    """
+    return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
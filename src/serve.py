@@ -0,0 +1,246 @@
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------------
+# Make sibling modules importable when run as `python src/serve.py`
+# or `python -m src.serve` from the project root.
+# ---------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from predict import prepare_features, predict_frame  # Shared prediction logic
+from schema import apply_schema, read_student_csv
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODELS_DIR = os.path.join(PROJECT_ROOT, "results", "models")
+
+
+class ModelRegistry:
+    """
+    Keep every fitted pipeline from a models directory loaded in memory.
+
+    Models are loaded once at startup and addressed by their file name without
+    the extension (e.g. "random_forest_math"); 'latest_model.pkl' is available
+    as "latest_model".
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
+        self.models = {}
+
+        if not os.path.isdir(models_dir):
+            raise FileNotFoundError(f"Models directory not found: {models_dir}")
+
+        for path in sorted(glob.glob(os.path.join(models_dir, "*.pkl"))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            start = time.perf_counter()
+            self.models[name] = joblib.load(path)
+            logger.info(f"[SERVE] Loaded model '{name}' in {time.perf_counter() - start:.2f}s")
+
+        if not self.models:
+            raise FileNotFoundError(f"No .pkl models found in: {models_dir}")
+
+    def get(self, name: str):
+        if name not in self.models:
+            raise KeyError(f"Unknown model '{name}'. Available: {sorted(self.models)}")
+        return self.models[name]
+
+
+class LatencyTracker:
+    """
+    Thread-safe rolling window of request latencies (milliseconds).
+    """
+
+    def __init__(self, window: int = 10_000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.total_rows = 0
+
+    def record(self, latency_ms: float, rows: int):
+        with self._lock:
+            self._samples.append(latency_ms)
+            self.total_requests += 1
+            self.total_rows += rows
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = np.array(self._samples, dtype=float)
+            requests, rows = self.total_requests, self.total_rows
+
+        if samples.size == 0:
+            p50 = p99 = mean = None
+        else:
+            p50, p99 = (round(float(v), 3) for v in np.percentile(samples, [50, 99]))
+            mean = round(float(samples.mean()), 3)
+
+        return {
+            "requests": requests,
+            "rows": rows,
+            "window": int(samples.size),
+            "p50_ms": p50,
+            "p99_ms": p99,
+            "mean_ms": mean,
+        }
+
+
+def parse_rows(body: bytes, content_type: str):
+    """
+    Parse a request body into (DataFrame, model_name_from_body).
+
+    Accepted bodies:
+        - JSON list of row objects: [{"school": "GP", ...}, ...]
+        - JSON object: {"model": "random_forest_math", "rows": [...]}
+        - CSV text (Content-Type: text/csv) with a header row; ";" (UCI format)
+          or "," separators are both accepted.
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    text = body.decode("utf-8")
+
+    if content_type in ("text/csv", "application/csv", "text/plain"):
+        header = text.split("\n", 1)[0]
+        sep = ";" if ";" in header else ","
+        return read_student_csv(io.StringIO(text), sep=sep), None
+
+    payload = json.loads(text)
+    model_name = None
+    if isinstance(payload, dict):
+        model_name = payload.get("model")
+        payload = payload.get("rows", [])
+    if not isinstance(payload, list) or not payload:
+        raise ValueError("Expected a non-empty list of rows")
+    return apply_schema(pd.DataFrame.from_records(payload)), model_name
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    HTTP endpoints:
+        GET  /health            → {"status": "ok"}
+        GET  /models            → names of the loaded models
+        GET  /stats             → request count and p50/p99 latency
+        POST /predict?model=X   → predictions for JSON or CSV rows
+    """
+
+    server_version = "StudentGradePredictor/1.0"
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/models":
+            self._send_json(200, {"models": sorted(self.server.registry.models)})
+        elif path == "/stats":
+            self._send_json(200, self.server.latency.summary())
+        else:
+            self._send_json(404, {"error": f"Unknown path: {path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            df, body_model = parse_rows(self.rfile.read(length), self.headers.get("Content-Type"))
+            model_name = (
+                parse_qs(url.query).get("model", [None])[0]
+                or body_model
+                or self.server.default_model
+            )
+            pipeline = self.server.registry.get(model_name)
+            results_df = predict_frame(pipeline, prepare_features(df, warn=False))
+        except KeyError as e:
+            self._send_json(404, {"error": str(e.args[0])})
+            return
+        except Exception as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.server.latency.record(latency_ms, len(results_df))
+        self._send_json(200, {
+            "model": model_name,
+            "count": len(results_df),
+            "predictions": results_df["prediction"].tolist(),
+            "predictions_rounded": results_df["prediction_rounded"].tolist(),
+            "latency_ms": round(latency_ms, 3),
+        })
+
+    def log_message(self, format, *args):
+        # Route the default per-request access log through the project logger
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8000, models_dir: str = MODELS_DIR,
+                  default_model: str = "latest_model"):
+    """
+    Build a threaded prediction server with all models preloaded.
+
+    Args:
+        host (str): Interface to bind (default: localhost only).
+        port (int): TCP port; 0 picks a free port (useful in tests).
+        models_dir (str): Directory with the .pkl pipelines saved by save_model.
+        default_model (str): Model used when a request does not name one.
+
+    Returns:
+        ThreadingHTTPServer: Call serve_forever() to start handling requests;
+        the bound port is available as server.server_address[1].
+    """
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.registry = ModelRegistry(models_dir)
+    server.latency = LatencyTracker()
+    server.default_model = default_model
+    return server
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Example:
+#   $ python src/serve.py --port 8000
+#   $ curl -X POST "localhost:8000/predict?model=random_forest_math" \
+#          -H "Content-Type: text/csv" --data-binary @data/new_data_math.csv
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve trained models over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--models", default=MODELS_DIR, help="Directory with trained .pkl models")
+    parser.add_argument("--default-model", default="latest_model",
+                        help="Model used when a request does not specify one")
+    args = parser.parse_args()
+
+    httpd = create_server(args.host, args.port, args.models, args.default_model)
+    host, port = httpd.server_address[:2]
+    logger.info(f"[SERVE] Listening on http://{host}:{port} with models: {sorted(httpd.registry.models)}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"[SERVE] Shutting down. Latency: {httpd.latency.summary()}")
+        httpd.server_close()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+# ---------------------------------------------------------------------
+# Content-addressed stage cache.
+#
+# A run is a chain of stages per dataset:
+#
+#   load → preprocess → train → evaluate → save        (per model)
+#   load → plots                                        (EDA figures)
+#
+# Each stage gets a fingerprint: a SHA-256 over
+#   - the fingerprints of the stages it depends on,
+#   - its parameters (model hyperparameters, compression, ...),
+#   - the source code of the modules that implement it,
+# and the load stage hashes the dataset CSV itself. Changing a CSV
+# therefore invalidates everything downstream of it; changing only the
+# compression of the saved model invalidates only the save stage.
+#
+# After a stage chain completes, its fingerprints, output files (with their
+# content hashes) and result (e.g. metrics) are recorded in
+# results/cache/stages/<key>.json. A later run whose fingerprints match,
+# and whose output files are unchanged on disk, reuses the record instead
+# of running the stages again.
+# ---------------------------------------------------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(PROJECT_ROOT, "results", "cache", "stages")
+
+# Bump to invalidate every record (e.g. when the record layout changes)
+CACHE_VERSION = 1
+
+# Modules whose source code is part of each stage's fingerprint
+STAGE_CODE = {
+    "load": ["schema.py", "data_loader.py"],
+    "preprocess": ["preprocessing.py"],
+    "train": ["model.py"],
+    "evaluate": ["model.py"],
+    "save": ["model.py", "compiled.py"],
+    "plots": ["eda.py", "stream_stats.py"],
+}
+
+# Estimator parameters that change speed or verbosity but not the result
+IGNORED_PARAMS = {"n_jobs", "verbose"}
+
+# path -> ((mtime_ns, size), sha256), so unchanged files are hashed once per process
+_HASHES = {}
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, or of every file below a directory (e.g. a .mmap model)."""
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).encode("utf-8"))
+                digest.update(file_hash(full).encode("ascii"))
+        return digest.hexdigest()
+
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _HASHES.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    _HASHES[path] = (signature, digest.hexdigest())
+    return _HASHES[path][1]
+
+
+def code_hash(stage):
+    """Hash of the source files that implement a stage (see STAGE_CODE)."""
+    digest = hashlib.sha256()
+    for name in STAGE_CODE.get(stage, []):
+        path = os.path.join(SRC_DIR, name)
+        if os.path.exists(path):
+            digest.update(name.encode("utf-8"))
+            digest.update(file_hash(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def estimator_params(estimator):
+    """Hyperparameters of an estimator that affect its fitted result."""
+    return {key: value for key, value in estimator.get_params(deep=False).items()
+            if key not in IGNORED_PARAMS}
+
+
+def _json_default(value):
+    # NumPy scalars become plain numbers; anything else is fingerprinted by repr
+    if hasattr(value, "item"):
+        return value.item()
+    return repr(value)
+
+
+def fingerprint(stage, *parents, **params):
+    """
+    Fingerprint of one stage.
+
+    Args:
+        stage (str): Stage name (a key of STAGE_CODE).
+        *parents (str): Fingerprints of the stages this one consumes.
+        **params: Parameters of the stage; values are serialized as JSON
+            (repr() for anything JSON cannot represent).
+
+    Returns:
+        str: Hex SHA-256.
+    """
+    payload = {
+        "stage": stage,
+        "version": CACHE_VERSION,
+        "code": code_hash(stage),
+        "parents": list(parents),
+        "params": params,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=_json_default)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _record_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def load_record(key):
+    """The stored record for `key`, or None."""
+    path = _record_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def outputs_intact(record):
+    """True if every output file of a record still exists with the recorded content."""
+    for path, digest in record.get("outputs", {}).items():
+        if not os.path.exists(path) or file_hash(path) != digest:
+            return False
+    return True
+
+
+def lookup(key, stages):
+    """
+    Return the cached record for `key` if nothing changed, else None.
+
+    Args:
+        key (str): Record name, e.g. "math_random_forest".
+        stages (dict): stage name → current fingerprint; all must match the record.
+
+    Returns:
+        dict or None: {"stages", "outputs", "result", "created"}.
+    """
+    record = load_record(key)
+    if record is None or record.get("stages") != stages or not outputs_intact(record):
+        return None
+    return record
+
+
+def store(key, stages, outputs=(), result=None):
+    """
+    Record a completed stage chain.
+
+    Args:
+        key (str): Record name.
+        stages (dict): stage name → fingerprint.
+        outputs (iterable of str): Files (or directories) the stages produced.
+        result: JSON-serializable result to hand back on a cache hit (e.g. metrics).
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    record = {
+        "stages": stages,
+        "outputs": {os.path.abspath(path): file_hash(path) for path in outputs if path and os.path.exists(path)},
+        "result": result,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    path = _record_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, default=_json_default)
+    os.replace(tmp_path, path)
+
+
+def clear(key=None):
+    """Delete one record (or all of them)."""
+    if key is not None:
+        if os.path.exists(_record_path(key)):
+            os.remove(_record_path(key))
+        return
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".json"):
+                os.remove(os.path.join(CACHE_DIR, name))
@@ -0,0 +1,255 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data_loader import csv_byte_ranges, read_csv_range
+
+# ---------------------------------------------------------------------
+# One-pass, mergeable dataset statistics for EDA on files larger than RAM.
+#
+# A StreamingStats object is updated chunk by chunk and can be merged with
+# the stats of another part of the same file (e.g. computed by another
+# process). It keeps, in O(columns²) memory:
+#   - row count, dtypes and missing values per column
+#   - for numeric columns, over the rows where both columns i and j are
+#     present (pandas' pairwise-complete rule for df.corr):
+#       n[i, j]     number of such rows
+#       mean[i, j]  mean of column i over those rows
+#       m2[i, j]    sum of squared deviations of column i over those rows
+#       com[i, j]   co-moment of columns i and j over those rows
+#     so the diagonal holds the plain counts, means and variances.
+#     Chunks are combined with Chan et al.'s pairwise update, which stays
+#     accurate where naive sums of squares would cancel.
+#   - exact value counts per numeric column (histograms with any binning),
+#     up to MAX_DISTINCT distinct values per column
+#   - the first HEAD_ROWS rows (for the summary preview)
+# ---------------------------------------------------------------------
+MAX_DISTINCT = 10_000
+HEAD_ROWS = 5
+
+
+class StreamingStats:
+    """Mergeable counts, missing values, moments, covariances and value counts."""
+
+    def __init__(self):
+        self.n_rows = 0
+        self.columns = []          # all columns, in file order
+        self.dtypes = {}           # column -> dtype of the first chunk
+        self.missing = {}          # column -> missing values
+        self.numeric = []          # numeric columns (order of the matrices below)
+        self.n = self.mean = self.m2 = self.com = None
+        self.counts = {}           # numeric column -> {value: count}, None once MAX_DISTINCT is exceeded
+        self.head = None
+
+    # -----------------------------------------------------------------
+    # Accumulation
+    # -----------------------------------------------------------------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "StreamingStats":
+        """Stats of one in-memory DataFrame."""
+        stats = cls()
+        stats.update(df)
+        return stats
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingStats":
+        """Add the rows of one chunk (returns self)."""
+        other = StreamingStats()
+        other._fit_chunk(chunk)
+        return self.merge(other)
+
+    def _fit_chunk(self, chunk):
+        self.n_rows = len(chunk)
+        self.columns = list(chunk.columns)
+        self.dtypes = chunk.dtypes.to_dict()
+        self.missing = chunk.isnull().sum().to_dict()
+        self.head = chunk.head(HEAD_ROWS)
+        self.numeric = chunk.select_dtypes(include="number").columns.tolist()
+
+        values = chunk[self.numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        present = valid.astype(np.float64)
+
+        # Shift by the column means first: the moments are shift-invariant
+        # and the products below stay small
+        n = present.T @ present
+        shift = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(np.diag(n), 1)
+        x = np.where(valid, values - shift, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, (x.T @ present) / n, 0.0)
+        self.n = n
+        self.mean = mean + shift[:, None]
+        self.m2 = np.maximum((x ** 2).T @ present - n * mean ** 2, 0.0)
+        self.com = x.T @ x - n * mean * mean.T
+
+        self.counts = {}
+        for col in self.numeric:
+            vc = chunk[col].value_counts(sort=False)
+            self.counts[col] = vc.to_dict() if len(vc) <= MAX_DISTINCT else None
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """
+        Combine with the stats of the rows that follow this part (returns self).
+
+        Both parts must have the same columns. The preview rows come from the
+        first part that has any, so merging in file order keeps the file's head.
+        """
+        if other.n_rows == 0 and not other.columns:
+            return self
+        if self.n_rows == 0 and not self.columns:
+            self.__dict__.update(other.__dict__)
+            self.missing = dict(other.missing)
+            self.counts = {col: (dict(c) if c is not None else None) for col, c in other.counts.items()}
+            return self
+        if other.columns != self.columns or other.numeric != self.numeric:
+            raise ValueError("Cannot merge statistics of files with different columns")
+
+        n = self.n + other.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(n > 0, other.n / n, 0.0)
+        delta = other.mean - self.mean
+        cross = self.n * weight  # = n_a * n_b / n
+
+        self.com = self.com + other.com + cross * delta * delta.T
+        self.m2 = self.m2 + other.m2 + cross * delta ** 2
+        self.mean = self.mean + delta * weight
+        self.n = n
+
+        self.n_rows += other.n_rows
+        for col in self.columns:
+            self.missing[col] += other.missing[col]
+        for col in self.numeric:
+            mine, theirs = self.counts[col], other.counts[col]
+            if mine is None or theirs is None:
+                self.counts[col] = None
+                continue
+            for value, count in theirs.items():
+                mine[value] = mine.get(value, 0) + count
+            if len(mine) > MAX_DISTINCT:
+                self.counts[col] = None
+        if self.head is None or len(self.head) < HEAD_ROWS:
+            self.head = pd.concat([h for h in (self.head, other.head) if h is not None]).head(HEAD_ROWS)
+        return self
+
+    # -----------------------------------------------------------------
+    # Results (same shapes as the pandas equivalents)
+    # -----------------------------------------------------------------
+    @property
+    def shape(self):
+        return (self.n_rows, len(self.columns))
+
+    def dtype_series(self) -> pd.Series:
+        """Like df.dtypes."""
+        return pd.Series(self.dtypes, index=self.columns, dtype=object)
+
+    def missing_series(self) -> pd.Series:
+        """Like df.isnull().sum()."""
+        return pd.Series(self.missing, index=self.columns, dtype="int64")
+
+    def means(self) -> pd.Series:
+        """Like df.mean(numeric_only=True)."""
+        diag = np.diag(self.n)
+        return pd.Series(np.where(diag > 0, np.diag(self.mean), np.nan), index=self.numeric)
+
+    def var(self, ddof=1) -> pd.Series:
+        """Like df.var(numeric_only=True)."""
+        diag = np.diag(self.n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(np.where(diag > ddof, np.diag(self.m2) / (diag - ddof), np.nan),
+                             index=self.numeric)
+
+    def cov(self, ddof=1) -> pd.DataFrame:
+        """Like df.cov(numeric_only=True) (pairwise-complete rows)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = np.where(self.n > ddof, self.com / (self.n - ddof), np.nan)
+        return pd.DataFrame(cov, index=self.numeric, columns=self.numeric)
+
+    def corr(self) -> pd.DataFrame:
+        """Like df.corr(numeric_only=True) (Pearson, pairwise-complete rows)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.com / np.sqrt(self.m2 * self.m2.T)
+        corr = np.where((self.n > 1) & np.isfinite(corr), np.clip(corr, -1.0, 1.0), np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(self.m2) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.numeric, columns=self.numeric)
+
+    def value_counts(self, col) -> pd.Series:
+        """Counts per distinct value of a numeric column, sorted by value (None if too many values)."""
+        counts = self.counts.get(col)
+        if counts is None:
+            return None
+        return pd.Series(counts, name=col, dtype="int64").sort_index()
+
+    def histogram(self, col, bins=20):
+        """Like np.histogram(df[col].dropna(), bins) (None if the column has too many values)."""
+        counts = self.value_counts(col)
+        if counts is None:
+            return None
+        return np.histogram(counts.index.to_numpy(dtype=np.float64), bins=bins,
+                            weights=counts.to_numpy())
+
+
+def _stats_for_range(path, start, end, columns, chunksize):
+    """Stats of one byte range of a CSV (runs in a worker process)."""
+    stats = StreamingStats()
+    for chunk in read_csv_range(path, start, end, columns, chunksize=chunksize):
+        stats.update(chunk)
+    return stats
+
+
+def stats_from_csv(path, chunksize=100_000, workers=1) -> StreamingStats:
+    """
+    Compute StreamingStats for a student CSV in one pass, `chunksize` rows at a time.
+
+    Args:
+        path (str): ";"-separated CSV (parsed with the typed schema).
+        chunksize (int): Rows held in memory at once (per worker).
+        workers (int): Processes reading separate byte ranges of the file in
+            parallel; their partial results are merged in file order.
+
+    Returns:
+        StreamingStats
+    """
+    columns, ranges = csv_byte_ranges(path, max(1, workers))
+    if workers <= 1 or len(ranges) <= 1:
+        parts = [_stats_for_range(path, start, end, columns, chunksize) for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            parts = list(pool.map(_stats_for_range, [path] * len(ranges),
+                                  [start for start, _ in ranges], [end for _, end in ranges],
+                                  [columns] * len(ranges), [chunksize] * len(ranges)))
+
+    stats = StreamingStats()
+    for part in parts:
+        stats.merge(part)
+    if not stats.columns:  # header only
+        stats.columns = columns
+        stats.missing = {col: 0 for col in columns}
+    return stats
+
+
+# -------------------------------------------------------------------------
+# Script entry point: summary statistics of a (large) CSV.
+# Example:
+#   $ python src/stream_stats.py data/synthetic_math.csv --workers 4
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One-pass statistics of a student CSV")
+    parser.add_argument("path", help="CSV file (';' separated)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes reading the file in parallel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = stats_from_csv(args.path, args.chunksize, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rows: {stats.n_rows:,} ({elapsed:.1f}s, {stats.n_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(pd.DataFrame({"mean": stats.means(), "std": np.sqrt(stats.var()),
+                        "missing": stats.missing_series()[stats.numeric]}).round(3))
@@ -0,0 +1,308 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# ---------------------------------------------------------------------
+# Make sibling modules importable when run as `python src/tuning.py`.
+# ---------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "results")
+
+# ---------------------------------------------------------------------
+# Search spaces and the resource that grows between halving rounds.
+# - random_forest: more trees for the surviving candidates
+# - linear_regression: more training rows for the surviving candidates
+# ---------------------------------------------------------------------
+PARAM_SPACES = {
+    "random_forest": {
+        "max_depth": [None, 6, 10, 16],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "linear_regression": {
+        "fit_intercept": [True, False],
+        "positive": [False, True],
+    },
+}
+
+RESOURCES = {
+    "random_forest": {"name": "n_estimators", "max": 200},
+    "linear_regression": {"name": "n_samples", "max": None},  # None → all training rows
+}
+
+
+def sample_candidates(space, n_candidates=None, random_state=42):
+    """
+    Draw distinct parameter combinations from a grid.
+
+    Args:
+        space (dict): Parameter name → list of values.
+        n_candidates (int, optional): How many to draw (default: the whole grid,
+            capped at 27).
+        random_state (int): Seed for the draw.
+
+    Returns:
+        list of dict: Candidate parameter sets.
+    """
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    n_candidates = min(n_candidates or 27, len(grid))
+    rng = np.random.default_rng(random_state)
+    return [grid[i] for i in sorted(rng.choice(len(grid), size=n_candidates, replace=False))]
+
+
+def _evaluate_candidate(model_name, params, resource_name, resource, X_train, y_train,
+                        X_val, y_val, numeric_cols, categorical_cols, random_state, n_threads=1):
+    """
+    Fit one candidate with the given resource and return its validation MAE
+    (runs in a worker process; n_threads is its share of the estimator threads).
+    """
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.pipeline import Pipeline
+    from model import build_regressor
+    from preprocessing import build_preprocessor, preprocessor_options
+
+    cpu_start = time.process_time()
+
+    params = dict(params)
+    if resource_name == "n_samples":
+        if resource < len(X_train):
+            idx = np.random.default_rng(random_state).choice(len(X_train), size=resource, replace=False)
+            X_train, y_train = X_train.iloc[idx], y_train.iloc[idx]
+    else:
+        params[resource_name] = resource
+
+    regressor = build_regressor(model_name, params)
+    if "n_jobs" in regressor.get_params():
+        regressor.set_params(n_jobs=n_threads)
+
+    pipeline = Pipeline(steps=[
+        ("preprocessor", build_preprocessor(numeric_cols, categorical_cols,
+                                            **preprocessor_options(model_name))),
+        ("model", regressor),
+    ])
+    pipeline.fit(X_train, y_train)
+    mae = mean_absolute_error(y_val, pipeline.predict(X_val))
+
+    return {"mae": float(mae), "cpu_seconds": time.process_time() - cpu_start}
+
+
+def successive_halving_search(X, y, model_name, candidates=None, eta=3,
+                              min_resource=None, max_resource=None,
+                              budget_seconds=None, budget_type="wall",
+                              n_jobs=None, validation_size=0.25, random_state=42):
+    """
+    Budgeted hyperparameter search with successive halving.
+
+    All candidates are first evaluated with a small resource (few trees or
+    few rows); only the best 1/eta survive each round, and the survivors get
+    eta times more resource. Candidates of a round are fitted in parallel.
+    The search stops early when the next round would not fit in the budget,
+    and returns the best candidate of the last completed round.
+
+    Args:
+        X (pd.DataFrame): Training features (keep the test split out of this).
+        y (pd.Series): Training target.
+        model_name (str): "random_forest" or "linear_regression".
+        candidates (list of dict, optional): Parameter sets (default: sampled
+            from PARAM_SPACES[model_name]).
+        eta (int): Halving factor (default = 3).
+        min_resource (int, optional): Resource of the first round (default:
+            chosen so the last round reaches max_resource).
+        max_resource (int, optional): Resource cap (default from RESOURCES).
+        budget_seconds (float, optional): Wall-clock or CPU budget; None = no limit.
+        budget_type (str): "wall" (elapsed time) or "cpu" (CPU time summed
+            over all workers).
+        n_jobs (int, optional): Parallel workers (default: the max_cores
+            resource setting). Estimator threads per worker are reduced so
+            workers × threads stays within max_cores.
+        validation_size (float): Share of X used to score candidates.
+        random_state (int): Seed for the validation split and subsampling.
+
+    Returns:
+        dict: {
+            "best_params": winning parameters (without the resource),
+            "best_mae": its validation MAE,
+            "resource": resource name and value it was scored with,
+            "rounds": per-round list of {resource, candidates, results},
+            "elapsed_seconds", "cpu_seconds", "budget_exhausted"
+        }
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import train_test_split
+    from resources import get_config, inner_n_jobs, resource_limits
+
+    if budget_type not in ("wall", "cpu"):
+        raise ValueError(f"budget_type must be 'wall' or 'cpu', got: {budget_type}")
+    if model_name not in PARAM_SPACES:
+        raise ValueError(f"No search space for model: {model_name}")
+
+    candidates = candidates or sample_candidates(PARAM_SPACES[model_name], random_state=random_state)
+    n_jobs = n_jobs or get_config()["max_cores"]
+    n_threads = inner_n_jobs(outer_workers=n_jobs)
+
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=validation_size, random_state=random_state
+    )
+    numeric_cols = X.select_dtypes(include="number").columns.tolist()
+    categorical_cols = X.select_dtypes(exclude="number").columns.tolist()
+
+    # -----------------------------------------------------------------
+    # Resource schedule: enough rounds to reduce the candidates to one,
+    # ending at max_resource
+    # -----------------------------------------------------------------
+    resource_name = RESOURCES[model_name]["name"]
+    max_resource = max_resource or RESOURCES[model_name]["max"] or len(X_train)
+    n_rounds = max(1, math.ceil(math.log(len(candidates), eta)) + 1) if len(candidates) > 1 else 1
+    if min_resource is None:
+        min_resource = max(1, max_resource // eta ** (n_rounds - 1))
+    if resource_name == "n_samples":
+        min_resource = max(min_resource, min(len(X_train), 20))  # a fit needs some rows
+
+    start = time.perf_counter()
+    cpu_spent = 0.0
+    rounds = []
+    budget_exhausted = False
+    resource = min_resource
+    best = None
+
+    with resource_limits(outer_workers=n_jobs), Parallel(n_jobs=n_jobs) as parallel:
+        while candidates:
+            # Stop if the next round is not expected to fit in the budget.
+            # Cost estimate: last round's cost × resource growth × candidate share
+            if budget_seconds is not None and rounds:
+                spent = time.perf_counter() - start if budget_type == "wall" else cpu_spent
+                last = rounds[-1]
+                growth = (resource / last["resource"]) * (len(candidates) / len(last["results"]))
+                if spent + last["cost"] * growth > budget_seconds:
+                    budget_exhausted = True
+                    logger.info(f"[TUNE] Budget of {budget_seconds}s ({budget_type}) reached; stopping")
+                    break
+
+            round_start, round_cpu = time.perf_counter(), cpu_spent
+            scores = parallel(
+                delayed(_evaluate_candidate)(
+                    model_name, params, resource_name, resource,
+                    X_train, y_train, X_val, y_val, numeric_cols, categorical_cols,
+                    random_state, n_threads
+                )
+                for params in candidates
+            )
+            cpu_spent += sum(s["cpu_seconds"] for s in scores)
+            cost = (time.perf_counter() - round_start) if budget_type == "wall" else (cpu_spent - round_cpu)
+
+            results = sorted(
+                ({"params": p, "mae": round(s["mae"], 4)} for p, s in zip(candidates, scores)),
+                key=lambda r: r["mae"]
+            )
+            rounds.append({"resource": resource, "results": results, "cost": round(cost, 3)})
+            best = results[0]
+            logger.info(
+                f"[TUNE] Round {len(rounds)}: {len(results)} candidates at "
+                f"{resource_name}={resource}, best MAE {best['mae']:.3f} ({cost:.2f}s {budget_type})"
+            )
+
+            if len(results) == 1 or resource >= max_resource:
+                break
+            keep = max(1, math.ceil(len(results) / eta))
+            candidates = [r["params"] for r in results[:keep]]
+            resource = min(resource * eta, max_resource)
+
+    if best is None:
+        raise RuntimeError("Hyperparameter search did not complete a single round")
+
+    return {
+        "best_params": best["params"],
+        "best_mae": best["mae"],
+        "resource": {"name": resource_name, "value": rounds[-1]["resource"]},
+        "rounds": rounds,
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "cpu_seconds": round(cpu_spent, 3),
+        "budget_exhausted": budget_exhausted,
+    }
+
+
+def tune_and_save(dataset, model_name, budget_seconds=None, budget_type="wall",
+                  n_candidates=None, eta=3, n_jobs=None, save_latest=False):
+    """
+    Search hyperparameters for one dataset/model and publish the winner.
+
+    The search only sees the training split used by run_pipeline; the winner
+    is then trained on that split, evaluated on the untouched test split and
+    written to the usual layout:
+        - results/metrics/metrics.db                    (appended row, '<dataset>_<model>')
+        - results/models/<model>_<dataset>.pkl          (trained pipeline)
+        - results/models/<model>_<dataset>_params.json  (winning config + search log)
+
+    Returns:
+        dict: Test metrics of the winning configuration.
+    """
+    from sklearn.model_selection import train_test_split
+    from data_loader import load_dataset
+    from main import run_models
+
+    df = load_dataset(dataset)
+    if df is None:
+        raise RuntimeError(f"Failed to load {dataset} dataset")
+    X, y = df.drop("G3", axis=1), df["G3"]
+
+    # Same split as run_pipeline (test_size=0.2, random_state=42)
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    candidates = sample_candidates(PARAM_SPACES[model_name], n_candidates)
+    logger.info(f"[TUNE] {model_name} on {dataset}: {len(candidates)} candidates, eta={eta}")
+    search = successive_halving_search(
+        X_train, y_train, model_name, candidates=candidates, eta=eta,
+        budget_seconds=budget_seconds, budget_type=budget_type, n_jobs=n_jobs
+    )
+
+    # Final fit uses the full resource (e.g. all trees) with the winning parameters
+    params = dict(search["best_params"])
+    if search["resource"]["name"] != "n_samples":
+        params[search["resource"]["name"]] = RESOURCES[model_name]["max"]
+
+    metrics = run_models(dataset, [model_name], save_latest=save_latest,
+                         model_params={model_name: params})[model_name]
+
+    params_file = os.path.join(RESULTS_DIR, "models", f"{model_name}_{dataset}_params.json")
+    with open(params_file, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "test_metrics": metrics, "search": search}, f, indent=2, default=str)
+    logger.info(f"[TUNE] Winning config saved to: {params_file}")
+
+    return metrics
+
+
+# -------------------------------------------------------------------------
+# Script entry point:
+# Example:
+#   $ python src/tuning.py --dataset math --model random_forest --budget 120
+# -------------------------------------------------------------------------
+if __name__ == "__main__":
+    from resources import add_resource_arguments, configure_from_args
+
+    parser = argparse.ArgumentParser(description="Budgeted hyperparameter search (successive halving)")
+    parser.add_argument("--dataset", choices=["math", "portuguese"], required=True)
+    parser.add_argument("--model", choices=sorted(PARAM_SPACES), required=True)
+    parser.add_argument("--budget", type=float, default=None, help="Budget in seconds (default: none)")
+    parser.add_argument("--budget-type", choices=["wall", "cpu"], default="wall")
+    parser.add_argument("--candidates", type=int, default=None, help="Number of candidates to start with")
+    parser.add_argument("--eta", type=int, default=3, help="Halving factor")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel workers (default: all cores)")
+    add_resource_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    tune_and_save(args.dataset, args.model, args.budget, args.budget_type,
+                  args.candidates, args.eta, args.workers)
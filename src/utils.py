@@ -1,7 +1,200 @@
+import atexit
+import json
 import logging
+import multiprocessing.util
+import queue
 import sys
 import os
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# ---------------------------------------------------------------------
+# Logging backend
+#
+# Every project logger gets one QueueHandler (file output) and a console
+# handler. The QueueHandler only puts the record on an in-memory queue; a
+# single background QueueListener per process formats it and writes it
+# through the one shared file handle. Slow disks therefore never block
+# training or prediction threads.
+#
+# Console output stays synchronous so that log lines keep their order
+# relative to print() output.
+#
+# The backend is created lazily and belongs to the process that created it.
+# A forked child (ProcessPoolExecutor workers) that logs notices the pid
+# change and starts its own listener and file handle instead of writing to
+# the parent's queue, which has no listener thread in the child. The
+# listener is drained when a process exits (atexit in the main process, a
+# multiprocessing finalizer in pool workers).
+#
+# Output formats (set_log_format() or SGP_LOG_FORMAT):
+#   text  → results/logs/project.log    "2025-09-29 12:30:15 [INFO] Message"
+#   json  → results/logs/project.jsonl  one JSON object per line
+# ---------------------------------------------------------------------
+LOG_FORMATS = ("text", "json")
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# ---------------------------------------------------------------------
+# Optional override for the log file path.
+# Set by redirect_file_logs() in worker processes so that each worker
+# writes to its own file instead of sharing results/logs/project.log.
+# ---------------------------------------------------------------------
+_LOG_FILE_OVERRIDE = None
+
+_BACKEND = None          # {"pid", "queue", "listener", "file_handler", "log_file"}
+_BACKEND_LOCK = threading.RLock()
+_RUN_ID = None           # written once per process run (main process only)
+_EXIT_HOOK_PID = None    # process that registered the exit hooks
+
+
+def _reset_lock_after_fork():
+    # The lock may have been held by another thread at fork time
+    global _BACKEND_LOCK
+    _BACKEND_LOCK = threading.RLock()
+
+
+os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def log_format():
+    """Current log output format ("text" or "json")."""
+    fmt = os.environ.get("SGP_LOG_FORMAT", "text").lower()
+    return fmt if fmt in LOG_FORMATS else "text"
+
+
+def set_log_format(fmt: str):
+    """
+    Switch the file log between plain text and JSON lines.
+
+    The setting is stored in SGP_LOG_FORMAT, so worker processes started
+    afterwards inherit it. Call it before the first log message.
+    """
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}'. Expected one of: {list(LOG_FORMATS)}")
+    os.environ["SGP_LOG_FORMAT"] = fmt
+    with _BACKEND_LOCK:
+        if _BACKEND is not None and _BACKEND["pid"] == os.getpid():
+            _restart_backend()
+
+
+def default_log_file():
+    """Return the path of the shared project log (results/logs/project.log or project.jsonl)."""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    name = "project.jsonl" if log_format() == "json" else "project.log"
+    return os.path.join(project_root, "results", "logs", name)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, process (+ run_id)."""
+
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        if _RUN_ID is not None:
+            payload["run_id"] = _RUN_ID
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def _make_formatter():
+    return JsonFormatter() if log_format() == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def _run_separator(run_id):
+    if log_format() == "json":
+        return json.dumps({"time": datetime.now().isoformat(timespec="milliseconds"),
+                           "event": "run_started", "run_id": run_id, "process": os.getpid()}) + "\n"
+    return (
+        "\n" + "=" * 80 +
+        f"\nNEW RUN STARTED: {datetime.now()} | Run ID: {run_id}\n" +
+        "=" * 80 + "\n"
+    )
+
+
+def _start_backend():
+    """Open the log file and start the listener thread for this process."""
+    global _BACKEND, _RUN_ID, _EXIT_HOOK_PID
+    log_file = _LOG_FILE_OVERRIDE or default_log_file()
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(_make_formatter())
+
+    # -----------------------------
+    # Add a visual separator once per run (not per logger).
+    # Redirected (worker) logs are merged into the main log later,
+    # so they do not get their own run separator.
+    # -----------------------------
+    if _LOG_FILE_OVERRIDE is None and _RUN_ID is None:
+        _RUN_ID = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_handler.stream.write(_run_separator(_RUN_ID))
+        file_handler.flush()
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+
+    _BACKEND = {"pid": os.getpid(), "queue": log_queue, "listener": listener,
+                "file_handler": file_handler, "log_file": log_file}
+    if _EXIT_HOOK_PID != os.getpid():
+        # Drain the queue on exit: atexit covers the main process,
+        # multiprocessing finalizers cover pool workers (which skip atexit)
+        _EXIT_HOOK_PID = os.getpid()
+        atexit.register(_stop_backend)
+        multiprocessing.util.Finalize(None, _stop_backend, exitpriority=100)
+    return _BACKEND
+
+
+def _stop_backend():
+    """Write all queued records and close the file (no-op if not started here)."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is None or _BACKEND["pid"] != os.getpid():
+            return
+        backend, _BACKEND = _BACKEND, None
+    backend["listener"].stop()
+    backend["file_handler"].close()
+
+
+def _restart_backend():
+    _stop_backend()
+    return _start_backend()
+
+
+def _backend():
+    """The logging backend of the current process (started on first use)."""
+    backend = _BACKEND
+    if backend is not None and backend["pid"] == os.getpid():
+        return backend
+    with _BACKEND_LOCK:
+        if _BACKEND is not None and _BACKEND["pid"] == os.getpid():
+            return _BACKEND
+        return _start_backend()
+
+
+class _ProjectQueueHandler(QueueHandler):
+    """QueueHandler that always uses the current process's queue."""
+
+    def __init__(self):
+        super().__init__(None)
+        self._project_log = True  # marks handlers owned by get_logger
+
+    def enqueue(self, record):
+        # The lock keeps records from landing on a queue that is being drained
+        with _BACKEND_LOCK:
+            _backend()["queue"].put_nowait(record)
+
+
+def flush_logs():
+    """Block until every record logged so far has been written to the file."""
+    with _BACKEND_LOCK:
+        if _BACKEND is not None and _BACKEND["pid"] == os.getpid():
+            _restart_backend()
 
 
 def get_logger(name: str = __name__, level: int = logging.INFO):
@@ -12,7 +205,9 @@ def get_logger(name: str = __name__, level: int = logging.INFO):
     Features:
         - Writes logs to both console (stdout) and a file.
         - Creates results/logs/project.log if it does not exist.
-        - Each new run writes a clear header separator with timestamp + run ID.
+        - File writes happen on a background thread (QueueHandler/QueueListener)
+          through one shared file handle per process.
+        - Each new run writes one header separator with timestamp + run ID.
 
     Args:
         name (str, optional): Name of the logger (default: __name__).
@@ -37,40 +232,76 @@ def get_logger(name: str = __name__, level: int = logging.INFO):
     # Add handlers only once (avoid duplication if function called again)
     # -----------------------------------------------------------------
     if not logger.handlers:
-        # Format: 2025-09-29 12:30:15 [INFO] Message text
-        formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-
         # -----------------------------
         # Console handler (real-time logs)
+        # Format: 2025-09-29 12:30:15 [INFO] Message text
         # -----------------------------
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(formatter)
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
         logger.addHandler(console_handler)
 
         # -----------------------------
-        # File handler (persistent logs)
-        # Saves logs to results/logs/project.log
+        # File output (persistent logs) through the shared queue;
+        # the file is opened and the run separator written on first use
         # -----------------------------
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-        log_dir = os.path.join(project_root, "results", "logs")
-        os.makedirs(log_dir, exist_ok=True)
+        logger.addHandler(_ProjectQueueHandler())
 
-        log_file = os.path.join(log_dir, "project.log")
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    return logger
 
-        # -----------------------------
-        # Add a visual separator for each new run
-        # This makes the log file easier to navigate
-        # -----------------------------
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        separator = (
-            "\n" + "=" * 80 +
-            f"\nNEW RUN STARTED: {datetime.now()} | Run ID: {run_id}\n" +
-            "=" * 80 + "\n"
-        )
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(separator)
 
-    return logger
+def redirect_file_logs(log_file: str):
+    """
+    Point the file output of every project logger at a different file.
+
+    Used by worker processes (e.g. `run.py --workers N`) so that each job
+    writes an isolated log; the parent merges those files into project.log
+    afterwards with merge_log_files(). Records logged before the call are
+    written to the previous file first.
+
+    Args:
+        log_file (str): Path of the log file to write to from now on.
+    """
+    global _LOG_FILE_OVERRIDE
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with _BACKEND_LOCK:
+        _LOG_FILE_OVERRIDE = log_file
+        if _BACKEND is not None and _BACKEND["pid"] == os.getpid():
+            _restart_backend()
+
+
+def merge_log_files(log_files, target=None):
+    """
+    Append worker log files to the main project log (in the given order)
+    and delete them.
+
+    Args:
+        log_files (list of str): Worker log files; missing files are skipped.
+        target (str, optional): Destination log (default: results/logs/project.log).
+    """
+    target = target or default_log_file()
+
+    # Write pending records of this process first, then append through the
+    # shared handle when it points at the target (no second writer)
+    flush_logs()
+    backend = _BACKEND if _BACKEND is not None and _BACKEND["pid"] == os.getpid() else None
+    if backend is not None and os.path.abspath(backend["log_file"]) == os.path.abspath(target):
+        handler = backend["file_handler"]
+        handler.acquire()
+        try:
+            _append_files(handler.stream, log_files)
+            handler.flush()
+        finally:
+            handler.release()
+        return
+
+    with open(target, "a", encoding="utf-8") as out:
+        _append_files(out, log_files)
+
+
+def _append_files(out, log_files):
+    for path in log_files:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            out.write(f.read())
+        os.remove(path)